@@ -1,112 +1,284 @@
-from fastapi import APIRouter, Depends
+from fastapi import APIRouter, Depends, HTTPException, Query
 from fastapi.responses import StreamingResponse
 from sqlalchemy.ext.asyncio import AsyncSession
+from app.config import settings
+from app.core.metrics import metrics
+from app.core.sse import SSEWriter, get_json_encoder
 from app.database.connection import get_db
 from app.database.models import Conversation, Message
-from app.models.chat import ChatMessage, ChatResponse
-from app.services.chat_service import NursingChatService
+from app.database.search import match_expression, search_query, supports_search
+from app.database.write_behind import message_writer
+from app.models.chat import (
+    ChatMessage,
+    ChatResponse,
+    ConversationPage,
+    ConversationResponse,
+    MessagePage,
+    MessageResponse,
+    SearchPage,
+    SearchResult,
+)
+import asyncio
+import base64
 import json
+import threading
 import uuid
-from sqlalchemy import select
+from datetime import datetime
+from typing import TYPE_CHECKING, Optional
+from sqlalchemy import select, tuple_
+
+if TYPE_CHECKING:
+    from app.services.chat_service import NursingChatService
 
 router = APIRouter()
-chat_service = NursingChatService()
+_json_encoder = get_json_encoder(settings.SSE_JSON_ENCODER)
 
+# Built on first use: the chat service pulls in langgraph and langchain, builds the
+# OpenAI client and compiles the graph, none of which a worker needs to accept connections
+_chat_service: Optional["NursingChatService"] = None
+_chat_service_lock = threading.Lock()
 
-@router.post("/")
-async def chat(message: ChatMessage, db: AsyncSession = Depends(get_db)):
-    print(f"Received chat message: {message.content}")
-    # TODO: Get user_id from Microsoft auth token
-    user_id = "anonymous"  # Placeholder
-    
-    # Create or get conversation
+def get_chat_service() -> "NursingChatService":
+    """Return the worker's chat service, importing and building it if needed (blocking)"""
+    global _chat_service
+    if _chat_service is None:
+        with _chat_service_lock:
+            if _chat_service is None:
+                from app.services.chat_service import NursingChatService
+
+                _chat_service = NursingChatService()
+    return _chat_service
+
+async def ready_chat_service() -> "NursingChatService":
+    """Like get_chat_service, but builds off the event loop so other requests keep being served"""
+    if _chat_service is not None:
+        return _chat_service
+    return await asyncio.to_thread(get_chat_service)
+
+def _encode_cursor(*values) -> str:
+    """Opaque keyset cursor carrying the sort key of the last row on a page"""
+    return base64.urlsafe_b64encode(json.dumps(values).encode("utf-8")).decode("ascii")
+
+def _decode_cursor(cursor: str) -> list:
+    try:
+        values = json.loads(base64.urlsafe_b64decode(cursor.encode("ascii")))
+    except ValueError:
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+    if not isinstance(values, list):
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+    return values
+
+def __getattr__(name: str):
+    # Keeps `chat.chat_service` working for callers that patch or inspect the instance
+    if name == "chat_service":
+        return get_chat_service()
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
+
+async def _start_turn(message: ChatMessage, user_id: str) -> str:
+    """Queue the conversation (if new) and the user's message, returning the conversation id"""
     if not message.conversation_id:
         conversation_id = str(uuid.uuid4())
-        conversation = Conversation(id=conversation_id, user_id=user_id)
-        db.add(conversation)
+        await message_writer.enqueue(Conversation(id=conversation_id, user_id=user_id), conversation_id)
     else:
         conversation_id = message.conversation_id
     
-    # Save user message
-    user_message = Message(
-        conversation_id=conversation_id,
-        role="user",
-        content=message.content
+    await message_writer.enqueue(
+        Message(conversation_id=conversation_id, role="user", content=message.content),
+        conversation_id
     )
-    db.add(user_message)
+    return conversation_id
+
+def _save_response_nowait(conversation_id: str, content: str, interrupted: bool = False) -> None:
+    """Queue an assistant message without awaiting, for cleanup paths that may already be cancelled"""
+    if not content:
+        return
+    try:
+        message_writer.enqueue_nowait(
+            Message(conversation_id=conversation_id, role="assistant", content=content, interrupted=interrupted),
+            conversation_id
+        )
+    except asyncio.QueueFull:
+        metrics.incr("write_behind_dropped")
+        print(f"DEBUG: Write-behind queue full, dropping partial response for conversation {conversation_id}")
+
+@router.post("/")
+async def chat(message: ChatMessage):
+    print(f"Received chat message: {message.content}")
+    # TODO: Get user_id from Microsoft auth token
+    user_id = "anonymous"  # Placeholder
+    
+    # Create or get conversation and save user message (committed in the background)
+    conversation_id = await _start_turn(message, user_id)
     
     # Get AI response
-    response = await chat_service.chat(message.content)
+    chat_service = await ready_chat_service()
+    response = await chat_service.chat(message.content, conversation_id=conversation_id)
     
     # Save AI message
-    ai_message = Message(
-        conversation_id=conversation_id,
-        role="assistant",
-        content=response
+    await message_writer.enqueue(
+        Message(conversation_id=conversation_id, role="assistant", content=response),
+        conversation_id
     )
-    db.add(ai_message)
-    
-    await db.commit()
     
     return ChatResponse(response=response, conversation_id=conversation_id)
 
 @router.post("/stream")
-async def chat_stream(message: ChatMessage, db: AsyncSession = Depends(get_db)):
+async def chat_stream(message: ChatMessage):
     print(f"Received chat message for streaming: {message}")
     
     # TODO: Get user_id from Microsoft auth token
     user_id = "anonymous"  # Placeholder
     
-    # Create or get conversation
-    if not message.conversation_id:
-        conversation_id = str(uuid.uuid4())
-        conversation = Conversation(id=conversation_id, user_id=user_id)
-        db.add(conversation)
-        await db.commit()
-    else:
-        conversation_id = message.conversation_id
+    # Create or get conversation and save user message (committed in the background)
+    conversation_id = await _start_turn(message, user_id)
+    
+    chat_service = await ready_chat_service()
     
-    # Save user message
-    user_message = Message(
-        conversation_id=conversation_id,
-        role="user",
-        content=message.content
+    # No DB session is held while tokens flow; the answer is queued for a short write afterwards
+    writer = SSEWriter(
+        {"conversation_id": conversation_id},
+        coalesce_ms=settings.SSE_COALESCE_MS,
+        max_chars=settings.SSE_COALESCE_MAX_CHARS,
+        encoder=_json_encoder,
     )
-    db.add(user_message)
-    await db.commit()
+    frames = writer.stream(chat_service.chat_stream(message.content, conversation_id=conversation_id))
+    # Wait for the first frame before sending headers, so a saturated LLM still gets a proper 429/503
+    first_frame = await anext(frames, None)
     
     async def generate():
-        full_response = ""
-        async for chunk in chat_service.chat_stream(message.content):
-            full_response += chunk
-            yield f"data: {json.dumps({'content': chunk, 'conversation_id': conversation_id})}\n\n"
+        completed = False
+        try:
+            if first_frame is not None:
+                yield first_frame
+            async for frame in frames:
+                yield frame
+            completed = True
+        finally:
+            if not completed:
+                # The client went away mid-stream: keep what it was sent and stop the upstream LLM call
+                metrics.incr("stream_disconnects")
+                print(f"DEBUG: Client disconnected from stream for conversation {conversation_id}")
+                _save_response_nowait(conversation_id, writer.text, interrupted=True)
+                await frames.aclose()
         
         # Save complete AI response
-        ai_message = Message(
-            conversation_id=conversation_id,
-            role="assistant",
-            content=full_response
+        await message_writer.enqueue(
+            Message(conversation_id=conversation_id, role="assistant", content=writer.text),
+            conversation_id
         )
-        db.add(ai_message)
-        await db.commit()
         
-        yield f"data: {json.dumps({'type': 'done'})}\n\n"
+        yield writer.event({"type": "done"})
     
     return StreamingResponse(generate(), media_type="text/event-stream")
 
-@router.get("/conversations")
-async def get_conversations(db: AsyncSession = Depends(get_db)):
-    # TODO: Filter by user_id from Microsoft auth
-    result = await db.execute(select(Conversation).order_by(Conversation.updated_at.desc()))
-    conversations = result.scalars().all()
-    return conversations
-
-@router.get("/conversations/{conversation_id}/messages")
-async def get_conversation_messages(conversation_id: str, db: AsyncSession = Depends(get_db)):
-    result = await db.execute(
-        select(Message)
+@router.get("/conversations", response_model=ConversationPage)
+async def get_conversations(
+    user_id: str = "anonymous",  # TODO: Take user_id from Microsoft auth
+    limit: int = Query(20, ge=1, le=100),
+    cursor: Optional[str] = None,
+    db: AsyncSession = Depends(get_db),
+):
+    query = (
+        select(
+            Conversation.id,
+            Conversation.title,
+            Conversation.created_at,
+            Conversation.updated_at,
+            Conversation.message_count,
+            Conversation.last_message_at,
+            Conversation.last_message_preview,
+        )
+        .where(Conversation.user_id == user_id)
+        .order_by(Conversation.updated_at.desc(), Conversation.id.desc())
+        .limit(limit + 1)
+    )
+    if cursor:
+        # Keyset pagination: continue strictly after the cursor row in (updated_at, id) order. The cursor
+        # carries the values it was issued with, so activity on that conversation since does not move it
+        try:
+            updated_at, conversation_id = _decode_cursor(cursor)
+            updated_at = datetime.fromisoformat(updated_at)
+        except (TypeError, ValueError):
+            raise HTTPException(status_code=400, detail="Invalid cursor")
+        query = query.where(tuple_(Conversation.updated_at, Conversation.id) < tuple_(updated_at, conversation_id))
+    
+    rows = (await db.execute(query)).all()
+    last = rows[limit - 1] if len(rows) > limit else None
+    next_cursor = _encode_cursor(last.updated_at.isoformat(), last.id) if last else None
+    return ConversationPage(items=[ConversationResponse(**row._mapping) for row in rows[:limit]], next_cursor=next_cursor)
+
+@router.get("/conversations/{conversation_id}/messages", response_model=MessagePage)
+async def get_conversation_messages(
+    conversation_id: str,
+    limit: int = Query(50, ge=1, le=200),
+    cursor: Optional[str] = None,
+    db: AsyncSession = Depends(get_db),
+):
+    query = (
+        select(Message.id, Message.role, Message.content, Message.interrupted, Message.created_at)
         .where(Message.conversation_id == conversation_id)
-        .order_by(Message.created_at)
+        .order_by(Message.created_at, Message.id)
+        .limit(limit + 1)
     )
-    messages = result.scalars().all()
-    return messages
+    if cursor:
+        # Keyset pagination: continue strictly after the cursor message in (created_at, id) order
+        if not cursor.isdigit():
+            raise HTTPException(status_code=400, detail="Invalid cursor")
+        cursor_id = int(cursor)
+        cursor_created_at = select(Message.created_at).where(Message.id == cursor_id).scalar_subquery()
+        query = query.where(tuple_(Message.created_at, Message.id) > tuple_(cursor_created_at, cursor_id))
+    
+    # Read-your-writes: commit anything still queued for this conversation first
+    await message_writer.wait_for(conversation_id)
+    rows = (await db.execute(query)).all()
+    next_cursor = str(rows[limit - 1].id) if len(rows) > limit else None
+    return MessagePage(items=[MessageResponse(**row._mapping) for row in rows[:limit]], next_cursor=next_cursor)
+
+@router.get("/search", response_model=SearchPage)
+async def search_messages(
+    q: str = Query(..., min_length=1, max_length=500),
+    user_id: Optional[str] = None,  # None searches every user's conversations
+    role: Optional[str] = None,
+    since: Optional[datetime] = None,
+    until: Optional[datetime] = None,
+    limit: int = Query(20, ge=1, le=100),
+    cursor: Optional[str] = None,
+    db: AsyncSession = Depends(get_db),
+):
+    if not supports_search(db.bind.dialect.name):
+        raise HTTPException(status_code=501, detail="Search needs the SQLite full-text index")
+    after = None
+    if cursor:
+        # Keyset pagination: continue strictly after the cursor result in (score, message id) order.
+        # Best-effort while messages are being written, since they shift every score
+        try:
+            score, message_id = _decode_cursor(cursor)
+            after = (float(score), int(message_id))
+        except (TypeError, ValueError):
+            raise HTTPException(status_code=400, detail="Invalid cursor")
+    expression = match_expression(q)
+    if expression is None:
+        return SearchPage(items=[])
+    
+    query = search_query(expression, limit, user_id=user_id, role=role, since=since, until=until, after=after)
+    rows = (await db.execute(query)).all()
+    last = rows[limit - 1] if len(rows) > limit else None
+    next_cursor = _encode_cursor(last.score, last.message_id) if last else None
+    return SearchPage(items=[SearchResult(**row._mapping) for row in rows[:limit]], next_cursor=next_cursor)
+
+@router.get("/stats")
+async def get_chat_stats():
+    chat_service = await ready_chat_service()
+    return {
+        "answer_cache": chat_service.answer_cache.stats(),
+        "write_behind": message_writer.stats(),
+        "llm_governor": chat_service.governor.stats(),
+        "single_flight": chat_service.in_flight.stats(),
+        "llm": {
+            "calls": metrics.counter("llm_calls", node="get_clarification") + metrics.counter("llm_calls", node="generate_response"),
+            "saved_by_clarification_templates": metrics.counter("llm_calls_saved", reason="clarification_template"),
+            "saved_by_answer_cache": metrics.counter("llm_calls_saved", reason="answer_cache"),
+            "saved_by_coalescing": metrics.counter("llm_calls_saved", reason="coalesced"),
+        }
+    }
@@ -0,0 +1,129 @@
+from bisect import bisect_left
+from typing import Callable, Dict, List, Sequence, Tuple
+
+CounterKey = Tuple[str, Tuple[Tuple[str, str], ...]]
+
+# Latency buckets in seconds, from sub-millisecond index lookups to long LLM generations
+LATENCY_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0)
+TOKEN_BUCKETS = (16, 32, 64, 128, 256, 512, 1024, 2048, 4096)
+
+
+class Histogram:
+    """Cumulative-bucket histogram in the Prometheus style"""
+
+    __slots__ = ("buckets", "counts", "sum", "count")
+
+    def __init__(self, buckets: Sequence[float]):
+        self.buckets = tuple(buckets)
+        self.counts = [0] * (len(self.buckets) + 1)  # Last slot is +Inf
+        self.sum = 0.0
+        self.count = 0
+
+    def observe(self, value: float) -> None:
+        self.counts[bisect_left(self.buckets, value)] += 1
+        self.sum += value
+        self.count += 1
+
+    def quantile(self, fraction: float) -> float:
+        """Approximate quantile: the upper bound of the bucket holding it"""
+        if not self.count:
+            return 0.0
+        rank = fraction * self.count
+        seen = 0
+        for bound, count in zip(self.buckets, self.counts):
+            seen += count
+            if seen >= rank:
+                return bound
+        return float("inf")
+
+
+class Metrics:
+    """
+    In-process counters and histograms, optionally labelled.
+
+    Updates are plain dict operations on the event loop thread, cheap enough to
+    leave on in production. ``render_prometheus`` serves them, together with
+    registered gauges, in the Prometheus text format.
+    """
+
+    def __init__(self):
+        self._counters: Dict[CounterKey, float] = {}
+        self._histograms: Dict[CounterKey, Histogram] = {}
+        self._gauges: Dict[str, Callable[[], float]] = {}
+
+    def incr(self, name: str, amount: float = 1, **labels: str) -> None:
+        key = (name, tuple(sorted(labels.items())))
+        self._counters[key] = self._counters.get(key, 0) + amount
+
+    def counter(self, name: str, **labels: str) -> float:
+        return self._counters.get((name, tuple(sorted(labels.items()))), 0)
+
+    def counters(self) -> Dict[str, float]:
+        """Return every counter keyed as name{label="value",...}"""
+        snapshot = {}
+        for (name, labels), value in sorted(self._counters.items()):
+            label_text = ",".join(f'{key}="{value}"' for key, value in labels)
+            snapshot[f"{name}{{{label_text}}}" if labels else name] = value
+        return snapshot
+
+    def observe(self, name: str, value: float, *, buckets: Sequence[float] = LATENCY_BUCKETS, **labels: str) -> None:
+        key = (name, tuple(sorted(labels.items())))
+        histogram = self._histograms.get(key)
+        if histogram is None:
+            histogram = self._histograms[key] = Histogram(buckets)
+        histogram.observe(value)
+
+    def histogram(self, name: str, **labels: str) -> Histogram:
+        return self._histograms.get((name, tuple(sorted(labels.items())))) or Histogram(LATENCY_BUCKETS)
+
+    def register_gauge(self, name: str, read: Callable[[], float]) -> None:
+        """Report ``read()`` as a gauge whenever metrics are scraped"""
+        self._gauges[name] = read
+
+    def render_prometheus(self) -> str:
+        lines: List[str] = []
+        typed = set()
+
+        def declare(name: str, kind: str) -> None:
+            if name not in typed:
+                typed.add(name)
+                lines.append(f"# TYPE {name} {kind}")
+
+        def label_text(labels, extra: str = "") -> str:
+            parts = [f'{key}="{_escape(value)}"' for key, value in labels]
+            if extra:
+                parts.append(extra)
+            return "{" + ",".join(parts) + "}" if parts else ""
+
+        for (name, labels), value in sorted(self._counters.items()):
+            declare(name, "counter")
+            lines.append(f"{name}{label_text(labels)} {value}")
+
+        for (name, labels), histogram in sorted(self._histograms.items(), key=lambda item: item[0]):
+            declare(name, "histogram")
+            cumulative = 0
+            for bound, count in zip(histogram.buckets, histogram.counts):
+                cumulative += count
+                bucket_labels = label_text(labels, 'le="%g"' % bound)
+                lines.append(f"{name}_bucket{bucket_labels} {cumulative}")
+            bucket_labels = label_text(labels, 'le="+Inf"')
+            lines.append(f"{name}_bucket{bucket_labels} {histogram.count}")
+            lines.append(f"{name}_sum{label_text(labels)} {histogram.sum}")
+            lines.append(f"{name}_count{label_text(labels)} {histogram.count}")
+
+        for name, read in sorted(self._gauges.items()):
+            declare(name, "gauge")
+            lines.append(f"{name} {read()}")
+
+        return "\n".join(lines) + "\n"
+
+    def reset(self) -> None:
+        self._counters.clear()
+        self._histograms.clear()
+
+
+def _escape(value: str) -> str:
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+metrics = Metrics()
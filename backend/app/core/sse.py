@@ -0,0 +1,131 @@
+import asyncio
+import json
+from contextlib import aclosing, suppress
+from typing import Any, AsyncIterator, Callable, Dict, List, Optional
+
+try:
+    import orjson
+except ImportError:  # Optional speed-up, installed with the "fast-json" extra
+    orjson = None
+
+JsonEncoder = Callable[[Any], bytes]
+
+
+def _stdlib_dumps(value: Any) -> bytes:
+    return json.dumps(value, separators=(",", ":")).encode()
+
+
+def get_json_encoder(name: str = "auto") -> JsonEncoder:
+    """Return a bytes-producing JSON encoder: "orjson", "json", or "auto" (orjson when installed)"""
+    if name == "orjson" or (name == "auto" and orjson is not None):
+        if orjson is None:
+            raise RuntimeError("SSE_JSON_ENCODER is 'orjson' but orjson is not installed")
+        return orjson.dumps
+    return _stdlib_dumps
+
+
+class SSEWriter:
+    """
+    Turns a stream of text tokens into Server-Sent Events frames.
+
+    Each frame is ``data: {"content": ..., <fields>}``; the bytes around the content
+    are encoded once per stream, so per frame only the content itself goes through
+    the JSON encoder. Tokens that arrive within ``coalesce_ms`` of the first
+    buffered token (or until ``max_chars`` are buffered) share one frame, cutting
+    network writes on fast streams. The first token is always sent immediately so
+    time to first token is unaffected.
+    """
+
+    def __init__(self, fields: Optional[Dict[str, Any]] = None, coalesce_ms: float = 0, max_chars: int = 512, encoder: Optional[JsonEncoder] = None):
+        self.encode = encoder or get_json_encoder()
+        self.coalesce_seconds = coalesce_ms / 1000
+        self.max_chars = max_chars
+        self._prefix = b'data: {"content":'
+        encoded_fields = self.encode(fields) if fields else b"{}"
+        self._suffix = (b"," + encoded_fields[1:] if fields else b"}") + b"\n\n"
+        self._sent: List[str] = []
+        self.frames = 0
+        self.tokens = 0
+
+    @property
+    def text(self) -> str:
+        """Everything sent to the client so far"""
+        return "".join(self._sent)
+
+    def frame(self, content: str) -> bytes:
+        self._sent.append(content)
+        self.frames += 1
+        return self._prefix + self.encode(content) + self._suffix
+
+    def event(self, payload: Dict[str, Any]) -> bytes:
+        """Encode a standalone event, e.g. the end-of-stream marker"""
+        return b"data: " + self.encode(payload) + b"\n\n"
+
+    async def stream(self, tokens: AsyncIterator[str]) -> AsyncIterator[bytes]:
+        """Yield coalesced frames for ``tokens``; closing this stream also stops reading ``tokens``"""
+        if self.coalesce_seconds <= 0:
+            # Closes the token source (e.g. the upstream LLM call) as soon as this stream is closed
+            async with aclosing(tokens):
+                async for token in tokens:
+                    if token:
+                        self.tokens += 1
+                        yield self.frame(token)
+            return
+
+        # A reader task buffers tokens as they arrive; this generator wakes once per
+        # frame (first token, full buffer, window elapsed or end of stream), not per token
+        loop = asyncio.get_running_loop()
+        buffered: List[str] = []
+        buffered_chars = 0
+        finished = False
+        wake: Optional[asyncio.Future] = None
+
+        def notify() -> None:
+            if wake is not None and not wake.done():
+                wake.set_result(None)
+
+        async def read() -> None:
+            nonlocal buffered_chars, finished
+            try:
+                async with aclosing(tokens):
+                    async for token in tokens:
+                        if not token:
+                            continue
+                        self.tokens += 1
+                        buffered.append(token)
+                        buffered_chars += len(token)
+                        if len(buffered) == 1 or buffered_chars >= self.max_chars:
+                            notify()
+            finally:
+                finished = True
+                notify()
+
+        reader = loop.create_task(read())
+        try:
+            while True:
+                if not buffered:
+                    if finished:
+                        break
+                    wake = loop.create_future()
+                    await wake
+                    continue
+                if self.frames and not finished and buffered_chars < self.max_chars:
+                    # Hold the frame open for the rest of the window
+                    wake = loop.create_future()
+                    timer = loop.call_later(self.coalesce_seconds, notify)
+                    try:
+                        await wake
+                    finally:
+                        timer.cancel()
+                content = "".join(buffered)
+                buffered.clear()
+                buffered_chars = 0
+                yield self.frame(content)
+            # Surface an error raised by the token source
+            reader.result()
+        finally:
+            if not reader.done():
+                # Cancelling the reader also ends the token source (e.g. the upstream LLM call)
+                reader.cancel()
+                with suppress(asyncio.CancelledError):
+                    await reader
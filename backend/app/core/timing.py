@@ -0,0 +1,107 @@
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Dict, Iterator, List, Optional
+
+from app.core.metrics import metrics
+
+
+class RequestTimings:
+    """Durations recorded while handling one request, summed per Server-Timing metric name"""
+
+    __slots__ = ("started", "totals")
+
+    def __init__(self):
+        self.started = time.perf_counter()
+        self.totals: Dict[str, List[float]] = {}
+
+    def add(self, name: str, seconds: float) -> None:
+        entry = self.totals.get(name)
+        if entry is None:
+            self.totals[name] = [seconds, 1]
+        else:
+            entry[0] += seconds
+            entry[1] += 1
+
+    def header(self) -> str:
+        entries = [f'{name};dur={total * 1000:.2f};desc="{int(count)}x"' for name, (total, count) in self.totals.items()]
+        entries.append(f"total;dur={(time.perf_counter() - self.started) * 1000:.2f}")
+        return ", ".join(entries)
+
+
+# Tasks spawned while handling a request copy this context, so they add to the same timings
+_request_timings: ContextVar[Optional[RequestTimings]] = ContextVar("request_timings", default=None)
+
+
+def current_timings() -> Optional[RequestTimings]:
+    return _request_timings.get()
+
+
+def bind_timings(timings: Optional[RequestTimings]) -> None:
+    """Attribute timings recorded in the current context (e.g. a detached task) to a request"""
+    _request_timings.set(timings)
+
+
+def record(metric: str, seconds: float, server_timing: Optional[str] = None, **labels: str) -> None:
+    """Observe a duration in the ``metric`` histogram and, within a request, its Server-Timing entry"""
+    metrics.observe(metric, seconds, **labels)
+    if server_timing is not None:
+        timings = _request_timings.get()
+        if timings is not None:
+            timings.add(server_timing, seconds)
+
+
+@contextmanager
+def timed(metric: str, server_timing: Optional[str] = None, **labels: str) -> Iterator[None]:
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        record(metric, time.perf_counter() - start, server_timing, **labels)
+
+
+class ServerTimingMiddleware:
+    """
+    ASGI middleware that collects timings per request and returns them in a
+    ``Server-Timing`` header. Streaming responses send headers with their first
+    frame, so they report what happened up to that point.
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        timings = RequestTimings()
+        token = _request_timings.set(timings)
+
+        async def send_with_timings(message):
+            if message["type"] == "http.response.start":
+                message["headers"] = list(message.get("headers", [])) + [(b"server-timing", timings.header().encode())]
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_with_timings)
+        finally:
+            record("http_request_duration_seconds", time.perf_counter() - timings.started, path=_route_path(scope))
+            _request_timings.reset(token)
+
+
+def _route_path(scope) -> str:
+    # The matched route template keeps label cardinality bounded (ids are not in it)
+    template = getattr(scope.get("route"), "path_format", None)
+    if template is None:
+        return "unmatched"
+    # Routes of included routers may hold their path relative to the prefix; recover
+    # the prefix from the request path so the label is the full template
+    path = scope["path"]
+    try:
+        matched = template.format(**scope.get("path_params", {}))
+    except (KeyError, IndexError, ValueError):
+        return template
+    if path.endswith(matched):
+        return path[: len(path) - len(matched)] + template
+    return template
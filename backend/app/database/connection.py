@@ -1,8 +1,69 @@
-from sqlalchemy.ext.asyncio import AsyncSession, create_async_engine
+import time
+from typing import Dict, Optional
+from sqlalchemy import event
+from sqlalchemy.ext.asyncio import AsyncEngine, AsyncSession, create_async_engine
 from sqlalchemy.orm import sessionmaker, declarative_base
 from app.config import settings
+from app.core.timing import record
 
-engine = create_async_engine(settings.DATABASE_URL, echo=False)
+def sqlite_pragmas() -> Dict[str, object]:
+    """PRAGMAs applied to every new SQLite connection"""
+    return {
+        "journal_mode": settings.SQLITE_JOURNAL_MODE,
+        "synchronous": settings.SQLITE_SYNCHRONOUS,
+        "busy_timeout": settings.SQLITE_BUSY_TIMEOUT_MS,
+        "mmap_size": settings.SQLITE_MMAP_SIZE,
+    }
+
+def instrument_statements(engine: AsyncEngine) -> None:
+    """Time every statement into the db_statement_duration_seconds histogram, by operation"""
+    # The start time lives on the statement's execution context, so a statement that fails
+    # (no after_cursor_execute) leaves nothing behind on the pooled connection
+    @event.listens_for(engine.sync_engine, "before_cursor_execute")
+    def _start_timer(conn, cursor, statement, parameters, context, executemany):
+        context._query_start_time = time.perf_counter()
+
+    @event.listens_for(engine.sync_engine, "after_cursor_execute")
+    def _stop_timer(conn, cursor, statement, parameters, context, executemany):
+        elapsed = time.perf_counter() - context._query_start_time
+        operation = statement.lstrip().split(None, 1)[0].upper() if statement else "UNKNOWN"
+        record("db_statement_duration_seconds", elapsed, "db", operation=operation)
+
+def create_engine(url: str, pragmas: Optional[Dict[str, object]] = None) -> AsyncEngine:
+    """Create the async engine for a database URL using the profile configured in settings"""
+    if url.startswith("sqlite"):
+        # SQLite serializes writers anyway; the pool only needs to wait for the busy timeout
+        new_engine = create_async_engine(
+            url,
+            echo=settings.DB_ECHO,
+            connect_args={"timeout": settings.SQLITE_BUSY_TIMEOUT_MS / 1000},
+        )
+        pragmas = sqlite_pragmas() if pragmas is None else pragmas
+
+        @event.listens_for(new_engine.sync_engine, "connect")
+        def _apply_sqlite_pragmas(dbapi_connection, connection_record):
+            cursor = dbapi_connection.cursor()
+            for name, value in pragmas.items():
+                cursor.execute(f"PRAGMA {name}={value}")
+            cursor.close()
+
+        instrument_statements(new_engine)
+        return new_engine
+
+    # Server databases such as postgresql+asyncpg get a bounded, health-checked pool
+    new_engine = create_async_engine(
+        url,
+        echo=settings.DB_ECHO,
+        pool_size=settings.DB_POOL_SIZE,
+        max_overflow=settings.DB_MAX_OVERFLOW,
+        pool_timeout=settings.DB_POOL_TIMEOUT_SECONDS,
+        pool_recycle=settings.DB_POOL_RECYCLE_SECONDS,
+        pool_pre_ping=settings.DB_POOL_PRE_PING,
+    )
+    instrument_statements(new_engine)
+    return new_engine
+
+engine = create_engine(settings.DATABASE_URL)
 async_session = sessionmaker(engine, class_=AsyncSession, expire_on_commit=False)
 
 Base = declarative_base()
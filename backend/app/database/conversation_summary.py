@@ -0,0 +1,93 @@
+import re
+from datetime import datetime, timezone
+from typing import Dict, List, Sequence
+
+from sqlalchemy import func, select, update
+from sqlalchemy.engine import Connection
+from sqlalchemy.sql import Executable
+
+from app.database.models import Conversation, Message
+
+TITLE_MAX_LENGTH = 60
+PREVIEW_MAX_LENGTH = 120
+
+_WHITESPACE = re.compile(r"\s+")
+
+
+def shorten(text: str, max_length: int) -> str:
+    """Collapse whitespace and cut at a word boundary, marking the cut with an ellipsis"""
+    text = _WHITESPACE.sub(" ", text).strip()
+    if len(text) <= max_length:
+        return text
+    # One character past the room left for the ellipsis shows whether the last word there is complete
+    head = text[:max_length]
+    cut = head.rsplit(" ", 1)[0] if " " in head else head[: max_length - 1]
+    return cut.rstrip(" ,.;:") + "…"
+
+
+def auto_title(first_user_message: str) -> str:
+    return shorten(first_user_message, TITLE_MAX_LENGTH)
+
+
+def summary_updates(ops: Sequence[object]) -> List[Executable]:
+    """
+    Statements that fold a batch's message inserts into their conversations'
+    message_count, last_message_at, last_message_preview and (if still unset) title.
+
+    Meant to run in the transaction that inserts the messages, after they are added,
+    so the summary never disagrees with the messages table. One statement per
+    conversation, however many of its messages are in the batch.
+    """
+    batches: Dict[str, List[Message]] = {}
+    for op in ops:
+        if isinstance(op, Message):
+            batches.setdefault(op.conversation_id, []).append(op)
+
+    # Set here rather than by the database: SQLite's CURRENT_TIMESTAMP only has whole seconds,
+    # which would leave conversations active within the same second unordered in the list
+    now = datetime.now(timezone.utc)
+    statements = []
+    for conversation_id, messages in batches.items():
+        values = {
+            "message_count": Conversation.message_count + len(messages),
+            "last_message_at": now,
+            "updated_at": now,
+            "last_message_preview": shorten(messages[-1].content or "", PREVIEW_MAX_LENGTH),
+        }
+        first_user_message = next((message.content for message in messages if message.role == "user" and message.content), None)
+        if first_user_message:
+            values["title"] = func.coalesce(Conversation.title, auto_title(first_user_message))
+        statements.append(
+            update(Conversation)
+            .where(Conversation.id == conversation_id)
+            .values(**values)
+            .execution_options(synchronize_session=False)
+        )
+    return statements
+
+
+def backfill_summaries(conn: Connection) -> None:
+    """Compute the summary fields from the messages table, for databases created before they existed"""
+    counts = select(func.count()).where(Message.conversation_id == Conversation.id).scalar_subquery()
+    last_at = select(func.max(Message.created_at)).where(Message.conversation_id == Conversation.id).scalar_subquery()
+    # Activity order follows the last message too, as it does for new writes
+    conn.execute(
+        update(Conversation).values(
+            message_count=counts, last_message_at=last_at, updated_at=func.coalesce(last_at, Conversation.updated_at)
+        )
+    )
+
+    rows = conn.execute(
+        select(Message.conversation_id, Message.role, Message.content).order_by(Message.conversation_id, Message.created_at, Message.id)
+    )
+    latest: Dict[str, str] = {}
+    first_user: Dict[str, str] = {}
+    for row in rows:
+        latest[row.conversation_id] = row.content or ""
+        if row.role == "user" and row.content and row.conversation_id not in first_user:
+            first_user[row.conversation_id] = row.content
+    for conversation_id, content in latest.items():
+        values = {"last_message_preview": shorten(content, PREVIEW_MAX_LENGTH)}
+        if conversation_id in first_user:
+            values["title"] = func.coalesce(Conversation.title, auto_title(first_user[conversation_id]))
+        conn.execute(update(Conversation).where(Conversation.id == conversation_id).values(**values))
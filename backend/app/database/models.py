@@ -1,21 +1,53 @@
-from sqlalchemy import Column, String, Text, DateTime, Integer
-from sqlalchemy.sql import func
+from sqlalchemy import Boolean, Column, String, Text, DateTime, Integer, Index
+from sqlalchemy.sql import false, func
 from app.database.connection import Base
 
 class Conversation(Base):
     __tablename__ = "conversations"
+    __table_args__ = (
+        # Serves the per-user conversation list as a single index range scan
+        Index("ix_conversations_user_updated", "user_id", "updated_at", "id"),
+    )
     
     id = Column(String, primary_key=True, index=True)
-    user_id = Column(String, index=True)  # TODO: Will be populated from Microsoft auth
+    user_id = Column(String)  # TODO: Will be populated from Microsoft auth
     title = Column(String, nullable=True)
+    # Last known user info, used to rebuild session state after it is evicted from memory
+    unit = Column(String, nullable=True)
+    role = Column(String, nullable=True)
+    # Rolling summary of every message up to and including summarized_through_id
+    summary = Column(Text, nullable=True)
+    summarized_through_id = Column(Integer, nullable=True)
+    # Maintained with every message insert (same transaction), so the conversation list needs no joins
+    message_count = Column(Integer, nullable=False, default=0, server_default="0")
+    last_message_at = Column(DateTime(timezone=True), nullable=True)
+    last_message_preview = Column(String, nullable=True)
     created_at = Column(DateTime(timezone=True), server_default=func.now())
-    updated_at = Column(DateTime(timezone=True), server_default=func.now(), onupdate=func.now())
+    # Orders the conversation list by message activity, so only message writes set it; no onupdate,
+    # which would also move a conversation when its user info or rolling summary is written
+    updated_at = Column(DateTime(timezone=True), server_default=func.now())
 
 class Message(Base):
     __tablename__ = "messages"
+    __table_args__ = (
+        # Serves a conversation's messages in order as a single index range scan
+        Index("ix_messages_conversation_created", "conversation_id", "created_at"),
+    )
     
     id = Column(Integer, primary_key=True, index=True)
-    conversation_id = Column(String, index=True)
+    conversation_id = Column(String)
     role = Column(String)  # "user" or "assistant"
     content = Column(Text)
+    # Set when the client disconnected mid-stream and only a partial answer was saved
+    interrupted = Column(Boolean, nullable=False, default=False, server_default=false())
     created_at = Column(DateTime(timezone=True), server_default=func.now())
+
+class SessionState(Base):
+    __tablename__ = "session_state"
+    
+    # Namespaced key, e.g. "user_info:<conversation id>"
+    key = Column(String, primary_key=True)
+    value = Column(Text, nullable=False)
+    # Bumped on every write; writers compare-and-set against the version they read
+    version = Column(Integer, nullable=False)
+    updated_at = Column(DateTime(timezone=True), server_default=func.now(), onupdate=func.now())
@@ -0,0 +1,60 @@
+import asyncio
+
+from sqlalchemy import inspect, text
+from sqlalchemy.engine import Connection
+from sqlalchemy.schema import CreateColumn
+
+from app.database.connection import engine
+from app.database.conversation_summary import backfill_summaries
+from app.database.models import Base
+from app.database.search import sync_search_index
+
+# Run when the column is added to an existing table, to derive its values from older data
+BACKFILLS = {
+    ("conversations", "message_count"): backfill_summaries,
+}
+
+
+def sync_schema(conn: Connection) -> None:
+    """
+    Create missing tables, then add any columns and indexes that were introduced
+    after an existing database file was first created, and the full-text search index.
+    """
+    Base.metadata.create_all(conn)
+
+    backfills = []
+    inspector = inspect(conn)
+    for table in Base.metadata.sorted_tables:
+        existing_columns = {column["name"] for column in inspector.get_columns(table.name)}
+        for column in table.columns:
+            if column.name not in existing_columns:
+                column_ddl = CreateColumn(column).compile(dialect=conn.dialect)
+                conn.execute(text(f"ALTER TABLE {table.name} ADD COLUMN {column_ddl}"))
+                if (table.name, column.name) in BACKFILLS:
+                    backfills.append(BACKFILLS[(table.name, column.name)])
+
+        existing_indexes = {index["name"] for index in inspector.get_indexes(table.name)}
+        for index in table.indexes:
+            if index.name not in existing_indexes:
+                index.create(conn)
+
+    for backfill in backfills:
+        backfill(conn)
+
+    sync_search_index(conn)
+
+
+async def sync_database_schema() -> None:
+    async with engine.begin() as conn:
+        await conn.run_sync(sync_schema)
+
+
+async def _sync_and_close() -> None:
+    await sync_database_schema()
+    await engine.dispose()
+
+
+if __name__ == "__main__":
+    # Run once per deploy, before the workers start (DB_SYNC_SCHEMA_ON_STARTUP is off by default)
+    asyncio.run(_sync_and_close())
+    print(f"Database schema is up to date ({engine.url.render_as_string(hide_password=True)})")
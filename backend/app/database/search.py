@@ -0,0 +1,169 @@
+import re
+from datetime import datetime, timezone
+from typing import Optional, Tuple
+
+from sqlalchemy import column, func, literal_column, select, table, text, tuple_
+from sqlalchemy.engine import Connection
+from sqlalchemy.sql import Select
+
+from app.config import settings
+from app.database.models import Conversation, Message
+
+# External-content FTS5 index: it stores only the inverted index and reads message text
+# from the messages table, which the triggers below keep it in step with. Only the text is
+# indexed; filters (user, role, dates) join back to the messages and conversations tables.
+SEARCH_TABLE = "messages_fts"
+SNIPPET_TOKENS = 12
+HIGHLIGHT_START = "**"
+HIGHLIGHT_END = "**"
+
+_TERM = re.compile(r"\w+")
+
+_INDEX_DDL = (
+    f"CREATE VIRTUAL TABLE IF NOT EXISTS {SEARCH_TABLE} USING fts5("
+    "content, content='messages', content_rowid='id', tokenize='porter unicode61 remove_diacritics 2')"
+)
+
+# Run inside the inserting transaction, so a committed message is always searchable; updates
+# to other columns (e.g. interrupted) do not touch the index
+_TRIGGERS = {
+    "messages_fts_insert": f"""AFTER INSERT ON messages BEGIN
+        INSERT INTO {SEARCH_TABLE}(rowid, content) VALUES (new.id, new.content);
+    END""",
+    "messages_fts_delete": f"""AFTER DELETE ON messages BEGIN
+        INSERT INTO {SEARCH_TABLE}({SEARCH_TABLE}, rowid, content) VALUES ('delete', old.id, old.content);
+    END""",
+    "messages_fts_update": f"""AFTER UPDATE OF content ON messages BEGIN
+        INSERT INTO {SEARCH_TABLE}({SEARCH_TABLE}, rowid, content) VALUES ('delete', old.id, old.content);
+        INSERT INTO {SEARCH_TABLE}(rowid, content) VALUES (new.id, new.content);
+    END""",
+}
+
+_search_index = table(SEARCH_TABLE, column("rowid"))
+_candidates = _search_index.alias("candidates")
+
+
+def supports_search(dialect_name: str) -> bool:
+    return dialect_name == "sqlite"
+
+
+def sync_search_index(conn: Connection) -> None:
+    """
+    Create the full-text index and its triggers, indexing existing messages the first time.
+    An index with a different definition (e.g. one that also indexed conversation_id) is
+    dropped and rebuilt from the messages table.
+    """
+    if not supports_search(conn.dialect.name):
+        return
+    existing_ddl = conn.execute(
+        text("SELECT sql FROM sqlite_master WHERE type = 'table' AND name = :name"), {"name": SEARCH_TABLE}
+    ).scalar()
+    # SQLite keeps the statement without its IF NOT EXISTS
+    current = existing_ddl == _INDEX_DDL.replace(" IF NOT EXISTS", "")
+    if existing_ddl is not None and not current:
+        for name in _TRIGGERS:
+            conn.execute(text(f"DROP TRIGGER IF EXISTS {name}"))
+        conn.execute(text(f"DROP TABLE {SEARCH_TABLE}"))
+    conn.execute(text(_INDEX_DDL))
+    for name, body in _TRIGGERS.items():
+        conn.execute(text(f"CREATE TRIGGER IF NOT EXISTS {name} {body}"))
+    if not current:
+        conn.execute(text(f"INSERT INTO {SEARCH_TABLE}({SEARCH_TABLE}) VALUES ('rebuild')"))
+
+
+def _quote(value: str) -> str:
+    return '"' + value.replace('"', '""') + '"'
+
+
+def match_expression(query: str) -> Optional[str]:
+    """
+    Turn free text into an FTS5 query matching messages that contain every word.
+
+    Each word is quoted, so operators and punctuation in user input are never parsed as
+    FTS5 syntax. Returns None when there are no words to match.
+    """
+    terms = _TERM.findall(query)
+    if not terms:
+        return None
+    return "content : (" + " ".join(_quote(term) for term in terms) + ")"
+
+
+def _as_utc(moment: datetime) -> datetime:
+    # Timestamps are stored as naive UTC
+    if moment.tzinfo is None:
+        return moment
+    return moment.astimezone(timezone.utc).replace(tzinfo=None)
+
+
+def _filtered(query: Select, user_id, role, since, until) -> Select:
+    if user_id is not None:
+        query = query.where(Conversation.user_id == user_id)
+    if role is not None:
+        query = query.where(Message.role == role)
+    if since is not None:
+        query = query.where(Message.created_at >= _as_utc(since))
+    if until is not None:
+        query = query.where(Message.created_at < _as_utc(until))
+    return query
+
+
+def search_query(
+    expression: str,
+    limit: int,
+    user_id: Optional[str] = None,
+    role: Optional[str] = None,
+    since: Optional[datetime] = None,
+    until: Optional[datetime] = None,
+    after: Optional[Tuple[float, int]] = None,
+    max_candidates: Optional[int] = None,
+) -> Select:
+    """
+    Best matches first (bm25 on the message text, lower is better), then by message id,
+    with a highlighted snippet of each message. Fetches limit + 1 rows so the caller can
+    tell if there is another page; ``after`` continues strictly after a (score, id) cursor.
+    Pages are best-effort: scores depend on the whole index, so messages written while a
+    client pages can shift them and a result may be skipped or repeated across pages.
+
+    Ranking scores every match, so only the newest ``max_candidates`` matches that pass
+    the filters are ranked. Finding them is a walk down the index in rowid order, which
+    stops as soon as there are enough.
+    """
+    max_candidates = settings.SEARCH_MAX_CANDIDATES if max_candidates is None else max_candidates
+    index = literal_column(SEARCH_TABLE)
+    score = func.bm25(index)
+
+    candidates = (
+        select(_candidates.c.rowid)
+        .join(Message, Message.id == _candidates.c.rowid)
+        .where(literal_column(f"candidates.{SEARCH_TABLE}").op("MATCH")(expression))
+    )
+    if user_id is not None:
+        candidates = candidates.join(Conversation, Conversation.id == Message.conversation_id)
+    candidates = _filtered(candidates, user_id, role, since, until)
+    oldest_candidate = (
+        candidates.order_by(_candidates.c.rowid.desc()).limit(1).offset(max_candidates - 1).correlate(None).scalar_subquery()
+    )
+
+    query = _filtered(
+        select(
+            Message.id.label("message_id"),
+            Message.conversation_id,
+            Conversation.title.label("conversation_title"),
+            Conversation.user_id,
+            Message.role,
+            Message.created_at,
+            func.snippet(index, 0, HIGHLIGHT_START, HIGHLIGHT_END, "…", SNIPPET_TOKENS).label("snippet"),
+            score.label("score"),
+        )
+        .select_from(_search_index)
+        .join(Message, Message.id == _search_index.c.rowid)
+        .join(Conversation, Conversation.id == Message.conversation_id)
+        .where(index.op("MATCH")(expression))
+        .where(_search_index.c.rowid >= func.coalesce(oldest_candidate, 0))
+        .order_by(score, Message.id)
+        .limit(limit + 1),
+        user_id, role, since, until,
+    )
+    if after is not None:
+        query = query.where(tuple_(score, Message.id) > tuple_(*after))
+    return query
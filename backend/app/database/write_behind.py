@@ -0,0 +1,221 @@
+import asyncio
+import time
+from collections import deque
+from typing import Any, Dict, List, Optional, Union
+
+from sqlalchemy.sql import Executable
+
+from app.config import settings
+from app.core.metrics import metrics
+from app.core.timing import record
+from app.database.connection import async_session
+from app.database.conversation_summary import summary_updates
+
+# A queued write is either an ORM object to insert or a statement to execute
+WriteOp = Union[Any, Executable]
+
+
+def _percentile(values, fraction: float) -> float:
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    return ordered[min(int(len(ordered) * fraction), len(ordered) - 1)]
+
+
+class _Pending:
+    __slots__ = ("op", "conversation_id")
+
+    def __init__(self, op: WriteOp, conversation_id: Optional[str]):
+        self.op = op
+        self.conversation_id = conversation_id
+
+
+class WriteBehindQueue:
+    """
+    Bounded in-process queue of database writes, committed in batches.
+
+    Request handlers enqueue inserts and updates and return without waiting for a
+    commit; a background task drains the queue in FIFO order and commits up to
+    ``max_batch_size`` writes per transaction, waiting at most ``flush_interval``
+    seconds for a batch to fill. When the queue is full, ``enqueue`` waits, which
+    pushes back on callers instead of growing memory. ``flush`` and
+    ``wait_for`` let readers see their own writes.
+    """
+
+    def __init__(self, session_factory=async_session, max_queue_size: int = 10000, max_batch_size: int = 200, flush_interval: float = 0.02):
+        self.session_factory = session_factory
+        self.max_queue_size = max_queue_size
+        self.max_batch_size = max_batch_size
+        self.flush_interval = flush_interval
+        self._queue: Optional[asyncio.Queue] = None
+        self._task: Optional[asyncio.Task] = None
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._pending_by_conversation: Dict[str, int] = {}
+
+        self.batches = 0
+        self.written = 0
+        self.failed = 0
+        self.last_batch_size = 0
+        self.last_batch_ms = 0.0
+        # Recent commit latencies, for percentiles in stats()
+        self._batch_ms = deque(maxlen=1000)
+
+    def _ensure_started(self) -> asyncio.Queue:
+        loop = asyncio.get_running_loop()
+        if self._loop is not loop:
+            # First use, or a new event loop (e.g. between test runs): carry over anything still queued
+            leftover = []
+            while self._queue is not None and not self._queue.empty():
+                leftover.append(self._queue.get_nowait())
+            self._queue = asyncio.Queue(maxsize=self.max_queue_size)
+            for item in leftover:
+                self._queue.put_nowait(item)
+            self._loop = loop
+            self._task = None
+        if self._task is None or self._task.done():
+            self._task = loop.create_task(self._run())
+        return self._queue
+
+    async def start(self) -> None:
+        self._ensure_started()
+
+    async def stop(self) -> None:
+        """Commit everything still queued, then stop the background task"""
+        if self._task is None or self._loop is not asyncio.get_running_loop():
+            return
+        await self.flush()
+        self._task.cancel()
+        try:
+            await self._task
+        except asyncio.CancelledError:
+            pass
+        self._task = None
+
+    def _track(self, conversation_id: Optional[str], delta: int) -> None:
+        if conversation_id is None:
+            return
+        count = self._pending_by_conversation.get(conversation_id, 0) + delta
+        if count > 0:
+            self._pending_by_conversation[conversation_id] = count
+        else:
+            self._pending_by_conversation.pop(conversation_id, None)
+
+    async def enqueue(self, op: WriteOp, conversation_id: Optional[str] = None) -> None:
+        queue = self._ensure_started()
+        self._track(conversation_id, 1)
+        try:
+            await queue.put(_Pending(op, conversation_id))
+        except BaseException:
+            self._track(conversation_id, -1)
+            raise
+
+    def enqueue_nowait(self, op: WriteOp, conversation_id: Optional[str] = None) -> None:
+        """Enqueue without awaiting, for cleanup paths that cannot await (raises asyncio.QueueFull when saturated)"""
+        queue = self._ensure_started()
+        queue.put_nowait(_Pending(op, conversation_id))
+        self._track(conversation_id, 1)
+
+    async def flush(self) -> None:
+        """Wait until every write enqueued before this call has been committed"""
+        queue = self._ensure_started()
+        barrier = asyncio.get_running_loop().create_future()
+        await queue.put(barrier)
+        await barrier
+
+    async def wait_for(self, conversation_id: str) -> None:
+        """Read-your-writes: wait for the conversation's queued writes, if it has any"""
+        if self._pending_by_conversation.get(conversation_id):
+            await self.flush()
+
+    def has_pending(self, conversation_id: str) -> bool:
+        return bool(self._pending_by_conversation.get(conversation_id))
+
+    def stats(self) -> Dict[str, float]:
+        return {
+            "queue_depth": self._queue.qsize() if self._queue is not None else 0,
+            "max_queue_size": self.max_queue_size,
+            "batches": self.batches,
+            "written": self.written,
+            "failed": self.failed,
+            "last_batch_size": self.last_batch_size,
+            "last_batch_ms": round(self.last_batch_ms, 3),
+            "batch_ms_p50": round(_percentile(self._batch_ms, 0.5), 3),
+            "batch_ms_p95": round(_percentile(self._batch_ms, 0.95), 3),
+            "batch_ms_max": round(max(self._batch_ms, default=0.0), 3),
+        }
+
+    async def _run(self) -> None:
+        loop = asyncio.get_running_loop()
+        while True:
+            batch: List[_Pending] = []
+            barriers: List[asyncio.Future] = []
+            item = await self._queue.get()
+            deadline = loop.time() + self.flush_interval
+            while True:
+                if isinstance(item, asyncio.Future):
+                    # A flush barrier closes the batch so its waiter is released right after the commit
+                    barriers.append(item)
+                    break
+                batch.append(item)
+                if len(batch) >= self.max_batch_size:
+                    break
+                try:
+                    item = self._queue.get_nowait()
+                except asyncio.QueueEmpty:
+                    timeout = deadline - loop.time()
+                    if timeout <= 0:
+                        break
+                    try:
+                        item = await asyncio.wait_for(self._queue.get(), timeout)
+                    except asyncio.TimeoutError:
+                        break
+
+            if batch:
+                await self._write(batch)
+            for barrier in barriers:
+                if not barrier.done():
+                    barrier.set_result(None)
+
+    async def _write(self, batch: List[_Pending]) -> None:
+        start = time.perf_counter()
+        try:
+            await self._commit([pending.op for pending in batch])
+            self.written += len(batch)
+        except Exception as exc:
+            # One bad write should not take the rest of the batch down with it
+            print(f"DEBUG: Write-behind batch of {len(batch)} failed ({exc}), retrying individually")
+            for pending in batch:
+                try:
+                    await self._commit([pending.op])
+                    self.written += 1
+                except Exception as single_exc:
+                    self.failed += 1
+                    print(f"DEBUG: Dropping write-behind op {pending.op!r}: {single_exc}")
+        finally:
+            for pending in batch:
+                self._track(pending.conversation_id, -1)
+            self.batches += 1
+            self.last_batch_size = len(batch)
+            self.last_batch_ms = (time.perf_counter() - start) * 1000
+            self._batch_ms.append(self.last_batch_ms)
+            record("db_write_batch_seconds", self.last_batch_ms / 1000, "db_write")
+
+    async def _commit(self, ops: List[WriteOp]) -> None:
+        async with self.session_factory() as session:
+            for op in ops:
+                if isinstance(op, Executable):
+                    await session.execute(op)
+                else:
+                    session.add(op)
+            # Conversation counters and previews commit together with the messages they describe
+            for statement in summary_updates(ops):
+                await session.execute(statement)
+            await session.commit()
+
+
+message_writer = WriteBehindQueue(
+    max_queue_size=settings.WRITE_BEHIND_MAX_QUEUE_SIZE,
+    max_batch_size=settings.WRITE_BEHIND_MAX_BATCH_SIZE,
+    flush_interval=settings.WRITE_BEHIND_FLUSH_INTERVAL_MS / 1000,
+)
+metrics.register_gauge("write_behind_queue_depth", lambda: message_writer.stats()["queue_depth"])
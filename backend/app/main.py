@@ -1,21 +1,36 @@
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
-from fastapi.responses import JSONResponse
+from fastapi.responses import JSONResponse, PlainTextResponse
 import time
 from datetime import datetime
+import asyncio
 from contextlib import asynccontextmanager
 
+from app.api.endpoints.chat import get_chat_service
 from app.api.router import api_router
 from app.config import settings
-from app.database.connection import engine
-from app.database.models import Base
+from app.core.metrics import metrics
+from app.core.timing import ServerTimingMiddleware
+from app.database.schema import sync_database_schema
+from app.database.write_behind import message_writer
+from app.services.llm_governor import LLMSaturatedError
+from app.services.memory import conversation_memory
 
 @asynccontextmanager
 async def lifespan(app: FastAPI):
-    # Create database tables
-    async with engine.begin() as conn:
-        await conn.run_sync(Base.metadata.create_all)
+    # Create database tables and add any new columns to existing ones (unless done at deploy time)
+    if settings.DB_SYNC_SCHEMA_ON_STARTUP:
+        await sync_database_schema()
+    await message_writer.start()
+    # Serve right away; the chat service is built in the background and chat requests wait for it
+    preload = asyncio.create_task(asyncio.to_thread(get_chat_service)) if settings.CHAT_SERVICE_PRELOAD else None
     yield
+    if preload is not None:
+        # A failed preload is retried, and reported, by the next chat request
+        await asyncio.gather(preload, return_exceptions=True)
+    # Commit any queued messages (and summaries still being written) before the worker exits
+    await conversation_memory.wait_for_summaries()
+    await message_writer.stop()
 
 app = FastAPI(
     title=settings.PROJECT_NAME,
@@ -33,6 +48,9 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+# Per-request timings in a Server-Timing header (outermost, so it covers everything below)
+app.add_middleware(ServerTimingMiddleware)
+
 # Include routers
 app.include_router(api_router, prefix="/api")
 
@@ -52,6 +70,23 @@ async def health_check():
         "uptime": time.time()
     }
 
+@app.get("/metrics", include_in_schema=False)
+async def prometheus_metrics():
+    return PlainTextResponse(metrics.render_prometheus(), media_type="text/plain; version=0.0.4")
+
+@app.exception_handler(LLMSaturatedError)
+async def llm_saturated_exception_handler(request, exc):
+    return JSONResponse(
+        status_code=exc.status_code,
+        headers={"Retry-After": str(exc.retry_after)},
+        content={
+            "status": "error",
+            "message": str(exc),
+            "reason": exc.reason,
+            "timestamp": datetime.now().isoformat()
+        }
+    )
+
 @app.exception_handler(Exception)
 async def generic_exception_handler(request, exc):
     return JSONResponse(
@@ -14,8 +14,36 @@ class ConversationResponse(BaseModel):
     id: str
     title: Optional[str]
     created_at: datetime
+    updated_at: Optional[datetime] = None
+    message_count: int = 0
+    last_message_at: Optional[datetime] = None
+    last_message_preview: Optional[str] = None
     
 class MessageResponse(BaseModel):
+    id: int
     role: str
     content: str
+    interrupted: bool = False
     created_at: datetime
+
+class ConversationPage(BaseModel):
+    items: List[ConversationResponse]
+    next_cursor: Optional[str] = None
+
+class MessagePage(BaseModel):
+    items: List[MessageResponse]
+    next_cursor: Optional[str] = None
+
+class SearchResult(BaseModel):
+    message_id: int
+    conversation_id: str
+    conversation_title: Optional[str] = None
+    user_id: Optional[str] = None
+    role: str
+    snippet: str
+    score: float
+    created_at: datetime
+
+class SearchPage(BaseModel):
+    items: List[SearchResult]
+    next_cursor: Optional[str] = None
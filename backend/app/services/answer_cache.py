@@ -0,0 +1,67 @@
+import re
+from typing import Dict, Optional, Tuple
+
+from app.services.session_store import SessionStore
+
+_WORD_PATTERN = re.compile(r"[a-z0-9]+")
+
+# Openers and references that only make sense against earlier turns ("and for techs?", "how often is it changed?")
+_FOLLOW_UP_PATTERN = re.compile(
+    r"^\s*(?:and|also|but|so|then|what about|how about)\b"
+    r"|\b(?:it|its|this|that|these|those|they|them|their|he|she|him|his|her|same|above|earlier|previous|mentioned)\b",
+    re.IGNORECASE,
+)
+
+AnswerKey = Tuple[Optional[str], Optional[str], str, str]
+
+
+def normalize_question(question: str) -> str:
+    """Lowercase and drop punctuation and extra whitespace so trivially different phrasings share a key"""
+    return " ".join(_WORD_PATTERN.findall(question.lower()))
+
+
+def is_follow_up(question: str) -> bool:
+    """Whether a question leans on earlier turns, so its answer needs the conversation's history"""
+    return _FOLLOW_UP_PATTERN.search(question) is not None
+
+
+class AnswerCache:
+    """
+    Bounded TTL/LRU cache of generated answers.
+
+    Keys combine the resolved unit and role, the normalized question and the policy
+    corpus version, so a corpus rebuild naturally invalidates every cached answer. Only
+    answers generated from nothing else may be stored: self-contained questions, whose
+    prompt carries no conversation history (see ``is_follow_up``).
+    """
+
+    def __init__(self, max_size: int = 1000, ttl_seconds: float = 600):
+        self._store = SessionStore(max_size=max_size, ttl_seconds=ttl_seconds)
+        self.hits = 0
+        self.misses = 0
+
+    @staticmethod
+    def key(unit: Optional[str], role: Optional[str], question: str, corpus_version: str) -> AnswerKey:
+        return (unit, role, normalize_question(question), corpus_version)
+
+    def get(self, key: AnswerKey) -> Optional[str]:
+        answer = self._store.get(key)
+        if answer is None:
+            self.misses += 1
+        else:
+            self.hits += 1
+        return answer
+
+    def set(self, key: AnswerKey, answer: str) -> None:
+        if answer:
+            self._store.set(key, answer)
+
+    def stats(self) -> Dict[str, float]:
+        lookups = self.hits + self.misses
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": self.hits / lookups if lookups else 0.0,
+            "size": len(self._store),
+            "evictions": self._store.evictions,
+        }
@@ -1,42 +1,120 @@
 from langgraph.graph import StateGraph, END
 from langchain_openai import ChatOpenAI
+from langchain_core.callbacks.manager import adispatch_custom_event
+from langchain_core.language_models import BaseChatModel
 from langchain_core.messages import HumanMessage, AIMessage
-from typing import TypedDict, List, Dict, Optional
+from typing import Awaitable, Callable, TypedDict, List, Dict, Optional, Tuple
+from sqlalchemy import select, update
 from app.config import settings
+from app.core.metrics import TOKEN_BUCKETS, metrics
+from app.core.timing import bind_timings, current_timings, record, timed
+from app.database.connection import async_session
+from app.database.models import Conversation
+from app.database.write_behind import message_writer
 from app.services.user_info import UserInfo, extract_user_info, HospitalUnits
+from app.services.answer_cache import AnswerCache, is_follow_up
+from app.services.intent_router import IntentRouter
+from app.services.llm_governor import llm_governor
+from app.services.memory import MemoryContext, conversation_memory, estimate_tokens, fit_to_budget
 from app.services.mock_policies import get_mock_policies
+from app.services.policy_corpus import policy_corpus
+from app.services.session_store import create_session_backend
+from app.services.single_flight import SingleFlight
 import json
+import re
+import time
+from contextlib import aclosing
+from dataclasses import asdict
 from datetime import datetime
 
+# Splits a stored answer into word-sized pieces so replays stream like live tokens
+_REPLAY_CHUNK_PATTERN = re.compile(r"\s*\S+|\s+")
+
+# Compare-and-set rounds for a user info update before this turn goes on with its own view
+USER_INFO_SAVE_ATTEMPTS = 3
+
+# Custom graph event carrying one token of a generated answer to the stream
+STREAM_TOKEN_EVENT = "answer_token"
+
+# Fixed replies for turns that only need the user's unit or role
+CLARIFICATION_TEMPLATES = {
+    "unit_and_role": (
+        "Hi! I'd be happy to help you with nursing policies. To provide the most accurate information, "
+        "could you please tell me your role (e.g., Nurse, Tech) and which unit you work in (e.g., ICU, ED)?"
+    ),
+    "unit": "Thanks! Which unit do you work in as a {role} (e.g., ICU, ED, 6 North)? That way I can find the policies that apply to you.",
+    "role": "Thanks! What is your role on {unit} (e.g., Nurse, Tech)? That way I can find the policies that apply to you.",
+}
+
 class GraphState(TypedDict):
+    conversation_id: Optional[str]
     messages: List[Dict[str, str]]  # Conversation history
     current_message: str
     user_info: UserInfo
     context: str
     final_response: str
     route_decision: str
+    # None for follow-up questions, which are answered with the conversation's history and never cached
+    answer_cache_key: Optional[tuple]
+
+def _timed_node(name: str, node: Callable[[GraphState], Awaitable[Dict]]) -> Callable[[GraphState], Awaitable[Dict]]:
+    """Wrap a graph node so its latency lands in the node histogram and the Server-Timing header"""
+    async def run(state: GraphState) -> Dict:
+        with timed("graph_node_duration_seconds", f"node_{name}", node=name):
+            return await node(state)
+    return run
 
 class NursingChatService:
-    def __init__(self):
-        self.llm = ChatOpenAI(
+    # Graph nodes whose LLM output is streamed back to the client; generate_response
+    # forwards its (possibly shared) generation as STREAM_TOKEN_EVENT custom events instead
+    GENERATION_NODES = ("get_clarification",)
+
+    def __init__(self, llm: Optional[BaseChatModel] = None):
+        self.llm = llm or ChatOpenAI(
             api_key=settings.OPENAI_API_KEY,
-            model="gpt-4o-mini",
+            base_url=settings.OPENAI_BASE_URL,
+            model=settings.OPENAI_MODEL,
+            timeout=settings.OPENAI_TIMEOUT_SECONDS,
+            max_retries=settings.OPENAI_MAX_RETRIES,
             streaming=True,
             temperature=0.1
         )
+        # Greeting/question/vague detection, compiled once for every message this worker routes
+        self.router = IntentRouter.from_config(settings.INTENT_CLASSIFIER_PATH)
         self.graph = self._create_graph()
-        # Store user info per conversation
-        self.conversation_user_info = {}
+        # User info per conversation, in memory or shared by all workers (SESSION_BACKEND)
+        self.conversation_user_info = create_session_backend(
+            settings.SESSION_BACKEND,
+            namespace="user_info",
+            encode=lambda user_info: json.dumps(asdict(user_info)),
+            decode=lambda text: UserInfo(**json.loads(text)),
+        )
+        # Answers to policy questions, shared by everyone with the same unit and role
+        self.answer_cache = AnswerCache(
+            max_size=settings.ANSWER_CACHE_MAX_SIZE,
+            ttl_seconds=settings.ANSWER_CACHE_TTL_SECONDS
+        )
+        # Earlier turns of stored conversations, within a token budget
+        self.memory = conversation_memory
+        # Caps concurrent and per-minute LLM usage for everything in this worker
+        self.governor = llm_governor
+        # Identical questions asked at the same time share one generation
+        self.in_flight = SingleFlight()
     
     def _create_graph(self):
         workflow = StateGraph(GraphState)
         
         # Add nodes
-        workflow.add_node("user_info_extraction", self._extract_user_info_node)
-        workflow.add_node("router", self._router_node)
-        workflow.add_node("get_clarification", self._clarification_node)
-        workflow.add_node("context_retrieval", self._context_retrieval_node)
-        workflow.add_node("generate_response", self._final_response_node)
+        nodes = {
+            "user_info_extraction": self._extract_user_info_node,
+            "router": self._router_node,
+            "get_clarification": self._clarification_node,
+            "answer_cache": self._answer_cache_node,
+            "context_retrieval": self._context_retrieval_node,
+            "generate_response": self._final_response_node,
+        }
+        for name, node in nodes.items():
+            workflow.add_node(name, _timed_node(name, node))
         
         # Set entry point
         workflow.set_entry_point("user_info_extraction")
@@ -48,7 +126,15 @@ class NursingChatService:
             self._route_condition,
             {
                 "get_clarification": "get_clarification",
-                "context_retrieval": "context_retrieval"
+                "context_retrieval": "answer_cache"
+            }
+        )
+        workflow.add_conditional_edges(
+            "answer_cache",
+            self._answer_cache_condition,
+            {
+                "hit": END,
+                "miss": "context_retrieval"
             }
         )
         workflow.add_edge("get_clarification", END)
@@ -57,59 +143,115 @@ class NursingChatService:
         
         return workflow.compile()
     
-    def _extract_user_info_node(self, state: GraphState) -> Dict:
+    async def _invoke_llm(self, messages: List[HumanMessage], node: str, on_token: Optional[Callable[[str], None]] = None) -> AIMessage:
+        """Run one LLM call within the governor's concurrency and rate limits (raises LLMSaturatedError)"""
+        estimated_tokens = sum(estimate_tokens(message.content) for message in messages) + settings.LLM_ESTIMATED_COMPLETION_TOKENS
+        async with self.governor.slot(estimated_tokens):
+            metrics.incr("llm_calls", node=node)
+            # Streamed in every case so time to first token can be measured
+            start = time.perf_counter()
+            parts = []
+            async for chunk in self.llm.astream(messages):
+                if chunk.content:
+                    if not parts:
+                        record("llm_time_to_first_token_seconds", time.perf_counter() - start, "llm_ttft", node=node)
+                    if on_token is not None:
+                        on_token(chunk.content)
+                    parts.append(chunk.content)
+            record("llm_duration_seconds", time.perf_counter() - start, "llm", node=node)
+            metrics.observe("llm_output_tokens", len(parts), buckets=TOKEN_BUCKETS, node=node)
+            return AIMessage(content="".join(parts))
+    
+    async def _get_user_info(self, conversation_id: Optional[str]) -> UserInfo:
+        return (await self._load_user_info(conversation_id))[0]
+    
+    async def _load_user_info(self, conversation_id: Optional[str]) -> Tuple[UserInfo, Optional[int]]:
+        """Return the user info for a conversation and its version, rebuilding it from the database when missing"""
+        if conversation_id is None:
+            return UserInfo(), None
+        
+        entry = await self.conversation_user_info.load(conversation_id)
+        if entry is not None:
+            return entry.value, entry.version
+        
+        await message_writer.wait_for(conversation_id)
+        async with async_session() as session:
+            result = await session.execute(
+                select(Conversation.unit, Conversation.role).where(Conversation.id == conversation_id)
+            )
+            row = result.first()
+        
+        user_info = UserInfo(unit=row.unit, role=row.role) if row else UserInfo()
+        if await self.conversation_user_info.compare_and_set(conversation_id, user_info, None):
+            return user_info, 1
+        # Another worker rebuilt or changed it meanwhile; theirs is newer
+        entry = await self.conversation_user_info.load(conversation_id)
+        return (entry.value, entry.version) if entry is not None else (user_info, None)
+    
+    async def _save_user_info(self, conversation_id: Optional[str], user_info: UserInfo, expected_version: Optional[int]) -> bool:
+        """Store user info if nobody changed it since it was read, then queue it for the conversation row"""
+        if conversation_id is None:
+            return True
+        
+        if not await self.conversation_user_info.compare_and_set(conversation_id, user_info, expected_version):
+            return False
+        # Queued behind the conversation's own insert, so the row exists when this runs
+        await message_writer.enqueue(
+            update(Conversation)
+            .where(Conversation.id == conversation_id)
+            .values(unit=user_info.unit, role=user_info.role),
+            conversation_id
+        )
+        return True
+    
+    async def _extract_user_info_node(self, state: GraphState) -> Dict:
         """Extract and update user information from current message"""
-        # Get existing user info from conversation history
-        messages = state.get("messages", [])
-        conversation_key = "default"  # In production, use actual conversation_id
-        
-        # Get or create user info for this conversation
-        if conversation_key not in self.conversation_user_info:
-            self.conversation_user_info[conversation_key] = UserInfo()
-        
-        current_info = self.conversation_user_info[conversation_key]
-        
-        # Extract info from ALL previous messages, not just current
-        combined_text = " ".join([msg["content"] for msg in messages if msg["role"] == "user"])
-        updated_info = extract_user_info(combined_text, current_info)
+        conversation_id = state.get("conversation_id")
         
-        # Store updated info
-        self.conversation_user_info[conversation_key] = updated_info
+        for _ in range(USER_INFO_SAVE_ATTEMPTS):
+            # Earlier turns are already folded into the stored info, so only the new message is scanned
+            current_info, version = await self._load_user_info(conversation_id)
+            updated_info = extract_user_info(state["current_message"], current_info)
+            
+            # Only write back when something changed; a lost race means re-reading what the other writer stored
+            if updated_info == current_info or await self._save_user_info(conversation_id, updated_info, version):
+                break
+            metrics.incr("session_write_conflicts")
         
         return {"user_info": updated_info}
     
-    def _router_node(self, state: GraphState) -> Dict:
+    async def _router_node(self, state: GraphState) -> Dict:
         """Decide where to route the conversation"""
-        user_info = state["user_info"]
-        message = state["current_message"].lower()
-        
-        # Check if greeting or intro
-        greetings = ["hi", "hello", "hey", "help", "how does this work"]
-        if any(greeting in message for greeting in greetings) and len(message) < 50:
-            return {"route_decision": "get_clarification"}
-        
-        # Check if user info is incomplete
-        if not user_info.is_complete():
-            return {"route_decision": "get_clarification"}
-        
-        # Check if question is too vague
-        question_words = ["what", "how", "when", "where", "why", "can", "should"]
-        if not any(word in message for word in question_words) or len(message) < 10:
-            return {"route_decision": "get_clarification"}
-        
-        return {"route_decision": "context_retrieval"}
+        return {"route_decision": self.router.route(state["current_message"], state["user_info"])}
     
     def _route_condition(self, state: GraphState) -> str:
         return state["route_decision"]
     
-    def _clarification_node(self, state: GraphState) -> Dict:
-        """Help user clarify their request"""
-        user_info = state["user_info"]
-        message = state["current_message"]
-        
-        # Create clarification prompt
+    async def _load_memory(self, state: GraphState) -> MemoryContext:
+        """Earlier turns for the prompt: the history passed in, or the stored conversation's memory"""
+        history = state["messages"][:-1]
+        conversation_id = state.get("conversation_id")
+        if history or conversation_id is None:
+            return MemoryContext(turns=fit_to_budget(history, self.memory.history_token_budget))
+        
+        memory = await self.memory.load(conversation_id, state["current_message"])
+        # Older turns that fell out of the window are summarized off the request path
+        self.memory.schedule_summary(conversation_id, memory, self.llm)
+        return memory
+    
+    def _format_memory(self, memory: MemoryContext) -> str:
+        sections = []
+        if memory.summary:
+            sections.append(f"### CONVERSATION SO FAR (SUMMARY) ###\n{memory.summary}\n")
+        if memory.turns:
+            transcript = "\n".join(f"{turn['role'].upper()}: {turn['content']}" for turn in memory.turns)
+            sections.append(f"### RECENT CONVERSATION ###\n{transcript}\n")
+        return "\n".join(sections)
+    
+    def _build_clarification_prompt(self, user_info: UserInfo, message: str, history: str = "") -> str:
+        """Build the prompt used to ask the user for missing details"""
         if not user_info.unit and not user_info.role:
-            clarification_prompt = f"""
+            return f"""
 User message: "{message}"
 
 You are helping a nurse clarify their request. They haven't provided their unit or role yet.
@@ -122,33 +264,69 @@ Respond with:
 Example: "Hi! I'd be happy to help you with nursing policies. To provide the most accurate information, could you please tell me your role (e.g., Nurse, Tech) and which unit you work in (e.g., ICU, ED)?"
 """
         elif not user_info.unit:
-            clarification_prompt = f"""
+            return f"""
 User message: "{message}"
 User role: {user_info.role}
 
 The user has provided their role but not their unit. Ask them for their specific unit.
 """
         elif not user_info.role:
-            clarification_prompt = f"""
+            return f"""
 User message: "{message}"
 User unit: {user_info.unit}
 
 The user has provided their unit but not their role. Ask them for their specific role.
 """
-        else:
-            clarification_prompt = f"""
+        return f"""
+{history}
 User message: "{message}"
 User info: {user_info.role} in {user_info.unit}
 
 The user's question is unclear or too vague. Help them clarify what specific policy or procedure they're asking about. Be helpful and guide them to ask a more specific question.
 """
+
+    def _clarification_template(self, user_info: UserInfo) -> Optional[str]:
+        """Return the fixed reply for a missing unit or role, or None when the question itself needs clarifying"""
+        if not user_info.unit and not user_info.role:
+            return CLARIFICATION_TEMPLATES["unit_and_role"]
+        elif not user_info.unit:
+            return CLARIFICATION_TEMPLATES["unit"].format(role=user_info.role.title())
+        elif not user_info.role:
+            return CLARIFICATION_TEMPLATES["role"].format(unit=user_info.unit)
+        return None
+
+    async def _clarification_node(self, state: GraphState) -> Dict:
+        """Help user clarify their request"""
+        # Asking for a missing unit or role needs no LLM; only vague questions do
+        template_response = self._clarification_template(state["user_info"])
+        if template_response is not None:
+            metrics.incr("llm_calls_saved", reason="clarification_template")
+            return {"final_response": template_response}
+        
+        memory = await self._load_memory(state)
+        clarification_prompt = self._build_clarification_prompt(state["user_info"], state["current_message"], self._format_memory(memory))
         
         messages = [HumanMessage(content=clarification_prompt)]
-        response = self.llm.invoke(messages)
+        response = await self._invoke_llm(messages, node="get_clarification")
         
         return {"final_response": response.content}
     
-    def _context_retrieval_node(self, state: GraphState) -> Dict:
+    async def _answer_cache_node(self, state: GraphState) -> Dict:
+        """Look up a previously generated answer for the same unit, role and self-contained question"""
+        if is_follow_up(state["current_message"]):
+            return {"answer_cache_key": None}
+        user_info = state["user_info"]
+        key = AnswerCache.key(user_info.unit, user_info.role, state["current_message"], policy_corpus.current().version)
+        cached_response = self.answer_cache.get(key)
+        if cached_response is not None:
+            metrics.incr("llm_calls_saved", reason="answer_cache")
+            return {"answer_cache_key": key, "final_response": cached_response}
+        return {"answer_cache_key": key}
+    
+    def _answer_cache_condition(self, state: GraphState) -> str:
+        return "hit" if state["final_response"] else "miss"
+    
+    async def _context_retrieval_node(self, state: GraphState) -> Dict:
         """Retrieve relevant policies for the user's question"""
         user_info = state["user_info"]
         question = state["current_message"]
@@ -164,17 +342,14 @@ The user's question is unclear or too vague. Help them clarify what specific pol
         
         return {"context": context}
     
-    def _final_response_node(self, state: GraphState) -> Dict:
-        """Generate final response with context"""
-        user_info = state["user_info"]
-        question = state["current_message"]
-        context = state["context"]
-        
-        response_prompt = f"""
+    def _build_response_prompt(self, user_info: UserInfo, question: str, context: str, history: str = "") -> str:
+        """Build the prompt used to answer the user's question from retrieved policies"""
+        return f"""
 ### USER'S CURRENT INFO ###
 UNIT: {user_info.unit}
 ROLE: {user_info.role}
 
+{history}
 ### USER'S QUESTION ###
 {question}
 
@@ -187,13 +362,49 @@ You are a helpful nursing assistant. Answer the user's question based on the pro
 - If the context doesn't fully answer their question, say so
 - Keep responses professional but friendly
 """
-        
-        messages = [HumanMessage(content=response_prompt)]
-        response = self.llm.invoke(messages)
-        
-        return {"final_response": response.content}
+
+    async def _final_response_node(self, state: GraphState) -> Dict:
+        """Generate final response with context, sharing one generation between identical concurrent questions"""
+        request_timings = current_timings()
+        cache_key = state["answer_cache_key"]
+        # Self-contained questions are answered from the policies alone, so the answer can be shared
+        memory = self._format_memory(await self._load_memory(state)) if cache_key is None else ""
+        response_prompt = self._build_response_prompt(state["user_info"], state["current_message"], state["context"], memory)
+        # Followers get the leader's answer, so flights are shared on the answer cache key: same unit, role,
+        # normalized question and corpus, and no history. Follow-ups carry their own, so each gets its own flight
+        flight_key = cache_key if cache_key is not None else object()
+        
+        async def generate(publish: Callable[[str], None]) -> str:
+            # Runs once per flight, with the Server-Timing of the request that started it
+            bind_timings(request_timings)
+            messages = [HumanMessage(content=response_prompt)]
+            response = await self._invoke_llm(messages, node="generate_response", on_token=publish)
+            return response.content
+        
+        parts = []
+        async for token in self.in_flight.follow(flight_key, generate):
+            parts.append(token)
+            await adispatch_custom_event(STREAM_TOKEN_EVENT, {"content": token})
+        response = "".join(parts)
+        
+        if cache_key is not None:
+            self.answer_cache.set(cache_key, response)
+        
+        return {"final_response": response}
+    
+    def _initial_state(self, message: str, conversation_history: List[Dict[str, str]], conversation_id: Optional[str]) -> GraphState:
+        return {
+            "conversation_id": conversation_id,
+            "messages": conversation_history,
+            "current_message": message,
+            "user_info": UserInfo(),
+            "context": "",
+            "final_response": "",
+            "route_decision": "",
+            "answer_cache_key": None
+        }
     
-    async def chat(self, message: str, conversation_history: List[Dict[str, str]] = None) -> str:
+    async def chat(self, message: str, conversation_history: List[Dict[str, str]] = None, conversation_id: Optional[str] = None) -> str:
         """Process a chat message through the graph"""
         if conversation_history is None:
             conversation_history = []
@@ -202,14 +413,7 @@ You are a helpful nursing assistant. Answer the user's question based on the pro
         conversation_history.append({"role": "user", "content": message})
         
         # Create initial state
-        initial_state = {
-            "messages": conversation_history,
-            "current_message": message,
-            "user_info": UserInfo(),
-            "context": "",
-            "final_response": "",
-            "route_decision": ""
-        }
+        initial_state = self._initial_state(message, conversation_history, conversation_id)
         
         # Run graph
         result = await self.graph.ainvoke(initial_state)
@@ -220,8 +424,8 @@ You are a helpful nursing assistant. Answer the user's question based on the pro
         
         return response
     
-    async def chat_stream(self, message: str, conversation_history: List[Dict[str, str]] = None):
-        """Stream the final response after graph processing"""
+    async def chat_stream(self, message: str, conversation_history: List[Dict[str, str]] = None, conversation_id: Optional[str] = None):
+        """Stream the response tokens produced by the graph's generation node"""
         if conversation_history is None:
             conversation_history = []
         
@@ -229,89 +433,32 @@ You are a helpful nursing assistant. Answer the user's question based on the pro
         conversation_history.append({"role": "user", "content": message})
         
         # Create initial state
-        initial_state = {
-            "messages": conversation_history,
-            "current_message": message,
-            "user_info": UserInfo(),
-            "context": "",
-            "final_response": "",
-            "route_decision": ""
-        }
-        
-        # Run graph up to final response
-        result = await self.graph.ainvoke(initial_state)
-        
-        # Check which path the graph took
-        if result["route_decision"] == "get_clarification":
-            # For clarification responses, stream from OpenAI directly
-            user_info = result["user_info"]
-            message_text = message
-            
-            # Create clarification prompt
-            if not user_info.unit and not user_info.role:
-                clarification_prompt = f"""
-User message: "{message_text}"
-
-You are helping a nurse clarify their request. They haven't provided their unit or role yet.
-
-Respond with:
-1. Brief acknowledgment of their message
-2. Ask them to provide their unit and role
-3. Be friendly and helpful
-
-Example: "Hi! I'd be happy to help you with nursing policies. To provide the most accurate information, could you please tell me your role (e.g., Nurse, Tech) and which unit you work in (e.g., ICU, ED)?"
-"""
-            elif not user_info.unit:
-                clarification_prompt = f"""
-User message: "{message_text}"
-User role: {user_info.role}
-
-The user has provided their role but not their unit. Ask them for their specific unit.
-"""
-            elif not user_info.role:
-                clarification_prompt = f"""
-User message: "{message_text}"
-User unit: {user_info.unit}
-
-The user has provided their unit but not their role. Ask them for their specific role.
-"""
-            else:
-                clarification_prompt = f"""
-User message: "{message_text}"
-User info: {user_info.role} in {user_info.unit}
-
-The user's question is unclear or too vague. Help them clarify what specific policy or procedure they're asking about. Be helpful and guide them to ask a more specific question.
-"""
-            
-            messages = [HumanMessage(content=clarification_prompt)]
-            async for chunk in self.llm.astream(messages):
-                if hasattr(chunk, 'content') and chunk.content:
+        initial_state = self._initial_state(message, conversation_history, conversation_id)
+        
+        # Run the graph once and forward the tokens of its single LLM call as they arrive
+        streamed = False
+        final_response = ""
+        # aclosing() ends the graph run, and with it the upstream LLM request, as soon as
+        # the caller stops consuming this stream (e.g. the client disconnected)
+        async with aclosing(self.graph.astream_events(initial_state, version="v2")) as events:
+            async for event in events:
+                if event["event"] == "on_chain_end" and not event.get("parent_ids"):
+                    final_response = event["data"]["output"].get("final_response", "")
+                    continue
+                if event["event"] == "on_custom_event" and event["name"] == STREAM_TOKEN_EVENT:
+                    streamed = True
+                    yield event["data"]["content"]
+                    continue
+                if event["event"] != "on_chat_model_stream":
+                    continue
+                if event.get("metadata", {}).get("langgraph_node") not in self.GENERATION_NODES:
+                    continue
+                chunk = event["data"]["chunk"]
+                if chunk.content:
+                    streamed = True
                     yield chunk.content
-            return
-        
-        # Otherwise stream the final response from OpenAI
-        user_info = result["user_info"]
-        context = result.get("context", "")
-        
-        response_prompt = f"""
-### USER'S CURRENT INFO ###
-UNIT: {user_info.unit}
-ROLE: {user_info.role}
-
-### USER'S QUESTION ###
-{message}
-
-### CONTEXT ###
-{context}
-
-You are a helpful nursing assistant. Answer the user's question based on the provided context. 
-- Be specific and practical
-- Reference the unit-specific information when relevant
-- If the context doesn't fully answer their question, say so
-- Keep responses professional but friendly
-"""
         
-        messages = [HumanMessage(content=response_prompt)]
-        async for chunk in self.llm.astream(messages):
-            if hasattr(chunk, 'content') and chunk.content:
-                yield chunk.content
+        # Answers served without an LLM call (e.g. from the cache) are replayed in token-sized pieces
+        if not streamed:
+            for piece in _REPLAY_CHUNK_PATTERN.findall(final_response):
+                yield piece
@@ -0,0 +1,118 @@
+import json
+import re
+from typing import Dict, Iterable, List, Optional, Tuple
+
+import numpy as np
+
+from app.services.user_info import UserInfo
+
+# Routes the chat graph can take after the router node
+CLARIFICATION_ROUTE = "get_clarification"
+RETRIEVAL_ROUTE = "context_retrieval"
+
+# Intents a message can have; only a question from a user with a known unit and role is answered
+GREETING = "greeting"
+QUESTION = "question"
+VAGUE = "vague"
+
+# Words, plus "?" as a token of its own so the classifier can weigh it
+TOKEN_PATTERN = re.compile(r"[a-z0-9]+|\?")
+
+DEFAULT_PHRASES = {
+    GREETING: ["hi", "hello", "hey", "help", "how does this work", "good morning", "good afternoon", "thanks", "thank you"],
+    QUESTION: ["what", "how", "when", "where", "why", "can", "should"],
+}
+
+# Short messages are read as greetings only below this length, and as questions only from it
+GREETING_MAX_LENGTH = 50
+QUESTION_MIN_LENGTH = 10
+
+
+def tokenize(text: str) -> List[str]:
+    return TOKEN_PATTERN.findall(text.lower())
+
+
+def compile_phrases(phrases: Iterable[str]) -> re.Pattern:
+    """One alternation that matches any of the phrases as whole words in tokenized text"""
+    alternatives = sorted({" ".join(tokenize(phrase)) for phrase in phrases} - {""}, key=len, reverse=True)
+    return re.compile(r"\b(?:" + "|".join(re.escape(alternative) for alternative in alternatives) + r")\b")
+
+
+class IntentClassifier:
+    """
+    Bag-of-words linear classifier over a small, hand-editable vocabulary.
+
+    Weights come from a JSON file (``{"min_confidence": 0.6, "intents": {"greeting":
+    {"bias": 0.0, "weights": {"hi": 3.0, ...}}, ...}}``) and are packed into one
+    matrix at load, so scoring a message is a single row gather and sum.
+    """
+
+    def __init__(self, intents: Dict[str, Dict], min_confidence: float = 0.5):
+        self.labels = list(intents)
+        vocabulary = sorted({word for intent in intents.values() for word in intent.get("weights", {})})
+        self.vocabulary = {word: index for index, word in enumerate(vocabulary)}
+        self.weights = np.zeros((len(vocabulary), len(self.labels)), dtype=np.float32)
+        self.bias = np.array([intents[label].get("bias", 0.0) for label in self.labels], dtype=np.float32)
+        for column, label in enumerate(self.labels):
+            for word, weight in intents[label].get("weights", {}).items():
+                self.weights[self.vocabulary[word], column] = weight
+        self.min_confidence = min_confidence
+
+    @classmethod
+    def load(cls, path: str) -> "IntentClassifier":
+        with open(path) as f:
+            config = json.load(f)
+        return cls(config["intents"], config.get("min_confidence", 0.5))
+
+    def predict(self, tokens: List[str]) -> Tuple[Optional[str], float]:
+        """Return the most likely intent and its probability, or None when below the confidence floor"""
+        rows = [self.vocabulary[token] for token in tokens if token in self.vocabulary]
+        scores = self.bias + self.weights[rows].sum(axis=0) if rows else self.bias
+        probabilities = np.exp(scores - scores.max())
+        probabilities /= probabilities.sum()
+        best = int(probabilities.argmax())
+        confidence = float(probabilities[best])
+        if confidence < self.min_confidence:
+            return None, confidence
+        return self.labels[best], confidence
+
+
+class IntentRouter:
+    """
+    Decides whether a message can go to retrieval or needs a clarifying reply first.
+
+    Patterns are compiled once, and each message is tokenized once; phrases then
+    match whole words only, so "this" is not a greeting and "scan" is not a
+    question. When a classifier is configured, its confident predictions take
+    precedence over the phrase rules.
+    """
+
+    def __init__(self, phrases: Optional[Dict[str, List[str]]] = None, classifier: Optional[IntentClassifier] = None):
+        phrases = {**DEFAULT_PHRASES, **(phrases or {})}
+        self.greeting_pattern = compile_phrases(phrases[GREETING])
+        self.question_pattern = compile_phrases(phrases[QUESTION])
+        self.classifier = classifier
+
+    @classmethod
+    def from_config(cls, classifier_path: Optional[str] = None) -> "IntentRouter":
+        return cls(classifier=IntentClassifier.load(classifier_path) if classifier_path else None)
+
+    def intent(self, message: str) -> str:
+        tokens = tokenize(message)
+        length = len(message.strip())
+        if self.classifier is not None:
+            intent, _ = self.classifier.predict(tokens)
+            if intent is not None:
+                return VAGUE if intent == QUESTION and length < QUESTION_MIN_LENGTH else intent
+
+        text = " ".join(tokens)
+        if length < GREETING_MAX_LENGTH and self.greeting_pattern.search(text):
+            return GREETING
+        if length >= QUESTION_MIN_LENGTH and ("?" in tokens or self.question_pattern.search(text)):
+            return QUESTION
+        return VAGUE
+
+    def route(self, message: str, user_info: UserInfo) -> str:
+        if user_info.is_complete() and self.intent(message) == QUESTION:
+            return RETRIEVAL_ROUTE
+        return CLARIFICATION_ROUTE
@@ -0,0 +1,185 @@
+import asyncio
+import math
+import time
+from collections import deque
+from contextlib import asynccontextmanager
+from typing import AsyncIterator, Callable, Deque, Dict
+
+from app.config import settings
+from app.core.metrics import metrics
+from app.core.timing import record
+
+
+class LLMSaturatedError(Exception):
+    """Raised instead of queueing an LLM call that could not start before its deadline"""
+
+    def __init__(self, reason: str, retry_after: float, status_code: int):
+        super().__init__(f"LLM capacity exhausted ({reason}), retry after {retry_after:.0f}s")
+        self.reason = reason
+        self.retry_after = max(1, math.ceil(retry_after))
+        # 429 when our own rate limits are exhausted, 503 when too many calls are already waiting or running
+        self.status_code = status_code
+
+
+class TokenBucket:
+    """Token bucket refilled continuously at ``per_minute`` per minute, holding at most one minute's worth"""
+
+    def __init__(self, per_minute: float, clock: Callable[[], float] = time.monotonic):
+        self.capacity = per_minute
+        self.rate = per_minute / 60
+        self._clock = clock
+        self._tokens = per_minute
+        self._updated = clock()
+
+    def _refill(self) -> None:
+        now = self._clock()
+        self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.rate)
+        self._updated = now
+
+    def wait_time(self, amount: float) -> float:
+        """Seconds until ``amount`` can be taken (0 when it can be taken now)"""
+        self._refill()
+        amount = min(amount, self.capacity)
+        return 0.0 if self._tokens >= amount else (amount - self._tokens) / self.rate
+
+    def take(self, amount: float) -> None:
+        self._tokens -= min(amount, self.capacity)
+
+
+class LLMGovernor:
+    """
+    Admission control for LLM calls.
+
+    At most ``max_in_flight`` calls run at once; callers beyond that wait in a FIFO
+    queue of at most ``max_queue`` entries for up to ``queue_timeout`` seconds.
+    Requests-per-minute and tokens-per-minute token buckets (0 disables either)
+    keep us under the provider's limits. A call that cannot start before its
+    deadline fails fast with ``LLMSaturatedError`` instead of piling up.
+    """
+
+    def __init__(
+        self,
+        max_in_flight: int = 32,
+        max_queue: int = 256,
+        queue_timeout: float = 10.0,
+        requests_per_minute: float = 0,
+        tokens_per_minute: float = 0,
+        clock: Callable[[], float] = time.monotonic,
+    ):
+        self.max_in_flight = max_in_flight
+        self.max_queue = max_queue
+        self.queue_timeout = queue_timeout
+        self.request_bucket = TokenBucket(requests_per_minute, clock) if requests_per_minute > 0 else None
+        self.token_bucket = TokenBucket(tokens_per_minute, clock) if tokens_per_minute > 0 else None
+        self._clock = clock
+        self._in_flight = 0
+        self._queued = 0
+        self._waiters: Deque[asyncio.Future] = deque()
+
+        self.admitted = 0
+        self.rejected = 0
+        self.total_wait_ms = 0.0
+        self.max_wait_ms = 0.0
+
+    def _reject(self, reason: str, retry_after: float, status_code: int) -> LLMSaturatedError:
+        self.rejected += 1
+        metrics.incr("llm_governor_rejections", reason=reason)
+        return LLMSaturatedError(reason, retry_after, status_code)
+
+    async def _acquire_slot(self, timeout: float) -> None:
+        if self._in_flight < self.max_in_flight and not self._waiters:
+            self._in_flight += 1
+            return
+        waiter = asyncio.get_running_loop().create_future()
+        self._waiters.append(waiter)
+        try:
+            await asyncio.wait_for(waiter, timeout)
+        except BaseException:
+            if waiter.done() and not waiter.cancelled():
+                # The slot was handed over just as we gave up; pass it on
+                self._release_slot()
+            raise
+        finally:
+            if waiter in self._waiters:
+                self._waiters.remove(waiter)
+
+    def _release_slot(self) -> None:
+        while self._waiters:
+            waiter = self._waiters.popleft()
+            if not waiter.done():
+                # Hand the slot straight to the next caller, so in_flight stays the same
+                waiter.set_result(None)
+                return
+        self._in_flight -= 1
+
+    def _rate_wait(self, tokens: int) -> float:
+        buckets = [(bucket, amount) for bucket, amount in ((self.request_bucket, 1), (self.token_bucket, tokens)) if bucket is not None]
+        wait = max((bucket.wait_time(amount) for bucket, amount in buckets), default=0.0)
+        if wait == 0:
+            for bucket, amount in buckets:
+                bucket.take(amount)
+        return wait
+
+    @asynccontextmanager
+    async def slot(self, estimated_tokens: int = 0) -> AsyncIterator[None]:
+        """Hold one LLM call slot for the duration of the block"""
+        if self._queued >= self.max_queue:
+            raise self._reject("queue_full", self.queue_timeout, 503)
+
+        start = self._clock()
+        deadline = start + self.queue_timeout
+        self._queued += 1
+        try:
+            try:
+                await self._acquire_slot(max(deadline - self._clock(), 0))
+            except asyncio.TimeoutError:
+                raise self._reject("queue_timeout", self.queue_timeout, 503) from None
+
+            try:
+                while True:
+                    wait = self._rate_wait(estimated_tokens)
+                    if wait == 0:
+                        break
+                    if self._clock() + wait > deadline:
+                        raise self._reject("rate_limited", wait, 429)
+                    await asyncio.sleep(wait)
+            except BaseException:
+                self._release_slot()
+                raise
+        finally:
+            self._queued -= 1
+
+        wait_ms = (self._clock() - start) * 1000
+        self.admitted += 1
+        self.total_wait_ms += wait_ms
+        self.max_wait_ms = max(self.max_wait_ms, wait_ms)
+        metrics.incr("llm_governor_wait_ms", wait_ms)
+        record("llm_governor_wait_seconds", wait_ms / 1000, "llm_queue")
+        metrics.incr("llm_governor_admitted")
+        try:
+            yield
+        finally:
+            self._release_slot()
+
+    def stats(self) -> Dict[str, float]:
+        return {
+            "in_flight": self._in_flight,
+            "queued": self._queued,
+            "max_in_flight": self.max_in_flight,
+            "max_queue": self.max_queue,
+            "admitted": self.admitted,
+            "rejected": self.rejected,
+            "avg_wait_ms": round(self.total_wait_ms / self.admitted, 3) if self.admitted else 0.0,
+            "max_wait_ms": round(self.max_wait_ms, 3),
+        }
+
+
+llm_governor = LLMGovernor(
+    max_in_flight=settings.LLM_MAX_IN_FLIGHT,
+    max_queue=settings.LLM_MAX_QUEUE,
+    queue_timeout=settings.LLM_QUEUE_TIMEOUT_SECONDS,
+    requests_per_minute=settings.LLM_REQUESTS_PER_MINUTE,
+    tokens_per_minute=settings.LLM_TOKENS_PER_MINUTE,
+)
+metrics.register_gauge("llm_in_flight", lambda: llm_governor.stats()["in_flight"])
+metrics.register_gauge("llm_queued", lambda: llm_governor.stats()["queued"])
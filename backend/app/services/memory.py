@@ -0,0 +1,215 @@
+import asyncio
+from dataclasses import dataclass, field
+from typing import TYPE_CHECKING, Dict, List, Optional, Set
+
+from sqlalchemy import func, select, update
+
+from app.config import settings
+from app.core.metrics import metrics
+from app.database.connection import async_session
+from app.database.models import Conversation, Message
+from app.database.write_behind import message_writer
+from app.services.llm_governor import llm_governor
+
+if TYPE_CHECKING:
+    # langchain is imported with the chat service, not when the app boots
+    from langchain_core.language_models import BaseChatModel
+
+Turn = Dict[str, str]
+
+# Per-message overhead of the chat format (role, separators)
+_MESSAGE_OVERHEAD_TOKENS = 4
+
+
+def estimate_tokens(text: str) -> int:
+    """Cheap token estimate (about four characters per token for English text)"""
+    return (len(text) + 3) // 4
+
+
+def turn_tokens(turn: Turn) -> int:
+    return estimate_tokens(turn["content"]) + _MESSAGE_OVERHEAD_TOKENS
+
+
+def truncate_to_tokens(text: str, max_tokens: int) -> str:
+    if estimate_tokens(text) <= max_tokens:
+        return text
+    return text[: max_tokens * 4].rsplit(" ", 1)[0]
+
+
+def oldest_within_budget(turns: List[Turn], budget: int) -> List[Turn]:
+    """The longest run of turns from the start whose combined size fits the token budget (at least one turn)"""
+    kept: List[Turn] = []
+    used = 0
+    for turn in turns:
+        cost = turn_tokens(turn)
+        if kept and used + cost > budget:
+            break
+        kept.append(turn)
+        used += cost
+    return kept
+
+
+def fit_to_budget(turns: List[Turn], budget: int) -> List[Turn]:
+    """Keep the most recent turns whose combined size fits the token budget, in chronological order"""
+    kept: List[Turn] = []
+    used = 0
+    for turn in reversed(turns):
+        cost = turn_tokens(turn)
+        if used + cost > budget:
+            break
+        kept.append(turn)
+        used += cost
+    kept.reverse()
+    return kept
+
+
+@dataclass
+class MemoryContext:
+    """What the prompt gets to see of earlier turns"""
+
+    summary: str = ""
+    turns: List[Turn] = field(default_factory=list)
+    # Set when older messages fell out of the window but are not in the summary yet
+    summarized_through_id: int = 0
+    summarize_upto_id: Optional[int] = None
+
+    @property
+    def tokens(self) -> int:
+        return estimate_tokens(self.summary) + sum(turn_tokens(turn) for turn in self.turns)
+
+
+class ConversationMemory:
+    """
+    Token-budgeted conversation memory backed by the messages table.
+
+    ``load`` returns the most recent turns that fit in ``history_token_budget``
+    plus the conversation's rolling summary, so prompt size stays bounded however
+    long a conversation gets. When turns fall out of the window, the oldest ones
+    are folded into the summary by a background LLM call and stored on the
+    conversation row; the summary itself is capped at ``summary_token_budget``.
+    """
+
+    def __init__(self, history_token_budget: int = 1500, summary_token_budget: int = 300, max_messages: int = 40, session_factory=async_session):
+        self.history_token_budget = history_token_budget
+        self.summary_token_budget = summary_token_budget
+        self.max_messages = max_messages
+        self.session_factory = session_factory
+        self._summarizing: Set[str] = set()
+        self._tasks: Set[asyncio.Task] = set()
+
+    async def load(self, conversation_id: str, current_message: Optional[str] = None) -> MemoryContext:
+        """Load the summary and recent turns, leaving out the message being answered"""
+        await message_writer.wait_for(conversation_id)
+        async with self.session_factory() as session:
+            conversation = (
+                await session.execute(
+                    select(Conversation.summary, Conversation.summarized_through_id).where(Conversation.id == conversation_id)
+                )
+            ).first()
+            summarized_through_id = (conversation.summarized_through_id if conversation else None) or 0
+            rows = (
+                await session.execute(
+                    select(Message.id, Message.role, Message.content)
+                    .where(Message.conversation_id == conversation_id, Message.id > summarized_through_id)
+                    .order_by(Message.created_at.desc(), Message.id.desc())
+                    .limit(self.max_messages + 1)
+                )
+            ).all()
+
+        rows.reverse()
+        # The request's own message is already queued and committed by now; it is the question, not history
+        if rows and current_message is not None and rows[-1].role == "user" and rows[-1].content == current_message:
+            rows.pop()
+
+        turns = [{"role": row.role, "content": row.content} for row in rows]
+        kept = fit_to_budget(turns[-self.max_messages:], self.history_token_budget)
+        context = MemoryContext(
+            summary=(conversation.summary if conversation else None) or "",
+            turns=kept,
+            summarized_through_id=summarized_through_id,
+        )
+        if len(kept) < len(rows):
+            # Fold down to half the budget so the next summary is only needed after that much new conversation
+            keep_after_summary = fit_to_budget(kept, self.history_token_budget // 2)
+            context.summarize_upto_id = rows[len(rows) - len(keep_after_summary) - 1].id
+        return context
+
+    def schedule_summary(self, conversation_id: str, context: MemoryContext, llm: "BaseChatModel") -> None:
+        """Fold older turns into the rolling summary in the background (at most one run per conversation)"""
+        if context.summarize_upto_id is None or conversation_id in self._summarizing:
+            return
+        self._summarizing.add(conversation_id)
+        task = asyncio.get_running_loop().create_task(self._update_summary(conversation_id, context, llm))
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+
+    async def wait_for_summaries(self) -> None:
+        """Wait for in-flight summary updates (used at shutdown and in tests)"""
+        if self._tasks:
+            await asyncio.gather(*self._tasks, return_exceptions=True)
+
+    def _build_summary_prompt(self, summary: str, turns: List[Turn]) -> str:
+        transcript = "\n".join(f"{turn['role'].upper()}: {turn['content']}" for turn in turns)
+        return f"""
+### CURRENT SUMMARY ###
+{summary or "(none)"}
+
+### NEW CONVERSATION TURNS ###
+{transcript}
+
+Update the summary of this conversation between a nurse and a nursing policy assistant so it also covers the new turns.
+- Keep the nurse's unit, role and the policies and procedures they asked about
+- Keep any answers or facts they are likely to refer back to
+- Use at most {self.summary_token_budget * 3 // 4} words
+"""
+
+    async def _update_summary(self, conversation_id: str, context: MemoryContext, llm: "BaseChatModel") -> None:
+        from langchain_core.messages import HumanMessage
+
+        try:
+            async with self.session_factory() as session:
+                rows = (
+                    await session.execute(
+                        select(Message.id, Message.role, Message.content)
+                        .where(
+                            Message.conversation_id == conversation_id,
+                            Message.id > context.summarized_through_id,
+                            Message.id <= context.summarize_upto_id,
+                        )
+                        .order_by(Message.created_at, Message.id)
+                    )
+                ).all()
+            # Each run folds in a bounded slice, oldest first, so the summary prompt stays bounded too;
+            # turns past the slice stay unsummarized and are picked up by the next run
+            turns = oldest_within_budget([{"role": row.role, "content": row.content} for row in rows], self.history_token_budget * 2)
+            if not turns:
+                return
+            summarized_through_id = rows[len(turns) - 1].id
+            turns[0]["content"] = truncate_to_tokens(turns[0]["content"], self.history_token_budget * 2)
+
+            prompt = self._build_summary_prompt(context.summary, turns)
+            # Summaries share the worker's LLM budget; when saturated this run is skipped and retried next turn
+            async with llm_governor.slot(estimate_tokens(prompt) + self.summary_token_budget):
+                metrics.incr("llm_calls", node="summarize_memory")
+                response = await llm.ainvoke([HumanMessage(content=prompt)])
+            summary = truncate_to_tokens(response.content.strip(), self.summary_token_budget)
+
+            # Only advance from the position this summary was built on, in case another worker got there first
+            await message_writer.enqueue(
+                update(Conversation)
+                .where(Conversation.id == conversation_id, func.coalesce(Conversation.summarized_through_id, 0) == context.summarized_through_id)
+                .values(summary=summary, summarized_through_id=summarized_through_id),
+                conversation_id,
+            )
+        except Exception as exc:
+            # The next turn retries; the conversation just keeps its previous summary meanwhile
+            print(f"DEBUG: Failed to update summary for conversation {conversation_id}: {exc}")
+        finally:
+            self._summarizing.discard(conversation_id)
+
+
+conversation_memory = ConversationMemory(
+    history_token_budget=settings.MEMORY_HISTORY_TOKEN_BUDGET,
+    summary_token_budget=settings.MEMORY_SUMMARY_TOKEN_BUDGET,
+    max_messages=settings.MEMORY_MAX_MESSAGES,
+)
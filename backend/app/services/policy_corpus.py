@@ -0,0 +1,205 @@
+"""
+File-backed policy corpus.
+
+Policies live as Markdown files with a small front matter header under
+``POLICY_SOURCE_DIR`` (one sub-directory per policy group is the convention):
+
+    ---
+    title: Hand Hygiene Protocol for ICU
+    units: ICU
+    ---
+    **Hand Hygiene in ICU Settings**
+    ...
+
+An offline command tokenizes and embeds the corpus once and writes a versioned
+index directory under ``POLICY_INDEX_DIR``:
+
+    poetry run python -m app.services.policy_corpus build
+
+The ``CURRENT`` file names the live version and is swapped with an atomic rename,
+so workers pick up a rebuilt corpus on their next refresh check without downtime
+and without re-parsing anything themselves.
+"""
+import argparse
+import hashlib
+import json
+import os
+import shutil
+import threading
+import time
+from dataclasses import dataclass
+from typing import Dict, List, Optional
+
+from app.config import settings
+from app.services.policy_index import PolicyDocument, PolicyIndex
+from app.services.vector_index import HashingEmbedder, VectorIndex
+
+CURRENT_FILE = "CURRENT"
+# Older versions are kept briefly so workers that have not refreshed yet can still read them
+KEEP_VERSIONS = 2
+
+
+def parse_policy_file(path: str, source_dir: str) -> PolicyDocument:
+    """Parse one policy document; the policy id is the file name without its extension"""
+    with open(path, encoding="utf-8") as f:
+        text = f.read()
+
+    header: Dict[str, str] = {}
+    body = text
+    if text.startswith("---"):
+        _, front_matter, body = text.split("---", 2)
+        for line in front_matter.strip().splitlines():
+            key, _, value = line.partition(":")
+            header[key.strip().lower()] = value.strip()
+
+    policy_id = os.path.splitext(os.path.basename(path))[0]
+    units = header.get("units") or os.path.basename(os.path.dirname(os.path.relpath(path, source_dir))).upper()
+    return PolicyDocument(
+        policy_id=policy_id,
+        title=header.get("title", policy_id.replace("_", " ").title()),
+        content=body.strip(),
+        units=frozenset(unit.strip().upper() for unit in units.split(",") if unit.strip()),
+    )
+
+
+def load_documents(source_dir: str) -> List[PolicyDocument]:
+    """Read every policy file under the source directory in a stable order"""
+    paths = []
+    for root, _, files in os.walk(source_dir):
+        paths.extend(os.path.join(root, name) for name in files if name.endswith((".md", ".txt")))
+    return [parse_policy_file(path, source_dir) for path in sorted(paths)]
+
+
+def corpus_version(documents: List[PolicyDocument], embedding_dimensions: int) -> str:
+    """Content hash of the corpus, so identical sources always produce the same version"""
+    digest = hashlib.sha256(str(embedding_dimensions).encode())
+    for document in documents:
+        digest.update(json.dumps([document.policy_id, document.title, document.content, sorted(document.units)]).encode())
+    return digest.hexdigest()[:12]
+
+
+def build_index(source_dir: str, index_dir: str, embedding_dimensions: int) -> str:
+    """Build the index for the source corpus, publish it as the current version and return that version"""
+    documents = load_documents(source_dir)
+    version = corpus_version(documents, embedding_dimensions)
+    version_dir = os.path.join(index_dir, version)
+
+    if not os.path.isdir(version_dir):
+        os.makedirs(index_dir, exist_ok=True)
+        staging_dir = os.path.join(index_dir, f".staging-{version}-{os.getpid()}")
+        shutil.rmtree(staging_dir, ignore_errors=True)
+        os.makedirs(staging_dir)
+
+        PolicyIndex.build(documents).save(staging_dir)
+        VectorIndex.build(documents, HashingEmbedder(embedding_dimensions)).save(os.path.join(staging_dir, "vectors.npy"))
+        with open(os.path.join(staging_dir, "meta.json"), "w") as f:
+            json.dump({"version": version, "documents": len(documents), "embedding_dimensions": embedding_dimensions}, f)
+        os.rename(staging_dir, version_dir)
+
+    # Publish by renaming over CURRENT so readers never see a half-written pointer
+    pointer_tmp = os.path.join(index_dir, f".{CURRENT_FILE}.{os.getpid()}")
+    with open(pointer_tmp, "w") as f:
+        f.write(version)
+    os.replace(pointer_tmp, os.path.join(index_dir, CURRENT_FILE))
+
+    _prune_versions(index_dir, keep=version)
+    return version
+
+
+def _prune_versions(index_dir: str, keep: str) -> None:
+    versions = [
+        entry for entry in os.listdir(index_dir)
+        if entry != keep and not entry.startswith(".") and os.path.isdir(os.path.join(index_dir, entry))
+    ]
+    versions.sort(key=lambda entry: os.path.getmtime(os.path.join(index_dir, entry)), reverse=True)
+    for stale in versions[KEEP_VERSIONS - 1:]:
+        shutil.rmtree(os.path.join(index_dir, stale), ignore_errors=True)
+
+
+@dataclass(frozen=True)
+class CorpusSnapshot:
+    version: str
+    index: PolicyIndex
+    vectors: VectorIndex
+
+    def policy_ids(self, unit: str) -> List[str]:
+        return [document.policy_id for document in self.index.documents if unit in document.units]
+
+
+class PolicyCorpus:
+    """
+    The live policy corpus for this worker.
+
+    Readers take an immutable snapshot with ``current()``; at most once per
+    ``reload_interval`` seconds that call also checks the ``CURRENT`` pointer and
+    swaps in a newer version, memory-mapping its arrays.
+    """
+
+    def __init__(self, source_dir: str, index_dir: str, embedding_dimensions: int, reload_interval: float = 5.0):
+        self.source_dir = source_dir
+        self.index_dir = index_dir
+        self.embedding_dimensions = embedding_dimensions
+        self.reload_interval = reload_interval
+        self._snapshot: Optional[CorpusSnapshot] = None
+        self._checked_at = 0.0
+        self._lock = threading.Lock()
+
+    def current(self) -> CorpusSnapshot:
+        now = time.monotonic()
+        if self._snapshot is None or now - self._checked_at >= self.reload_interval:
+            with self._lock:
+                if self._snapshot is None or now - self._checked_at >= self.reload_interval:
+                    self._checked_at = now
+                    self._refresh()
+        return self._snapshot
+
+    def _published_version(self) -> Optional[str]:
+        try:
+            with open(os.path.join(self.index_dir, CURRENT_FILE)) as f:
+                return f.read().strip() or None
+        except FileNotFoundError:
+            return None
+
+    def _refresh(self) -> None:
+        version = self._published_version()
+        if version is not None:
+            if self._snapshot is not None and self._snapshot.version == version:
+                return
+            version_dir = os.path.join(self.index_dir, version)
+            embedder = HashingEmbedder(self.embedding_dimensions)
+            self._snapshot = CorpusSnapshot(
+                version=version,
+                index=PolicyIndex.load(version_dir),
+                vectors=VectorIndex.load(os.path.join(version_dir, "vectors.npy"), embedder),
+            )
+            print(f"DEBUG: Loaded policy index version {version} ({len(self._snapshot.index)} policies)")
+        elif self._snapshot is None:
+            # No prebuilt index yet (e.g. local development): build one in memory from the source files
+            documents = load_documents(self.source_dir)
+            print(f"DEBUG: No policy index in '{self.index_dir}', building {len(documents)} policies in process")
+            self._snapshot = CorpusSnapshot(
+                version=corpus_version(documents, self.embedding_dimensions),
+                index=PolicyIndex.build(documents),
+                vectors=VectorIndex.build(documents, HashingEmbedder(self.embedding_dimensions)),
+            )
+
+
+policy_corpus = PolicyCorpus(
+    source_dir=settings.POLICY_SOURCE_DIR,
+    index_dir=settings.POLICY_INDEX_DIR,
+    embedding_dimensions=settings.POLICY_EMBEDDING_DIMENSIONS,
+    reload_interval=settings.POLICY_RELOAD_INTERVAL_SECONDS,
+)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Policy corpus tools")
+    subcommands = parser.add_subparsers(dest="command", required=True)
+    build_parser = subcommands.add_parser("build", help="Build and publish the policy index")
+    build_parser.add_argument("--source", default=settings.POLICY_SOURCE_DIR)
+    build_parser.add_argument("--index", default=settings.POLICY_INDEX_DIR)
+    args = parser.parse_args()
+
+    if args.command == "build":
+        version = build_index(args.source, args.index, settings.POLICY_EMBEDDING_DIMENSIONS)
+        print(f"Published policy index version {version} to {args.index}")
@@ -0,0 +1,161 @@
+import json
+import os
+import re
+from collections import Counter
+from dataclasses import asdict, dataclass, field
+from typing import Dict, FrozenSet, Iterable, List, Optional, Tuple
+
+import numpy as np
+
+TOKEN_PATTERN = re.compile(r"[a-z0-9]+")
+
+STOPWORDS = frozenset(
+    """
+    a an and are as at be by can do does for from how i if in is it me my of on or should
+    the their there this to was we what when where which who why will with you your
+    """.split()
+)
+
+
+def tokenize(text: str) -> List[str]:
+    """Lowercase text and split it into searchable terms"""
+    return [token for token in TOKEN_PATTERN.findall(text.lower()) if token not in STOPWORDS]
+
+
+@dataclass(frozen=True)
+class PolicyDocument:
+    policy_id: str
+    title: str
+    content: str
+    units: FrozenSet[str] = field(default_factory=frozenset)  # Policy groups this document applies to, e.g. {"ICU"}
+
+
+class PolicyIndex:
+    """
+    Inverted index over policy documents with BM25 scoring.
+
+    Everything that depends only on the corpus (tokenization, postings, IDF, length
+    normalization) is computed once when the index is built. Postings are stored as
+    flat NumPy arrays in CSR layout, so a query is a handful of vectorized adds over
+    the postings of its own terms followed by a partial sort for the top k.
+    """
+
+    ARRAY_NAMES = ("offsets", "doc_ids", "weights", "idf")
+
+    def __init__(
+        self,
+        documents: List[PolicyDocument],
+        vocabulary: Dict[str, int],
+        offsets: np.ndarray,
+        doc_ids: np.ndarray,
+        weights: np.ndarray,
+        idf: np.ndarray,
+    ):
+        self.documents = documents
+        self.vocabulary = vocabulary
+        self.offsets = offsets
+        self.doc_ids = doc_ids
+        self.weights = weights
+        self.idf = idf
+
+        self.unit_masks: Dict[str, np.ndarray] = {}
+        for doc_id, document in enumerate(self.documents):
+            for unit in document.units:
+                self.unit_masks.setdefault(unit, np.zeros(len(self.documents), dtype=bool))[doc_id] = True
+        self._unit_filter_cache: Dict[FrozenSet[str], np.ndarray] = {}
+
+    @classmethod
+    def build(cls, documents: Iterable[PolicyDocument], k1: float = 1.5, b: float = 0.75, title_weight: int = 2) -> "PolicyIndex":
+        documents = list(documents)
+        doc_terms = []
+        for document in documents:
+            # Titles and policy ids are short and descriptive, so they count more than body text
+            terms = tokenize(f"{document.policy_id.replace('_', ' ')} {document.title}") * title_weight + tokenize(document.content)
+            doc_terms.append(Counter(terms))
+
+        lengths = [sum(counts.values()) for counts in doc_terms]
+        average_length = (sum(lengths) / len(lengths)) if lengths else 0.0
+
+        postings: Dict[str, List[Tuple[int, float]]] = {}
+        for doc_id, counts in enumerate(doc_terms):
+            # Fold BM25's length normalization into each posting so scoring is a lookup and a sum
+            norm = k1 * (1 - b + b * lengths[doc_id] / average_length) if average_length else k1
+            for term, frequency in counts.items():
+                postings.setdefault(term, []).append((doc_id, frequency * (k1 + 1) / (frequency + norm)))
+
+        sizes = np.array([len(entries) for entries in postings.values()], dtype=np.int64)
+        offsets = np.zeros(len(sizes) + 1, dtype=np.int64)
+        np.cumsum(sizes, out=offsets[1:])
+        total = int(offsets[-1])
+        return cls(
+            documents,
+            vocabulary={term: term_id for term_id, term in enumerate(postings)},
+            offsets=offsets,
+            doc_ids=np.fromiter((doc_id for entries in postings.values() for doc_id, _ in entries), dtype=np.int32, count=total),
+            weights=np.fromiter((weight for entries in postings.values() for _, weight in entries), dtype=np.float32, count=total),
+            idf=np.log1p((len(documents) - sizes + 0.5) / (sizes + 0.5)).astype(np.float32),
+        )
+
+    def save(self, directory: str) -> None:
+        """Write the index as JSON metadata plus one .npy file per postings array"""
+        with open(os.path.join(directory, "documents.json"), "w") as f:
+            json.dump([{**asdict(document), "units": sorted(document.units)} for document in self.documents], f)
+        with open(os.path.join(directory, "vocabulary.json"), "w") as f:
+            json.dump(sorted(self.vocabulary, key=self.vocabulary.get), f)
+        for name in self.ARRAY_NAMES:
+            np.save(os.path.join(directory, f"{name}.npy"), getattr(self, name))
+
+    @classmethod
+    def load(cls, directory: str, mmap: bool = True) -> "PolicyIndex":
+        """Open a saved index; postings arrays are memory-mapped rather than read into each process"""
+        with open(os.path.join(directory, "documents.json")) as f:
+            documents = [PolicyDocument(**{**entry, "units": frozenset(entry["units"])}) for entry in json.load(f)]
+        with open(os.path.join(directory, "vocabulary.json")) as f:
+            vocabulary = {term: term_id for term_id, term in enumerate(json.load(f))}
+        arrays = {name: np.load(os.path.join(directory, f"{name}.npy"), mmap_mode="r" if mmap else None) for name in cls.ARRAY_NAMES}
+        return cls(documents, vocabulary, **arrays)
+
+    def __len__(self) -> int:
+        return len(self.documents)
+
+    def allowed_mask(self, units: Optional[Iterable[str]]) -> Optional[np.ndarray]:
+        if units is None:
+            return None
+        key = frozenset(units)
+        allowed = self._unit_filter_cache.get(key)
+        if allowed is None:
+            allowed = np.zeros(len(self.documents), dtype=bool)
+            for unit in key:
+                if unit in self.unit_masks:
+                    allowed |= self.unit_masks[unit]
+            self._unit_filter_cache[key] = allowed
+        return allowed
+
+    def score(self, query: str) -> np.ndarray:
+        """Return the BM25 score of every document for the query"""
+        scores = np.zeros(len(self.documents), dtype=np.float32)
+        for term in set(tokenize(query)):
+            term_id = self.vocabulary.get(term)
+            if term_id is None:
+                continue
+            start, end = self.offsets[term_id], self.offsets[term_id + 1]
+            # Each document appears at most once per term, so fancy-index accumulation is safe
+            scores[self.doc_ids[start:end]] += self.idf[term_id] * self.weights[start:end]
+        return scores
+
+    def search(self, query: str, units: Optional[Iterable[str]] = None, k: int = 3) -> List[Tuple[float, PolicyDocument]]:
+        """Return up to k (score, document) pairs for the query, best first, limited to the given policy groups"""
+        scores = self.score(query)
+        allowed = self.allowed_mask(units)
+        if allowed is not None:
+            scores[~allowed] = 0.0
+        return [(float(scores[doc_id]), self.documents[doc_id]) for doc_id in top_k(scores, k)]
+
+
+def top_k(scores: np.ndarray, k: int) -> List[int]:
+    """Return the ids of the k highest positive scores, best first, ties broken by lower id"""
+    candidates = np.flatnonzero(scores > 0)
+    if len(candidates) > k:
+        candidates = candidates[np.argpartition(-scores[candidates], k - 1)[:k]]
+    order = np.lexsort((candidates, -scores[candidates]))
+    return [int(doc_id) for doc_id in candidates[order]]
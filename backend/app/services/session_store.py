@@ -0,0 +1,217 @@
+import time
+from collections import OrderedDict
+from dataclasses import dataclass
+from datetime import datetime, timedelta, timezone
+from typing import Any, Callable, Hashable, Optional
+
+from sqlalchemy import delete, insert, select, update
+from sqlalchemy.exc import IntegrityError
+
+from app.config import settings
+from app.database.connection import async_session
+from app.database.models import SessionState
+
+
+class SessionStore:
+    """
+    Bounded in-memory store for per-conversation state.
+
+    Entries are kept in least-recently-used order and expire after ``ttl_seconds``
+    without access, so memory stays proportional to ``max_size`` no matter how many
+    conversations pass through a worker. Callers are expected to fall back to the
+    database when ``get`` returns None.
+    """
+
+    def __init__(self, max_size: int = 10000, ttl_seconds: float = 3600, clock: Callable[[], float] = time.monotonic):
+        self.max_size = max_size
+        self.ttl_seconds = ttl_seconds
+        self._clock = clock
+        self._entries: "OrderedDict[Hashable, tuple[float, Any]]" = OrderedDict()
+        self.evictions = 0
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def __contains__(self, key: Hashable) -> bool:
+        return self.get(key) is not None
+
+    def get(self, key: Hashable) -> Optional[Any]:
+        entry = self._entries.get(key)
+        if entry is None:
+            return None
+        touched_at, value = entry
+        now = self._clock()
+        if now - touched_at > self.ttl_seconds:
+            del self._entries[key]
+            self.evictions += 1
+            return None
+        self._entries[key] = (now, value)
+        self._entries.move_to_end(key)
+        return value
+
+    def set(self, key: Hashable, value: Any) -> None:
+        now = self._clock()
+        self._entries[key] = (now, value)
+        self._entries.move_to_end(key)
+        self._evict(now)
+
+    def delete(self, key: Hashable) -> None:
+        self._entries.pop(key, None)
+
+    def clear(self) -> None:
+        self._entries.clear()
+
+    def _evict(self, now: float) -> None:
+        # Oldest entries sit at the front, so expired ones can be dropped without a full scan
+        while self._entries:
+            key, (touched_at, _) = next(iter(self._entries.items()))
+            if len(self._entries) <= self.max_size and now - touched_at <= self.ttl_seconds:
+                break
+            del self._entries[key]
+            self.evictions += 1
+
+
+@dataclass(frozen=True)
+class Versioned:
+    value: Any
+    version: int
+
+
+class SessionBackend:
+    """
+    Per-conversation state that every request for the conversation sees, whichever
+    worker serves it.
+
+    Writers read a value with its version and ``compare_and_set`` against that
+    version; a False result means another writer got there first, and the caller
+    should reload and retry rather than overwrite.
+    """
+
+    async def load(self, key: str) -> Optional[Versioned]:
+        raise NotImplementedError
+
+    async def compare_and_set(self, key: str, value: Any, expected_version: Optional[int]) -> bool:
+        """Store ``value`` if ``key`` is still at ``expected_version`` (None: only if it is absent)"""
+        raise NotImplementedError
+
+
+class MemorySessionBackend(SessionBackend):
+    """
+    State in this worker's own bounded store. Cheapest, but only consistent with a
+    single worker; evicted entries are rebuilt by the caller.
+    """
+
+    def __init__(self, max_size: int = 10000, ttl_seconds: float = 3600, clock: Callable[[], float] = time.monotonic):
+        self.store = SessionStore(max_size=max_size, ttl_seconds=ttl_seconds, clock=clock)
+
+    def get(self, key: str) -> Optional[Any]:
+        entry = self.store.get(key)
+        return entry.value if entry is not None else None
+
+    def set(self, key: str, value: Any) -> None:
+        """Write unconditionally (seeding and tests)"""
+        entry = self.store.get(key)
+        self.store.set(key, Versioned(value, entry.version + 1 if entry is not None else 1))
+
+    async def load(self, key: str) -> Optional[Versioned]:
+        return self.store.get(key)
+
+    async def compare_and_set(self, key: str, value: Any, expected_version: Optional[int]) -> bool:
+        entry = self.store.get(key)
+        if (entry.version if entry is not None else None) != expected_version:
+            return False
+        self.store.set(key, Versioned(value, (expected_version or 0) + 1))
+        return True
+
+
+class DatabaseSessionBackend(SessionBackend):
+    """
+    State in the ``session_state`` table, shared by every worker on the database.
+
+    Each operation is one short statement on its own connection: an insert for a
+    new key, otherwise an ``UPDATE ... WHERE version = expected``, so concurrent
+    writers are ordered by the database rather than by any one process.
+
+    Rows not written for ``ttl_seconds`` are deleted, at most once every
+    ``prune_interval_seconds`` per worker, on the next write. Like evictions from
+    the memory backend, callers rebuild a pruned key.
+    """
+
+    def __init__(
+        self,
+        session_factory,
+        namespace: str,
+        encode: Callable[[Any], str],
+        decode: Callable[[str], Any],
+        ttl_seconds: float = 3600,
+        prune_interval_seconds: float = 300,
+        clock: Callable[[], float] = time.monotonic,
+    ):
+        self.session_factory = session_factory
+        self.namespace = namespace
+        self.encode = encode
+        self.decode = decode
+        self.ttl_seconds = ttl_seconds
+        self.prune_interval_seconds = prune_interval_seconds
+        self._clock = clock
+        self._pruned_at: Optional[float] = None
+
+    def _key(self, key: str) -> str:
+        return f"{self.namespace}:{key}"
+
+    async def load(self, key: str) -> Optional[Versioned]:
+        async with self.session_factory() as session:
+            row = (await session.execute(select(SessionState.value, SessionState.version).where(SessionState.key == self._key(key)))).first()
+        return Versioned(self.decode(row.value), row.version) if row else None
+
+    async def compare_and_set(self, key: str, value: Any, expected_version: Optional[int]) -> bool:
+        async with self.session_factory() as session:
+            if expected_version is None:
+                try:
+                    await session.execute(insert(SessionState).values(key=self._key(key), value=self.encode(value), version=1))
+                    await session.commit()
+                except IntegrityError:
+                    return False
+                stored = True
+            else:
+                result = await session.execute(
+                    update(SessionState)
+                    .where(SessionState.key == self._key(key), SessionState.version == expected_version)
+                    .values(value=self.encode(value), version=SessionState.version + 1)
+                )
+                await session.commit()
+                stored = result.rowcount == 1
+        await self._prune_if_due()
+        return stored
+
+    async def prune(self) -> int:
+        """Delete this namespace's rows not written within the TTL; returns how many went"""
+        # Timestamps are stored as naive UTC
+        cutoff = datetime.now(timezone.utc).replace(tzinfo=None) - timedelta(seconds=self.ttl_seconds)
+        async with self.session_factory() as session:
+            result = await session.execute(
+                delete(SessionState)
+                .where(SessionState.key.startswith(f"{self.namespace}:", autoescape=True), SessionState.updated_at < cutoff)
+            )
+            await session.commit()
+        return result.rowcount
+
+    async def _prune_if_due(self) -> None:
+        now = self._clock()
+        if self._pruned_at is not None and now - self._pruned_at < self.prune_interval_seconds:
+            return
+        self._pruned_at = now
+        await self.prune()
+
+
+def create_session_backend(kind: str, namespace: str, encode: Callable[[Any], str], decode: Callable[[str], Any]) -> SessionBackend:
+    """Build the backend named by SESSION_BACKEND; ``encode``/``decode`` turn values into stored text"""
+    if kind == "memory":
+        return MemorySessionBackend(max_size=settings.SESSION_STORE_MAX_SIZE, ttl_seconds=settings.SESSION_STORE_TTL_SECONDS)
+    if kind == "database":
+        return DatabaseSessionBackend(
+            async_session, namespace, encode, decode,
+            ttl_seconds=settings.SESSION_STORE_TTL_SECONDS,
+            prune_interval_seconds=settings.SESSION_STORE_PRUNE_INTERVAL_SECONDS,
+        )
+    raise ValueError(f"Unknown session backend {kind!r}; expected 'memory' or 'database'")
@@ -0,0 +1,120 @@
+import asyncio
+import contextvars
+from typing import AsyncIterator, Awaitable, Callable, Dict, Hashable, List, Optional
+
+from app.core.metrics import metrics
+
+TokenSink = Callable[[str], None]
+Generator = Callable[[TokenSink], Awaitable[str]]
+
+
+class Flight:
+    """
+    One in-flight generation whose tokens any number of followers can read.
+
+    Tokens are kept for the life of the flight, so a follower that joins late first
+    gets everything produced so far, then live tokens as they arrive.
+    """
+
+    def __init__(self, on_abandoned: Callable[["Flight"], None]):
+        self.tokens: List[str] = []
+        self.done = False
+        self.error: Optional[BaseException] = None
+        self.followers = 0
+        self.task: Optional[asyncio.Task] = None
+        self._on_abandoned = on_abandoned
+        self._changed = asyncio.Event()
+
+    def _notify(self) -> None:
+        changed, self._changed = self._changed, asyncio.Event()
+        changed.set()
+
+    def publish(self, token: str) -> None:
+        if token:
+            self.tokens.append(token)
+            self._notify()
+
+    def finish(self, error: Optional[BaseException] = None) -> None:
+        self.done = True
+        self.error = error
+        self._notify()
+
+    async def follow(self) -> AsyncIterator[str]:
+        self.followers += 1
+        position = 0
+        try:
+            while True:
+                changed = self._changed
+                while position < len(self.tokens):
+                    yield self.tokens[position]
+                    position += 1
+                if self.done:
+                    break
+                await changed.wait()
+            if self.error is not None:
+                raise self.error
+        finally:
+            self.followers -= 1
+            if self.followers == 0 and not self.done:
+                # Everyone went away (e.g. clients disconnected): stop the generation too
+                self._on_abandoned(self)
+
+
+class SingleFlight:
+    """
+    Coalesces concurrent identical generations.
+
+    The first caller for a key starts the generation in a task of its own; callers
+    with the same key while it runs follow that flight instead of starting another.
+    The generation runs outside the callers' tracing context, so every caller,
+    including the first, reads tokens the same way, and it is cancelled once the
+    last follower leaves.
+    """
+
+    def __init__(self):
+        self._flights: Dict[Hashable, Flight] = {}
+        self.started = 0
+        self.joined = 0
+
+    def __len__(self) -> int:
+        return len(self._flights)
+
+    def follow(self, key: Hashable, generate: Generator) -> AsyncIterator[str]:
+        """Stream the tokens for ``key``, running ``generate(publish)`` only if no flight is under way"""
+        flight = self._flights.get(key)
+        if flight is None:
+            flight = Flight(on_abandoned=lambda abandoned: self._abandon(key, abandoned))
+            self._flights[key] = flight
+            # A fresh context keeps the shared LLM call out of the first caller's event stream
+            flight.task = asyncio.get_running_loop().create_task(self._run(key, flight, generate), context=contextvars.Context())
+            self.started += 1
+        else:
+            self.joined += 1
+            metrics.incr("llm_calls_saved", reason="coalesced")
+        return flight.follow()
+
+    def _forget(self, key: Hashable, flight: Flight) -> None:
+        if self._flights.get(key) is flight:
+            del self._flights[key]
+
+    def _abandon(self, key: Hashable, flight: Flight) -> None:
+        self._forget(key, flight)
+        if flight.task is not None:
+            flight.task.cancel()
+
+    async def _run(self, key: Hashable, flight: Flight, generate: Generator) -> None:
+        try:
+            result = await generate(flight.publish)
+            if not flight.tokens and result:
+                # The model did not stream; hand over the whole answer at once
+                flight.publish(result)
+            flight.finish()
+        except BaseException as exc:
+            flight.finish(exc)
+            if isinstance(exc, asyncio.CancelledError):
+                raise
+        finally:
+            self._forget(key, flight)
+
+    def stats(self) -> Dict[str, int]:
+        return {"in_flight": len(self._flights), "started": self.started, "joined": self.joined}
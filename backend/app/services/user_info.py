@@ -1,4 +1,5 @@
-from typing import List, Dict, Optional, Any
+import re
+from typing import List, Dict, Optional, Any, Tuple
 from dataclasses import dataclass
 
 @dataclass
@@ -36,18 +37,65 @@ class HospitalUnits:
     
     @classmethod
     def find_unit(cls, user_input: str) -> Optional[str]:
-        user_input_upper = user_input.upper()
-        
-        # Check exact match first
-        if user_input_upper in cls.ALL_UNITS:
-            return user_input_upper
-            
-        # Check aliases
-        for unit, aliases in cls.ALL_UNITS.items():
-            if user_input_upper in [alias.upper() for alias in aliases]:
-                return unit
-                
-        return None
+        return UNIT_MATCHER.find(user_input)
+
+_TOKEN_PATTERN = re.compile(r"[A-Z0-9]+|&")
+_UNITS_KEY = None  # Trie slot holding the units that share the alias ending at a node
+
+def _tokenize(text: str) -> List[str]:
+    """Split text into uppercase alias tokens, treating "and" and "&" as the same word"""
+    return ["&" if token == "AND" else token for token in _TOKEN_PATTERN.findall(text.upper())]
+
+class UnitMatcher:
+    """
+    Token trie over every unit name and alias, built once and reused for every message.
+
+    ``find`` walks the message a single time and returns the best unit mentioned
+    anywhere in it. When several aliases match, an alias owned by fewer units wins,
+    then the longer alias, then the earlier mention; an alias shared by several units
+    (e.g. "ICU") resolves to the first unit that declares it.
+    """
+
+    def __init__(self, units: Dict[str, List[str]]):
+        self._root: Dict[Any, Any] = {}
+        self._max_alias_length = 0
+        for unit, aliases in units.items():
+            for alias in [unit, *aliases]:
+                self.add(alias, unit)
+
+    def add(self, alias: str, unit: str) -> None:
+        tokens = _tokenize(alias)
+        if not tokens:
+            return
+        node = self._root
+        for token in tokens:
+            node = node.setdefault(token, {})
+        owners = node.setdefault(_UNITS_KEY, [])
+        if unit not in owners:
+            owners.append(unit)
+        self._max_alias_length = max(self._max_alias_length, len(tokens))
+
+    def find(self, text: str) -> Optional[str]:
+        tokens = _tokenize(text)
+        best: Optional[Tuple[int, int, int]] = None
+        best_unit = None
+        for start in range(len(tokens)):
+            node = self._root
+            for end in range(start, min(start + self._max_alias_length, len(tokens))):
+                node = node.get(tokens[end])
+                if node is None:
+                    break
+                owners = node.get(_UNITS_KEY)
+                if owners:
+                    rank = (len(owners), start - end, start)
+                    if best is None or rank < best:
+                        best, best_unit = rank, owners[0]
+        return best_unit
+
+UNIT_MATCHER = UnitMatcher(HospitalUnits.ALL_UNITS)
+
+# Phrases that say the unit mentioned is the user's own, e.g. "I work on 6 north", "my unit is the ED"
+_SELF_IDENTIFYING = re.compile(r"\b(?:WORK(?:ING)?|I'?M|I AM|MY UNIT|MOVED|FLOATED|FLOATING|TRANSFERRED)\b")
 
 def extract_user_info(message: str, current_info: UserInfo) -> UserInfo:
     """Extract unit and role from user message"""
@@ -65,9 +113,12 @@ def extract_user_info(message: str, current_info: UserInfo) -> UserInfo:
             print(f"DEBUG: Extracted role: {new_info.role}")
             break
     
-    # Extract unit - check if any unit keywords are mentioned
+    # Extract unit - check if any unit keywords are mentioned. Once the unit is known, a mention
+    # only replaces it when the user says it is theirs ("what's the ICU transfer policy?" does not)
     found_unit = HospitalUnits.find_unit(message)
-    if found_unit:
+    if found_unit and current_info.unit and not _SELF_IDENTIFYING.search(message_upper):
+        print(f"DEBUG: Keeping unit '{current_info.unit}', '{found_unit}' is not self-identifying")
+    elif found_unit:
         new_info.unit = found_unit
         print(f"DEBUG: Mapped unit '{message}' -> '{found_unit}'")
     else:
@@ -0,0 +1,84 @@
+"""
+Dense policy retrieval over a float32 embedding matrix.
+
+Vectors are built offline as part of the policy index (see ``policy_corpus``) and
+saved as a single ``.npy`` file. Workers open that file with ``mmap_mode="r"`` so
+every uvicorn process on a host shares the same page-cache copy instead of loading
+its own.
+"""
+import math
+import zlib
+from collections import Counter
+from typing import Iterable, List, Protocol
+
+import numpy as np
+
+from app.services.policy_index import PolicyDocument, tokenize
+
+
+class Embedder(Protocol):
+    dimensions: int
+
+    def embed_many(self, texts: Iterable[str]) -> np.ndarray: ...
+
+
+class HashingEmbedder:
+    """
+    Bag-of-words embedder using the hashing trick.
+
+    Each term is hashed to a signed bucket with a stable hash, weighted by
+    sublinear term frequency, and the vector is L2-normalized so a dot product is
+    cosine similarity. It needs no model download and is deterministic across
+    processes, which makes it a baseline that any local model can replace.
+    """
+
+    def __init__(self, dimensions: int = 512):
+        self.dimensions = dimensions
+
+    def embed(self, text: str) -> np.ndarray:
+        vector = np.zeros(self.dimensions, dtype=np.float32)
+        for term, frequency in Counter(tokenize(text)).items():
+            bucket = zlib.crc32(term.encode("utf-8"))
+            sign = 1.0 if bucket & 0x80000000 else -1.0
+            vector[bucket % self.dimensions] += sign * (1.0 + math.log(frequency))
+        norm = np.linalg.norm(vector)
+        if norm:
+            vector /= norm
+        return vector
+
+    def embed_many(self, texts: Iterable[str]) -> np.ndarray:
+        vectors = [self.embed(text) for text in texts]
+        return np.vstack(vectors) if vectors else np.zeros((0, self.dimensions), dtype=np.float32)
+
+
+def document_text(document: PolicyDocument) -> str:
+    return f"{document.policy_id.replace('_', ' ')} {document.title}\n{document.content}"
+
+
+class VectorIndex:
+    """Contiguous (documents x dimensions) float32 matrix scored with one matrix-vector product per query"""
+
+    def __init__(self, vectors: np.ndarray, embedder: Embedder):
+        if vectors.ndim != 2 or vectors.shape[1] != embedder.dimensions:
+            raise ValueError(f"Expected a matrix with {embedder.dimensions} columns, got shape {vectors.shape}")
+        self.vectors = vectors if vectors.dtype == np.float32 else vectors.astype(np.float32)
+        self.embedder = embedder
+
+    def __len__(self) -> int:
+        return self.vectors.shape[0]
+
+    @classmethod
+    def build(cls, documents: List[PolicyDocument], embedder: Embedder) -> "VectorIndex":
+        return cls(np.ascontiguousarray(embedder.embed_many([document_text(document) for document in documents]), dtype=np.float32), embedder)
+
+    @classmethod
+    def load(cls, path: str, embedder: Embedder, mmap: bool = True) -> "VectorIndex":
+        return cls(np.load(path, mmap_mode="r" if mmap else None), embedder)
+
+    def save(self, path: str) -> None:
+        np.save(path, np.ascontiguousarray(self.vectors))
+
+    def score(self, query: str) -> np.ndarray:
+        """Return the cosine similarity of every document to the query"""
+        return self.vectors @ self.embedder.embed_many([query])[0]
+
@@ -0,0 +1,74 @@
+"""
+Write throughput of the database engine profiles under concurrent chat-style commits.
+
+Each writer repeatedly inserts a message and commits, as the chat endpoints do.
+Run from the backend directory:
+
+    poetry run python -m benchmarks.bench_db_writes [--writers 20] [--commits 50] [--postgres-url URL]
+"""
+import argparse
+import asyncio
+import os
+import statistics
+import tempfile
+import time
+
+from sqlalchemy.exc import OperationalError
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import sessionmaker
+
+from app.database.connection import create_engine, sqlite_pragmas
+from app.database.models import Message
+from app.database.schema import sync_schema
+
+
+async def run_profile(name: str, url: str, writers: int, commits: int, pragmas=None) -> None:
+    engine = create_engine(url, pragmas)
+    async with engine.begin() as conn:
+        await conn.run_sync(sync_schema)
+    session_factory = sessionmaker(engine, class_=AsyncSession, expire_on_commit=False)
+    latencies = []
+    errors = 0
+
+    async def writer(writer_id: int):
+        nonlocal errors
+        for i in range(commits):
+            start = time.perf_counter()
+            try:
+                async with session_factory() as session:
+                    session.add(Message(conversation_id=f"bench-{writer_id}", role="user", content=f"message {i} " * 20))
+                    await session.commit()
+                latencies.append((time.perf_counter() - start) * 1000)
+            except OperationalError:
+                errors += 1
+
+    start = time.perf_counter()
+    await asyncio.gather(*[writer(writer_id) for writer_id in range(writers)])
+    elapsed = time.perf_counter() - start
+    await engine.dispose()
+
+    latencies.sort()
+    p95 = latencies[int(len(latencies) * 0.95)] if latencies else float("nan")
+    p50 = statistics.median(latencies) if latencies else float("nan")
+    print(f"{name:<16} {len(latencies) / elapsed:>10.0f} {p50:>9.2f} {p95:>9.2f} {errors:>7}")
+
+
+async def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--writers", type=int, default=20)
+    parser.add_argument("--commits", type=int, default=50)
+    parser.add_argument("--postgres-url", default=os.environ.get("BENCH_POSTGRES_URL"))
+    args = parser.parse_args()
+
+    print(f"{'profile':<16} {'commits/s':>10} {'p50 ms':>9} {'p95 ms':>9} {'errors':>7}")
+    with tempfile.TemporaryDirectory() as directory:
+        # SQLite's own defaults: rollback journal, synchronous=FULL, no busy timeout
+        default_pragmas = {"journal_mode": "DELETE", "synchronous": "FULL", "busy_timeout": 0}
+        await run_profile("sqlite-default", f"sqlite+aiosqlite:///{directory}/default.db", args.writers, args.commits, default_pragmas)
+        await run_profile("sqlite-wal", f"sqlite+aiosqlite:///{directory}/wal.db", args.writers, args.commits, sqlite_pragmas())
+    if args.postgres_url:
+        await run_profile("postgres", args.postgres_url, args.writers, args.commits)
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,134 @@
+"""
+Routing accuracy and time per message for the intent routers.
+
+Compares the original substring checks with the compiled phrase rules, with and
+without the intent classifier. The classifier weights (intent_classifier.json) were
+tuned by hand on TUNING_MESSAGES, so accuracy is reported on HELD_OUT_MESSAGES,
+which were written separately and must not be used to adjust the weights; move a
+message to the tuning set before tuning against it. Run from the backend directory:
+
+    poetry run python -m benchmarks.bench_intent_router [classifier_config]
+"""
+import sys
+import time
+
+from app.services.intent_router import GREETING, QUESTION, VAGUE, IntentClassifier, IntentRouter
+
+# The set the classifier weights were tuned on; its accuracy here says nothing about new messages
+TUNING_MESSAGES = [
+    ("hi", GREETING),
+    ("Hello!", GREETING),
+    ("hey there", GREETING),
+    ("Good morning", GREETING),
+    ("how does this work?", GREETING),
+    ("Thanks so much", GREETING),
+    ("thank you, that helps", GREETING),
+    ("Hi, can you help me?", GREETING),
+    ("who are you?", GREETING),
+    ("What is the hand hygiene protocol?", QUESTION),
+    ("How often should the IV dressing be changed?", QUESTION),
+    ("When do I need to document a fall?", QUESTION),
+    ("Where is the restraint policy?", QUESTION),
+    ("Why do we double check heparin?", QUESTION),
+    ("Can a tech remove a foley catheter?", QUESTION),
+    ("Should I wear a gown for MRSA contact precautions?", QUESTION),
+    ("Which isolation precautions apply to C. diff?", QUESTION),
+    ("Is this the right insulin verification procedure?", QUESTION),
+    ("Which patients need pressure injury assessments every shift?", QUESTION),
+    ("Is it allowed to hang blood without a second nurse?", QUESTION),
+    ("this patient's central line dressing is wet, what now?", QUESTION),
+    ("what is the fall risk protocol for this unit?", QUESTION),
+    ("Hi, what's the policy for PCA pump checks?", QUESTION),
+    ("How does the heparin drip titration work?", QUESTION),
+    ("Does a blood transfusion need two RN signatures?", QUESTION),
+    ("policy?", VAGUE),
+    ("ok", VAGUE),
+    ("I have a question about policies", VAGUE),
+    ("something about this", VAGUE),
+    ("This is confusing", VAGUE),
+    ("which one", VAGUE),
+    ("I need some information", VAGUE),
+    ("scan the candidate list", VAGUE),
+    ("stuff for my shift", VAGUE),
+    ("anything else", VAGUE),
+]
+
+HELD_OUT_MESSAGES = [
+    ("hiya", GREETING),
+    ("Hey, good evening", GREETING),
+    ("hello, I'm new here", GREETING),
+    ("thanks, bye", GREETING),
+    ("Good afternoon!", GREETING),
+    ("Can you help?", GREETING),
+    ("what can you do?", GREETING),
+    ("Is this a bot?", GREETING),
+    ("appreciate it", GREETING),
+    ("What is the policy for wound vac dressing changes?", QUESTION),
+    ("How long can a peripheral IV stay in?", QUESTION),
+    ("When should I call a rapid response?", QUESTION),
+    ("Do I need a second nurse to verify insulin drips?", QUESTION),
+    ("Who can draw blood cultures from a central line?", QUESTION),
+    ("Are visitors allowed in airborne isolation rooms?", QUESTION),
+    ("How often do we turn patients for pressure injury prevention?", QUESTION),
+    ("What do I document after a patient fall?", QUESTION),
+    ("Is a new order required to restart restraints after 24 hours?", QUESTION),
+    ("Can techs take vitals on a patient in droplet precautions?", QUESTION),
+    ("what's the max rate for a potassium infusion", QUESTION),
+    ("Where do I find the sepsis bundle checklist?", QUESTION),
+    ("How many hours between foley catheter care checks?", QUESTION),
+    ("Hi, how do I dispose of chemo waste?", QUESTION),
+    ("need the tube feeding hold policy before surgery", QUESTION),
+    ("question", VAGUE),
+    ("hmm", VAGUE),
+    ("not sure", VAGUE),
+    ("tell me more", VAGUE),
+    ("I was wondering about something", VAGUE),
+    ("the thing from earlier", VAGUE),
+    ("info please", VAGUE),
+    ("what about it", VAGUE),
+    ("policies for nurses", VAGUE),
+    ("yes", VAGUE),
+    ("more", VAGUE),
+]
+
+
+class SubstringRouter:
+    """The original router: substring checks against the lowercased message"""
+
+    def intent(self, message: str) -> str:
+        lowered = message.lower()
+        if any(greeting in lowered for greeting in ["hi", "hello", "hey", "help", "how does this work"]) and len(lowered) < 50:
+            return GREETING
+        if not any(word in lowered for word in ["what", "how", "when", "where", "why", "can", "should"]) or len(lowered) < 10:
+            return VAGUE
+        return QUESTION
+
+
+def measure(router, messages, repeats: int = 200):
+    correct = sum(router.intent(message) == expected for message, expected in messages)
+    start = time.perf_counter()
+    for _ in range(repeats):
+        for message, _ in messages:
+            router.intent(message)
+    elapsed = time.perf_counter() - start
+    return correct / len(messages), elapsed * 1e6 / (repeats * len(messages))
+
+
+def main():
+    classifier_path = sys.argv[1] if len(sys.argv) > 1 else "intent_classifier.json"
+    variants = [
+        ("substring checks", SubstringRouter()),
+        ("compiled phrase rules", IntentRouter()),
+        ("phrase rules + classifier", IntentRouter(classifier=IntentClassifier.load(classifier_path))),
+    ]
+
+    rules_on_tuning_set, _ = measure(IntentRouter(), TUNING_MESSAGES, repeats=1)
+    print(f"{len(HELD_OUT_MESSAGES)} held-out messages ({len(TUNING_MESSAGES)} more were used for tuning and are not scored)")
+    for name, router in variants:
+        accuracy, microseconds = measure(router, HELD_OUT_MESSAGES)
+        print(f"{name:28} accuracy: {accuracy:6.1%}  {microseconds:6.1f}us/message")
+    print(f"{'(phrase rules, tuning set)':28} accuracy: {rules_on_tuning_set:6.1%}")
+
+
+if __name__ == "__main__":
+    main()
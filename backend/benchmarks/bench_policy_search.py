@@ -0,0 +1,60 @@
+"""
+Query latency of the BM25 policy index over a large synthetic corpus.
+
+Run from the backend directory:
+
+    poetry run python -m benchmarks.bench_policy_search [document_count]
+"""
+import random
+import statistics
+import sys
+import time
+
+from app.services.policy_corpus import policy_corpus
+from app.services.policy_index import PolicyDocument, PolicyIndex
+
+QUERIES = [
+    "What is the hand hygiene protocol?",
+    "How often should IV line dressings be changed?",
+    "isolation precautions for C. diff",
+    "triage levels for chest pain",
+    "double verification for high-alert medications",
+]
+
+
+def synthetic_corpus(document_count: int, seed: int = 7) -> list:
+    """Build a corpus by shuffling sentences from the real policies across many fake units"""
+    rng = random.Random(seed)
+    sentences = [line.strip() for document in policy_corpus.current().index.documents for line in document.content.splitlines() if line.strip()]
+    vocabulary = [f"term{i}" for i in range(5000)]
+    groups = ["ICU", "ED", "MED", "SURG", "PEDS", "OB"]
+    documents = []
+    for i in range(document_count):
+        body = rng.sample(sentences, 8) + [" ".join(rng.sample(vocabulary, 40))]
+        documents.append(
+            PolicyDocument(policy_id=f"policy_{i}", title=f"Policy {i}", content="\n".join(body), units=frozenset([rng.choice(groups)]))
+        )
+    return documents
+
+
+def main():
+    document_count = int(sys.argv[1]) if len(sys.argv) > 1 else 20000
+
+    start = time.perf_counter()
+    index = PolicyIndex.build(synthetic_corpus(document_count))
+    build_seconds = time.perf_counter() - start
+
+    latencies = []
+    for _ in range(50):
+        for query in QUERIES:
+            start = time.perf_counter()
+            index.search(query, units=["ICU"], k=3)
+            latencies.append((time.perf_counter() - start) * 1000)
+    latencies.sort()
+
+    print(f"documents: {len(index)}  build: {build_seconds:.2f}s")
+    print(f"query p50: {statistics.median(latencies):.3f}ms  p95: {latencies[int(len(latencies) * 0.95)]:.3f}ms")
+
+
+if __name__ == "__main__":
+    main()
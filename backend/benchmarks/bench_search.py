@@ -0,0 +1,120 @@
+"""
+Full-text search over conversation history: insert cost of keeping the FTS5 index in
+sync, and query latency once the history is large.
+
+Inserts the same synthetic messages into a database without and with the search index,
+in write-behind sized batches (one commit each), then times ranked, snippet-highlighted
+first-page searches, alone and filtered by user and date. Run from the backend directory:
+
+    poetry run python -m benchmarks.bench_search [--messages 1000000] [--users 500]
+"""
+import argparse
+import os
+import random
+import statistics
+import tempfile
+import time
+from datetime import datetime, timedelta
+
+from sqlalchemy import create_engine, insert
+
+from app.config import settings
+from app.database.models import Base, Conversation, Message
+from app.database.schema import sync_schema
+from app.database.search import match_expression, search_query
+
+TOPICS = [
+    "central line dressing change", "heparin drip titration", "insulin sliding scale", "restraint documentation",
+    "fall risk assessment", "blood transfusion verification", "foley catheter care", "pressure injury prevention",
+    "contact isolation precautions", "hand hygiene audit", "pca pump checks", "sepsis bundle timing",
+]
+FILLER = "the a patient unit nurse shift policy when how often should we do is it for on in with per after before".split()
+QUERIES = ["central line dressing", "heparin", "isolation precautions", "pca pump", "sepsis", "nurse"]
+
+
+def synthetic_messages(count: int, seed: int = 7):
+    rng = random.Random(seed)
+    start = datetime(2024, 1, 1)
+    for i in range(count):
+        words = rng.choices(FILLER, k=rng.randint(8, 40)) + rng.choice(TOPICS).split()
+        rng.shuffle(words)
+        yield {
+            "conversation_id": f"conversation-{i // 20}",
+            "role": "user" if i % 2 == 0 else "assistant",
+            "content": " ".join(words),
+            "created_at": start + timedelta(seconds=i * 30),
+        }
+
+
+def load(url: str, messages: int, users: int, batch_size: int, indexed: bool) -> float:
+    """Insert the corpus and return the mean commit time per batch in milliseconds"""
+    engine = create_engine(url)
+    with engine.begin() as conn:
+        if indexed:
+            sync_schema(conn)
+        else:
+            Base.metadata.create_all(conn)
+        conn.execute(insert(Conversation), [
+            {"id": f"conversation-{i}", "user_id": f"user-{i % users}"} for i in range((messages + 19) // 20)
+        ])
+
+    batch_times = []
+    batch = []
+    for message in synthetic_messages(messages):
+        batch.append(message)
+        if len(batch) == batch_size:
+            start = time.perf_counter()
+            with engine.begin() as conn:
+                conn.execute(insert(Message), batch)
+            batch_times.append((time.perf_counter() - start) * 1000)
+            batch = []
+    if batch:
+        with engine.begin() as conn:
+            conn.execute(insert(Message), batch)
+    engine.dispose()
+    return statistics.mean(batch_times) if batch_times else float("nan")
+
+
+def time_searches(url: str, repeats: int, **filters) -> list:
+    """First-page latencies in milliseconds"""
+    engine = create_engine(url)
+    latencies = []
+    with engine.connect() as conn:
+        for _ in range(repeats):
+            for query in QUERIES:
+                start = time.perf_counter()
+                conn.execute(search_query(match_expression(query), 20, **filters)).all()
+                latencies.append((time.perf_counter() - start) * 1000)
+    engine.dispose()
+    return sorted(latencies)
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--messages", type=int, default=200000)
+    parser.add_argument("--users", type=int, default=500)
+    parser.add_argument("--batch-size", type=int, default=settings.WRITE_BEHIND_MAX_BATCH_SIZE)
+    parser.add_argument("--repeats", type=int, default=5)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as directory:
+        plain_url = f"sqlite:///{os.path.join(directory, 'plain.db')}"
+        indexed_url = f"sqlite:///{os.path.join(directory, 'indexed.db')}"
+        plain_ms = load(plain_url, args.messages, args.users, args.batch_size, indexed=False)
+        indexed_ms = load(indexed_url, args.messages, args.users, args.batch_size, indexed=True)
+        print(f"insert, {args.batch_size} messages per commit: {plain_ms:.2f}ms without index, {indexed_ms:.2f}ms with index "
+              f"(+{(indexed_ms - plain_ms) / args.batch_size * 1000:.0f}us per message)")
+
+        last_week = datetime(2024, 1, 1) + timedelta(seconds=args.messages * 30) - timedelta(days=7)
+        print(f"{'search over ' + str(args.messages) + ' messages':<36} {'p50 ms':>9} {'p95 ms':>9}")
+        for name, filters in [
+            ("all users", {}),
+            ("one user", {"user_id": "user-1"}),
+            ("one user, last 7 days", {"user_id": "user-1", "since": last_week}),
+        ]:
+            latencies = time_searches(indexed_url, args.repeats, **filters)
+            print(f"{name:<36} {statistics.median(latencies):>9.2f} {latencies[int(len(latencies) * 0.95)]:>9.2f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,79 @@
+"""
+Frames and CPU time per 1k streamed tokens for the SSE framing strategies.
+
+Tokens arrive in small bursts, the way they come off an OpenAI stream, and many
+streams run concurrently. Run from the backend directory:
+
+    poetry run python -m benchmarks.bench_sse [streams] [tokens_per_stream]
+"""
+import asyncio
+import json
+import sys
+import time
+
+from app.core.sse import SSEWriter, get_json_encoder, orjson
+
+BURST_SIZE = 4
+BURST_INTERVAL = 0.002
+
+
+async def token_stream(count: int):
+    for i in range(count):
+        if i % BURST_SIZE == 0:
+            await asyncio.sleep(BURST_INTERVAL)
+        yield f" token{i % 97}"
+
+
+async def legacy_frames(tokens, conversation_id: str):
+    """The original framing: one json.dumps of the whole payload per token"""
+    full_response = ""
+    async for chunk in tokens:
+        full_response += chunk
+        yield f"data: {json.dumps({'content': chunk, 'conversation_id': conversation_id})}\n\n"
+
+
+async def run_streams(make_frames, streams: int, tokens_per_stream: int):
+    async def consume(i):
+        frames = 0
+        async for _ in make_frames(token_stream(tokens_per_stream), f"conversation-{i}"):
+            frames += 1
+        return frames
+
+    cpu_start = time.process_time()
+    frame_counts = await asyncio.gather(*(consume(i) for i in range(streams)))
+    return sum(frame_counts), time.process_time() - cpu_start
+
+
+def writer_frames(coalesce_ms: float, encoder_name: str):
+    encoder = get_json_encoder(encoder_name)
+
+    def make_frames(tokens, conversation_id):
+        return SSEWriter({"conversation_id": conversation_id}, coalesce_ms=coalesce_ms, encoder=encoder).stream(tokens)
+
+    return make_frames
+
+
+def main():
+    streams = int(sys.argv[1]) if len(sys.argv) > 1 else 50
+    tokens_per_stream = int(sys.argv[2]) if len(sys.argv) > 2 else 1000
+    total_tokens = streams * tokens_per_stream
+
+    variants = [
+        ("legacy json.dumps per token", legacy_frames),
+        ("writer, no coalescing, json", writer_frames(0, "json")),
+        ("writer, 15ms coalescing, json", writer_frames(15, "json")),
+    ]
+    if orjson is not None:
+        variants += [
+            ("writer, no coalescing, orjson", writer_frames(0, "orjson")),
+            ("writer, 15ms coalescing, orjson", writer_frames(15, "orjson")),
+        ]
+
+    print(f"{streams} concurrent streams x {tokens_per_stream} tokens")
+    for name, make_frames in variants:
+        frames, cpu_seconds = asyncio.run(run_streams(make_frames, streams, tokens_per_stream))
+        print(f"{name:34} frames/1k tokens: {frames * 1000 / total_tokens:7.1f}  cpu/1k tokens: {cpu_seconds * 1000 * 1000 / total_tokens:6.2f}ms")
+
+
+if __name__ == "__main__":
+    main()
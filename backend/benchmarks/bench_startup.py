@@ -0,0 +1,89 @@
+"""
+Cold start cost of one worker: import time, and time from process start to its
+first answered request.
+
+Each run starts a fresh uvicorn worker on a throwaway SQLite database, with the
+LLM served by the local fake OpenAI server, and records when ``/health`` first
+answers and when the first chat answer comes back. Run from the backend directory:
+
+    poetry run python -m benchmarks.bench_startup [runs]
+"""
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+import httpx
+
+from benchmarks.loadtest.run import stop_servers, wait_until_ready
+
+APP_PORT = 8210
+LLM_PORT = 8110
+
+IMPORT_PROBE = "import time; start = time.perf_counter(); import app.main; print(time.perf_counter() - start)"
+
+
+def measure_import(env: dict) -> float:
+    output = subprocess.run([sys.executable, "-c", IMPORT_PROBE], env=env, capture_output=True, text=True, check=True).stdout
+    return float(output.strip())
+
+
+def measure_first_requests(env: dict) -> tuple:
+    """Seconds from spawning the worker to its first /health answer and to its first chat answer"""
+    start = time.perf_counter()
+    worker = subprocess.Popen(
+        [sys.executable, "-m", "uvicorn", "app.main:app", "--port", str(APP_PORT), "--log-level", "warning"],
+        env=env,
+        stdout=subprocess.DEVNULL,
+    )
+    try:
+        wait_until_ready(f"http://127.0.0.1:{APP_PORT}/health", worker, timeout=120)
+        ready = time.perf_counter() - start
+        response = httpx.post(
+            f"http://127.0.0.1:{APP_PORT}/api/chat/",
+            json={"content": "I'm an ICU nurse, what is the hand hygiene protocol?"},
+            timeout=120,
+        )
+        response.raise_for_status()
+        first_chat = time.perf_counter() - start
+    finally:
+        stop_servers([worker])
+    return ready, first_chat
+
+
+def main():
+    runs = int(sys.argv[1]) if len(sys.argv) > 1 else 5
+
+    fake_llm = subprocess.Popen([
+        sys.executable, "-m", "benchmarks.loadtest.fake_openai", "--port", str(LLM_PORT), "--latency-ms", "0", "--tokens-per-second", "0",
+    ])
+    try:
+        wait_until_ready(f"http://127.0.0.1:{LLM_PORT}/health", fake_llm)
+        with tempfile.TemporaryDirectory(prefix="yapper-startup-") as workdir:
+            env = {
+                **os.environ,
+                "OPENAI_API_KEY": "sk-startup",
+                "OPENAI_BASE_URL": f"http://127.0.0.1:{LLM_PORT}/v1",
+                "DATABASE_URL": f"sqlite+aiosqlite:///{workdir}/startup.db",
+            }
+            # Created once up front, as a deploy does; workers do not sync the schema at boot
+            subprocess.run([sys.executable, "-m", "app.database.schema"], env=env, check=True, stdout=subprocess.DEVNULL)
+            imports = [measure_import(env) for _ in range(runs)]
+            print(f"{runs} runs, median (min-max)")
+            print(f"{'import app.main':34} {statistics.median(imports) * 1000:8.0f}ms ({min(imports) * 1000:.0f}-{max(imports) * 1000:.0f})")
+
+            for name, preload in (("chat service preloaded", "true"), ("chat service built on first chat", "false")):
+                samples = [measure_first_requests({**env, "CHAT_SERVICE_PRELOAD": preload}) for _ in range(runs)]
+                ready = [sample[0] for sample in samples]
+                first_chat = [sample[1] for sample in samples]
+                print(f"{name}:")
+                print(f"  {'first /health answered':32} {statistics.median(ready) * 1000:8.0f}ms ({min(ready) * 1000:.0f}-{max(ready) * 1000:.0f})")
+                print(f"  {'first chat answered':32} {statistics.median(first_chat) * 1000:8.0f}ms ({min(first_chat) * 1000:.0f}-{max(first_chat) * 1000:.0f})")
+    finally:
+        stop_servers([fake_llm])
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,56 @@
+"""
+Per-turn cost of user info extraction as conversations grow.
+
+Run from the backend directory:
+
+    poetry run python -m benchmarks.bench_user_info
+"""
+import asyncio
+import contextlib
+import io
+import os
+import time
+
+os.environ.setdefault("OPENAI_API_KEY", "sk-bench")
+
+from app.services.chat_service import NursingChatService
+from app.services.user_info import UserInfo
+
+TURN_COUNTS = [5, 50, 500]
+SAMPLES = 200
+
+
+async def measure(service: NursingChatService, turns: int) -> float:
+    """Return the mean microseconds spent extracting user info on the last turn of a conversation"""
+    conversation_id = f"bench-{turns}"
+    service.conversation_user_info.set(conversation_id, UserInfo(unit="RR 4ICU", role="NURSE"))
+    history = []
+    for i in range(turns - 1):
+        history.append({"role": "user", "content": f"Question {i}: what is the isolation policy for room {i}?"})
+        history.append({"role": "assistant", "content": "Contact precautions apply."})
+    message = "How often should IV line dressings be changed?"
+    history.append({"role": "user", "content": message})
+    state = service._initial_state(message, history, conversation_id)
+
+    start = time.perf_counter()
+    for _ in range(SAMPLES):
+        await service._extract_user_info_node(state)
+    return (time.perf_counter() - start) / SAMPLES * 1_000_000
+
+
+async def main():
+    service = NursingChatService()
+    results = {}
+    # extract_user_info prints debug lines; keep them out of the report
+    with contextlib.redirect_stdout(io.StringIO()):
+        for turns in TURN_COUNTS:
+            results[turns] = await measure(service, turns)
+
+    print(f"{'turns':>6} {'us/turn':>10}")
+    for turns, micros in results.items():
+        print(f"{turns:>6} {micros:>10.1f}")
+    print(f"ratio {TURN_COUNTS[-1]}/{TURN_COUNTS[0]} turns: {results[TURN_COUNTS[-1]] / results[TURN_COUNTS[0]]:.2f}x")
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1 @@
+# Load-test suite: fake OpenAI server, driver and stored baseline
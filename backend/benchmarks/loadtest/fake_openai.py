@@ -0,0 +1,89 @@
+"""
+Local stand-in for the OpenAI chat completions API, for load tests.
+
+Answers every request with a fixed-length reply after ``--latency-ms`` and then
+emits tokens at ``--tokens-per-second``, streamed or not, in the wire format the
+``openai`` client expects. Point the backend at it with
+``OPENAI_BASE_URL=http://127.0.0.1:<port>/v1``.
+
+    poetry run python -m benchmarks.loadtest.fake_openai --port 8100 --latency-ms 300 --tokens-per-second 50
+"""
+import argparse
+import asyncio
+import json
+import time
+import uuid
+
+import uvicorn
+from fastapi import FastAPI, Request
+from fastapi.responses import JSONResponse, StreamingResponse
+
+WORDS = (
+    "Perform hand hygiene before and after every patient contact, confirm the patient's identity with two identifiers, "
+    "follow the unit checklist and document the procedure in the chart"
+).split()
+
+
+def create_app(latency_ms: float = 300, tokens_per_second: float = 50, reply_tokens: int = 120) -> FastAPI:
+    app = FastAPI(title="Fake OpenAI")
+    app.state.requests = 0
+
+    def reply_words():
+        return [WORDS[i % len(WORDS)] + " " for i in range(reply_tokens)]
+
+    @app.post("/v1/chat/completions")
+    async def chat_completions(request: Request):
+        body = await request.json()
+        app.state.requests += 1
+        completion_id = f"chatcmpl-{uuid.uuid4().hex[:12]}"
+        created = int(time.time())
+        model = body.get("model", "gpt-4o-mini")
+        prompt_tokens = sum(len(str(message.get("content", ""))) // 4 for message in body.get("messages", []))
+        usage = {"prompt_tokens": prompt_tokens, "completion_tokens": reply_tokens, "total_tokens": prompt_tokens + reply_tokens}
+        token_interval = 1 / tokens_per_second if tokens_per_second > 0 else 0
+
+        await asyncio.sleep(latency_ms / 1000)
+
+        if not body.get("stream"):
+            await asyncio.sleep(token_interval * reply_tokens)
+            return JSONResponse({
+                "id": completion_id, "object": "chat.completion", "created": created, "model": model,
+                "choices": [{"index": 0, "message": {"role": "assistant", "content": "".join(reply_words())}, "finish_reason": "stop"}],
+                "usage": usage,
+            })
+
+        def chunk(delta, finish_reason=None):
+            payload = {
+                "id": completion_id, "object": "chat.completion.chunk", "created": created, "model": model,
+                "choices": [{"index": 0, "delta": delta, "finish_reason": finish_reason}],
+            }
+            return f"data: {json.dumps(payload)}\n\n"
+
+        async def stream():
+            yield chunk({"role": "assistant", "content": ""})
+            for word in reply_words():
+                yield chunk({"content": word})
+                await asyncio.sleep(token_interval)
+            yield chunk({}, "stop")
+            if body.get("stream_options", {}).get("include_usage"):
+                yield f"data: {json.dumps({'id': completion_id, 'object': 'chat.completion.chunk', 'created': created, 'model': model, 'choices': [], 'usage': usage})}\n\n"
+            yield "data: [DONE]\n\n"
+
+        return StreamingResponse(stream(), media_type="text/event-stream")
+
+    @app.get("/health")
+    async def health():
+        return {"status": "ok", "requests": app.state.requests}
+
+    return app
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Fake OpenAI chat completions server")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8100)
+    parser.add_argument("--latency-ms", type=float, default=300, help="Delay before the first token")
+    parser.add_argument("--tokens-per-second", type=float, default=50)
+    parser.add_argument("--reply-tokens", type=int, default=120)
+    args = parser.parse_args()
+    uvicorn.run(create_app(args.latency_ms, args.tokens_per_second, args.reply_tokens), host=args.host, port=args.port, log_level="warning")
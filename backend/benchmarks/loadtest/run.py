@@ -0,0 +1,321 @@
+"""
+End-to-end load test of the chat endpoints against a local fake OpenAI server.
+
+Starts the fake OpenAI server and the app (uvicorn, throwaway SQLite database),
+drives concurrent multi-turn conversations through ``/api/chat/stream`` or
+``/api/chat/``, and reports latency and time-to-first-token percentiles,
+throughput and database write latency. A few warm-up conversations run first
+and are left out of the figures, so cold-start work (building the chat service,
+first connections) is not measured. Results are compared with the stored
+baseline for the same scenario; a regression beyond ``--tolerance`` exits with
+status 1, so this can gate a deploy. Baselines record the machine they were
+taken on; compare only against one from comparable hardware. Run from the
+backend directory:
+
+    poetry run python -m benchmarks.loadtest.run [--conversations 50] [--turns 3] [--endpoint stream]
+    poetry run python -m benchmarks.loadtest.run --save-baseline   # after an intended change
+"""
+import argparse
+import asyncio
+import json
+import os
+import platform
+import subprocess
+import sys
+import tempfile
+import time
+from dataclasses import dataclass, field
+from typing import Dict, List, Optional
+
+import httpx
+
+BASELINE_PATH = os.path.join(os.path.dirname(__file__), "baseline.json")
+
+# Metrics compared against the baseline, and whether a higher value is better
+COMPARED_METRICS = {
+    "latency_ms_p50": False,
+    "latency_ms_p95": False,
+    "latency_ms_p99": False,
+    "ttft_ms_p50": False,
+    "ttft_ms_p95": False,
+    "ttft_ms_p99": False,
+    "db_write_ms_p95": False,
+    "requests_per_second": True,
+    "tokens_per_second": True,
+}
+
+QUESTIONS = [
+    "What is the hand hygiene protocol for bed {bed}?",
+    "How often should the IV dressing be changed for the patient in bed {bed}?",
+    "What isolation precautions apply to C. diff in bed {bed}?",
+    "What is the double verification process for heparin in bed {bed}?",
+]
+
+
+@dataclass
+class RequestResult:
+    latency_ms: float
+    ttft_ms: float
+    tokens: int
+    ok: bool
+
+
+@dataclass
+class LoadTestReport:
+    scenario: str
+    results: List[RequestResult] = field(default_factory=list)
+    elapsed: float = 0.0
+    db_stats: Dict[str, float] = field(default_factory=dict)
+
+    def metrics(self) -> Dict[str, float]:
+        ok = [result for result in self.results if result.ok]
+        latencies = sorted(result.latency_ms for result in ok)
+        ttfts = sorted(result.ttft_ms for result in ok)
+        return {
+            "requests": len(self.results),
+            "errors": len(self.results) - len(ok),
+            "latency_ms_p50": percentile(latencies, 0.50),
+            "latency_ms_p95": percentile(latencies, 0.95),
+            "latency_ms_p99": percentile(latencies, 0.99),
+            "ttft_ms_p50": percentile(ttfts, 0.50),
+            "ttft_ms_p95": percentile(ttfts, 0.95),
+            "ttft_ms_p99": percentile(ttfts, 0.99),
+            "requests_per_second": len(ok) / self.elapsed if self.elapsed else 0.0,
+            "tokens_per_second": sum(result.tokens for result in ok) / self.elapsed if self.elapsed else 0.0,
+            "db_write_ms_p50": self.db_stats.get("batch_ms_p50", 0.0),
+            "db_write_ms_p95": self.db_stats.get("batch_ms_p95", 0.0),
+            "db_write_batches": self.db_stats.get("batches", 0),
+        }
+
+
+def percentile(ordered: List[float], fraction: float) -> float:
+    if not ordered:
+        return float("nan")
+    return ordered[min(int(len(ordered) * fraction), len(ordered) - 1)]
+
+
+async def stream_turn(client: httpx.AsyncClient, content: str, conversation_id: Optional[str]):
+    payload = {"content": content, **({"conversation_id": conversation_id} if conversation_id else {})}
+    start = time.perf_counter()
+    ttft = None
+    tokens = 0
+    async with client.stream("POST", "/api/chat/stream", json=payload) as response:
+        if response.status_code != 200:
+            return RequestResult((time.perf_counter() - start) * 1000, 0.0, 0, False), conversation_id
+        async for line in response.aiter_lines():
+            if not line.startswith("data: "):
+                continue
+            data = json.loads(line[len("data: "):])
+            if data.get("content"):
+                if ttft is None:
+                    ttft = (time.perf_counter() - start) * 1000
+                tokens += len(data["content"].split())
+                conversation_id = data.get("conversation_id", conversation_id)
+    latency = (time.perf_counter() - start) * 1000
+    return RequestResult(latency, ttft if ttft is not None else latency, tokens, ttft is not None), conversation_id
+
+
+async def chat_turn(client: httpx.AsyncClient, content: str, conversation_id: Optional[str]):
+    payload = {"content": content, **({"conversation_id": conversation_id} if conversation_id else {})}
+    start = time.perf_counter()
+    response = await client.post("/api/chat/", json=payload)
+    latency = (time.perf_counter() - start) * 1000
+    if response.status_code != 200:
+        return RequestResult(latency, latency, 0, False), conversation_id
+    body = response.json()
+    # Without streaming the first token arrives with the whole answer
+    return RequestResult(latency, latency, len(body["response"].split()), True), body["conversation_id"]
+
+
+async def drive(app_url: str, endpoint: str, conversations: int, turns: int, scenario: str, warmup: int = 0) -> LoadTestReport:
+    turn = stream_turn if endpoint == "stream" else chat_turn
+    report = LoadTestReport(scenario=scenario)
+    limits = httpx.Limits(max_connections=conversations, max_keepalive_connections=conversations)
+
+    async with httpx.AsyncClient(base_url=app_url, timeout=120, limits=limits) as client:
+
+        async def conversation(label: str, index: int, results: List[RequestResult]):
+            conversation_id = None
+            # The first turn gives unit and role, so every later turn goes through retrieval and generation
+            messages = [f"I'm an ICU nurse. {QUESTIONS[0].format(bed=label)}"]
+            messages += [QUESTIONS[(index + i) % len(QUESTIONS)].format(bed=f"{label}-{i}") for i in range(1, turns)]
+            for content in messages:
+                try:
+                    result, conversation_id = await turn(client, content, conversation_id)
+                except httpx.HTTPError:
+                    result = RequestResult(0.0, 0.0, 0, False)
+                results.append(result)
+
+        # Warm-up conversations ask about their own beds, so they leave nothing in the answer cache for the run
+        warmup_results: List[RequestResult] = []
+        await asyncio.gather(*(conversation(f"warmup-{i}", i, warmup_results) for i in range(warmup)))
+        if not all(result.ok for result in warmup_results):
+            raise RuntimeError(f"{sum(not result.ok for result in warmup_results)} warm-up requests failed")
+        # The server's commit latencies are a rolling window, so only its batch count can leave out the warm-up
+        batches_before = (await client.get("/api/chat/stats")).json().get("write_behind", {}).get("batches", 0)
+
+        start = time.perf_counter()
+        await asyncio.gather(*(conversation(str(i), i, report.results) for i in range(conversations)))
+        report.elapsed = time.perf_counter() - start
+        report.db_stats = (await client.get("/api/chat/stats")).json().get("write_behind", {})
+        report.db_stats["batches"] = report.db_stats.get("batches", 0) - batches_before
+    return report
+
+
+def cpu_model() -> str:
+    try:
+        with open("/proc/cpuinfo") as f:
+            for line in f:
+                if line.startswith("model name"):
+                    return line.split(":", 1)[1].strip()
+    except OSError:
+        pass
+    return platform.processor() or platform.machine()
+
+
+def machine_description() -> Dict[str, object]:
+    """Where a baseline was recorded; latency figures only compare on similar hardware"""
+    return {
+        "cpus": os.cpu_count(),
+        "machine": platform.machine(),
+        "processor": cpu_model(),
+        "system": f"{platform.system()} {platform.release()}",
+        "python": platform.python_version(),
+    }
+
+
+def compare(metrics: Dict[str, float], baseline: Dict[str, float], tolerance: float) -> List[str]:
+    """Return a description of every metric that regressed beyond the tolerance"""
+    regressions = []
+    for name, higher_is_better in COMPARED_METRICS.items():
+        current, reference = metrics.get(name), baseline.get(name)
+        if current is None or not reference:
+            continue
+        change = (current - reference) / reference
+        if (higher_is_better and change < -tolerance) or (not higher_is_better and change > tolerance):
+            regressions.append(f"{name}: {current:.2f} vs baseline {reference:.2f} ({change:+.0%})")
+    return regressions
+
+
+def wait_until_ready(url: str, process: subprocess.Popen, timeout: float = 60) -> None:
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        if process.poll() is not None:
+            raise RuntimeError(f"Process for {url} exited with status {process.returncode}")
+        try:
+            if httpx.get(url, timeout=1).status_code == 200:
+                return
+        except httpx.HTTPError:
+            pass
+        time.sleep(0.2)
+    raise RuntimeError(f"{url} did not become ready within {timeout}s")
+
+
+def start_servers(args, workdir: str) -> List[subprocess.Popen]:
+    fake_llm = subprocess.Popen([
+        sys.executable, "-m", "benchmarks.loadtest.fake_openai", "--port", str(args.llm_port),
+        "--latency-ms", str(args.latency_ms), "--tokens-per-second", str(args.tokens_per_second), "--reply-tokens", str(args.reply_tokens),
+    ])
+    env = {
+        **os.environ,
+        "OPENAI_API_KEY": "sk-loadtest",
+        "OPENAI_BASE_URL": f"http://127.0.0.1:{args.llm_port}/v1",
+        "DATABASE_URL": f"sqlite+aiosqlite:///{workdir}/loadtest.db",
+        # Created once up front; several workers creating tables at boot would race each other
+        "DB_SYNC_SCHEMA_ON_STARTUP": "false",
+    }
+    subprocess.run([sys.executable, "-m", "app.database.schema"], env=env, check=True, stdout=subprocess.DEVNULL)
+    app = subprocess.Popen(
+        [sys.executable, "-m", "uvicorn", "app.main:app", "--port", str(args.app_port), "--workers", str(args.workers), "--log-level", "warning"],
+        env=env,
+        stdout=subprocess.DEVNULL,
+    )
+    processes = [fake_llm, app]
+    try:
+        wait_until_ready(f"http://127.0.0.1:{args.llm_port}/health", fake_llm)
+        wait_until_ready(f"http://127.0.0.1:{args.app_port}/health", app)
+    except RuntimeError:
+        stop_servers(processes)
+        raise
+    return processes
+
+
+def stop_servers(processes: List[subprocess.Popen]) -> None:
+    for process in processes:
+        process.terminate()
+    for process in processes:
+        try:
+            process.wait(timeout=10)
+        except subprocess.TimeoutExpired:
+            process.kill()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Load test the chat endpoints")
+    parser.add_argument("--endpoint", choices=["stream", "chat"], default="stream")
+    parser.add_argument("--conversations", type=int, default=50, help="Concurrent conversations")
+    parser.add_argument("--turns", type=int, default=3, help="Messages per conversation")
+    parser.add_argument("--latency-ms", type=float, default=300, help="Fake LLM time to first token")
+    parser.add_argument("--tokens-per-second", type=float, default=50, help="Fake LLM token rate per stream")
+    parser.add_argument("--reply-tokens", type=int, default=120)
+    parser.add_argument("--workers", type=int, default=1)
+    parser.add_argument("--warmup", type=int, default=5, help="Warm-up conversations run first and left out of the figures")
+    parser.add_argument("--app-port", type=int, default=8200)
+    parser.add_argument("--llm-port", type=int, default=8100)
+    parser.add_argument("--app-url", help="Target an already running app (with its own LLM) instead of starting one")
+    parser.add_argument("--baseline", default=BASELINE_PATH)
+    parser.add_argument("--save-baseline", action="store_true", help="Store this run as the baseline for its scenario")
+    parser.add_argument("--tolerance", type=float, default=0.25, help="Allowed relative regression before failing")
+    args = parser.parse_args()
+
+    scenario = (
+        f"{args.endpoint}/c{args.conversations}/t{args.turns}/w{args.workers}"
+        f"/llm{args.latency_ms:g}ms-{args.tokens_per_second:g}tps-{args.reply_tokens}tok"
+    )
+    with tempfile.TemporaryDirectory(prefix="yapper-loadtest-") as workdir:
+        processes = [] if args.app_url else start_servers(args, workdir)
+        try:
+            app_url = args.app_url or f"http://127.0.0.1:{args.app_port}"
+            report = asyncio.run(drive(app_url, args.endpoint, args.conversations, args.turns, scenario, warmup=args.warmup))
+        finally:
+            stop_servers(processes)
+
+    metrics = report.metrics()
+    print(f"scenario: {scenario}")
+    for name, value in metrics.items():
+        print(f"  {name:<22} {value:>10.2f}")
+
+    baselines = {}
+    if os.path.exists(args.baseline):
+        with open(args.baseline) as f:
+            baselines = json.load(f)
+
+    if args.save_baseline:
+        baselines[scenario] = {name: round(metrics[name], 3) for name in COMPARED_METRICS}
+        baselines[scenario]["recorded_with"] = {**machine_description(), "warmup_conversations": args.warmup}
+        with open(args.baseline, "w") as f:
+            json.dump(baselines, f, indent=2, sort_keys=True)
+            f.write("\n")
+        print(f"Saved baseline for {scenario} to {args.baseline}")
+        return
+
+    if metrics["errors"]:
+        print(f"FAILED: {metrics['errors']} requests failed")
+        sys.exit(1)
+    if scenario not in baselines:
+        print("No baseline for this scenario; run with --save-baseline to record one")
+        return
+    recorded_with = baselines[scenario].get("recorded_with", {})
+    if any(recorded_with.get(name) != machine_description()[name] for name in ("cpus", "processor")):
+        print(f"WARNING: the baseline was recorded on other hardware ({recorded_with or 'unknown'}); differences may not be regressions")
+    regressions = compare(metrics, baselines[scenario], args.tolerance)
+    if regressions:
+        print("REGRESSIONS against baseline:")
+        for regression in regressions:
+            print(f"  {regression}")
+        sys.exit(1)
+    print(f"No regressions beyond {args.tolerance:.0%} against baseline")
+
+
+if __name__ == "__main__":
+    main()
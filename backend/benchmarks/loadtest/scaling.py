@@ -0,0 +1,93 @@
+"""
+Throughput scaling from 1 to N uvicorn workers sharing session state in the database.
+
+For each worker count, starts the app with ``SESSION_BACKEND=database`` (or
+``--session-backend memory`` for comparison) against
+the local fake OpenAI server and drives the same multi-turn load as ``run``.
+Reports requests per second and scaling efficiency (throughput over N times the
+single-worker throughput), and checks consistency: every conversation gives its
+unit and role in the first turn, so any later turn answered with a clarification
+means a worker did not see state written by another. Exits with status 1 when
+efficiency at the highest worker count falls below ``--min-efficiency`` or any
+turn was inconsistent. Needs at least N free cores to be meaningful. Run from the
+backend directory:
+
+    poetry run python -m benchmarks.loadtest.scaling --max-workers 4
+"""
+import argparse
+import asyncio
+import os
+import sqlite3
+import sys
+import tempfile
+
+from app.services.chat_service import CLARIFICATION_TEMPLATES
+from benchmarks.loadtest.run import drive, start_servers, stop_servers
+
+CLARIFICATION_PREFIXES = tuple(template.split("{", 1)[0] for template in CLARIFICATION_TEMPLATES.values())
+
+
+def count_clarifications(database_path: str) -> int:
+    with sqlite3.connect(database_path) as conn:
+        answers = conn.execute("SELECT content FROM messages WHERE role = 'assistant'").fetchall()
+    return sum(content.startswith(CLARIFICATION_PREFIXES) for (content,) in answers)
+
+
+def run_with_workers(args, workers: int):
+    with tempfile.TemporaryDirectory(prefix="yapper-scaling-") as workdir:
+        server_args = argparse.Namespace(**{**vars(args), "workers": workers})
+        processes = start_servers(server_args, workdir)
+        try:
+            report = asyncio.run(
+                drive(
+                    f"http://127.0.0.1:{args.app_port}", args.endpoint, args.conversations * workers, args.turns, f"w{workers}",
+                    warmup=args.warmup * workers,
+                )
+            )
+        finally:
+            stop_servers(processes)
+        return report.metrics(), count_clarifications(os.path.join(workdir, "loadtest.db"))
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Measure throughput scaling across uvicorn workers")
+    parser.add_argument("--max-workers", type=int, default=os.cpu_count() or 1)
+    parser.add_argument("--endpoint", choices=["stream", "chat"], default="chat")
+    parser.add_argument("--conversations", type=int, default=20, help="Concurrent conversations per worker")
+    parser.add_argument("--turns", type=int, default=3)
+    parser.add_argument("--warmup", type=int, default=5, help="Warm-up conversations per worker, left out of the figures")
+    parser.add_argument("--latency-ms", type=float, default=50, help="Fake LLM time to first token")
+    parser.add_argument("--tokens-per-second", type=float, default=0, help="Fake LLM token rate per stream (0: no delay)")
+    parser.add_argument("--reply-tokens", type=int, default=120)
+    parser.add_argument("--app-port", type=int, default=8220)
+    parser.add_argument("--llm-port", type=int, default=8120)
+    parser.add_argument("--min-efficiency", type=float, default=0.7)
+    parser.add_argument("--session-backend", choices=["database", "memory"], default="database", help="memory shows what breaks without sharing")
+    args = parser.parse_args()
+
+    os.environ["SESSION_BACKEND"] = args.session_backend
+
+    single_worker_rps = None
+    efficiency = 1.0
+    inconsistent = 0
+    for workers in range(1, args.max_workers + 1):
+        metrics, clarifications = run_with_workers(args, workers)
+        rps = metrics["requests_per_second"]
+        single_worker_rps = single_worker_rps or rps
+        efficiency = rps / (workers * single_worker_rps) if single_worker_rps else 0.0
+        inconsistent += clarifications
+        print(
+            f"workers: {workers}  requests/s: {rps:8.2f}  efficiency: {efficiency:6.1%}  "
+            f"p95 latency: {metrics['latency_ms_p95']:8.1f}ms  errors: {metrics['errors']}  inconsistent turns: {clarifications}"
+        )
+
+    if inconsistent:
+        print(f"FAILED: {inconsistent} turns did not see state written by another worker")
+        sys.exit(1)
+    if efficiency < args.min_efficiency:
+        print(f"FAILED: scaling efficiency {efficiency:.0%} at {args.max_workers} workers is below {args.min_efficiency:.0%}")
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
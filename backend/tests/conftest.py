@@ -1,12 +1,106 @@
+import os
+import tempfile
+
+# Point the app at a throwaway database and a dummy key before settings are loaded
+_test_dir = tempfile.mkdtemp(prefix="yapper-tests-")
+os.environ.setdefault("DATABASE_URL", f"sqlite+aiosqlite:///{_test_dir}/test.db")
+os.environ.setdefault("OPENAI_API_KEY", "sk-test")
+
+import asyncio
+import time
+from typing import Any, AsyncIterator, Iterator, List, Optional
+
 import pytest
 from fastapi.testclient import TestClient
+from langchain_core.language_models import BaseChatModel
+from langchain_core.messages import AIMessage, AIMessageChunk, BaseMessage
+from langchain_core.outputs import ChatGeneration, ChatGenerationChunk, ChatResult
 
+from app.database.connection import engine
+from app.database.schema import sync_schema
 from app.main import app
 
 
+class FakeChatModel(BaseChatModel):
+    """
+    Deterministic chat model that records every call and streams its reply word by word
+    """
+
+    response: str = "Follow the unit hand hygiene protocol."
+    delay: float = 0.0
+    token_delay: float = 0.0
+    calls: List[str] = []
+    streamed: List[str] = []
+
+    @property
+    def _llm_type(self) -> str:
+        return "fake-chat"
+
+    def _record(self, messages: List[BaseMessage]) -> None:
+        self.calls.append(messages[-1].content)
+
+    def _words(self) -> List[str]:
+        words = self.response.split(" ")
+        return [word if i == len(words) - 1 else word + " " for i, word in enumerate(words)]
+
+    def _generate(self, messages: List[BaseMessage], stop: Optional[List[str]] = None, run_manager: Any = None, **kwargs: Any) -> ChatResult:
+        self._record(messages)
+        time.sleep(self.delay)
+        return ChatResult(generations=[ChatGeneration(message=AIMessage(content=self.response))])
+
+    async def _agenerate(self, messages: List[BaseMessage], stop: Optional[List[str]] = None, run_manager: Any = None, **kwargs: Any) -> ChatResult:
+        self._record(messages)
+        await asyncio.sleep(self.delay)
+        return ChatResult(generations=[ChatGeneration(message=AIMessage(content=self.response))])
+
+    def _stream(self, messages: List[BaseMessage], stop: Optional[List[str]] = None, run_manager: Any = None, **kwargs: Any) -> Iterator[ChatGenerationChunk]:
+        self._record(messages)
+        for word in self._words():
+            chunk = ChatGenerationChunk(message=AIMessageChunk(content=word))
+            if run_manager:
+                run_manager.on_llm_new_token(word, chunk=chunk)
+            yield chunk
+
+    async def _astream(
+        self, messages: List[BaseMessage], stop: Optional[List[str]] = None, run_manager: Any = None, **kwargs: Any
+    ) -> AsyncIterator[ChatGenerationChunk]:
+        self._record(messages)
+        await asyncio.sleep(self.delay)
+        for word in self._words():
+            await asyncio.sleep(self.token_delay)
+            self.streamed.append(word)
+            chunk = ChatGenerationChunk(message=AIMessageChunk(content=word))
+            if run_manager:
+                await run_manager.on_llm_new_token(word, chunk=chunk)
+            yield chunk
+
+
 @pytest.fixture
-def client():
+def client(database):
     """
-    Test client for the FastAPI application
+    Test client for the FastAPI application, with startup and shutdown run on a synced schema
     """
-    return TestClient(app)
+    with TestClient(app) as test_client:
+        yield test_client
+
+
+@pytest.fixture
+def fake_llm():
+    """
+    Fake LLM with a fresh call log
+    """
+    return FakeChatModel(calls=[])
+
+
+@pytest.fixture
+def database():
+    """
+    Create the schema in the test database
+    """
+
+    async def create():
+        async with engine.begin() as conn:
+            await conn.run_sync(sync_schema)
+        await engine.dispose()
+
+    asyncio.run(create())
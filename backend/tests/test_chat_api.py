@@ -0,0 +1,332 @@
+import asyncio
+import json
+import subprocess
+import sys
+import time
+from datetime import datetime, timedelta
+
+import httpx
+from sqlalchemy import delete, func, select, update
+
+from app.api.endpoints import chat
+from app.database.connection import async_session, engine
+from app.database.models import Conversation, Message
+from app.database.write_behind import WriteBehindQueue, message_writer
+from app.main import app
+
+
+def test_concurrent_chat_requests_do_not_block_each_other(database, fake_llm, monkeypatch):
+    """
+    Test that N simultaneous /api/chat requests finish in roughly the time of one
+    """
+    fake_llm.delay = 0.3
+    monkeypatch.setattr(chat.chat_service, "llm", fake_llm)
+    concurrency = 10
+
+    async def run():
+        transport = httpx.ASGITransport(app=app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://test") as client:
+            start = time.perf_counter()
+            requests = [
+                client.post("/api/chat/", json={"content": f"I'm an ICU nurse, what is the hand hygiene protocol for bed {i}?"})
+                for i in range(concurrency)
+            ]
+            responses = await asyncio.gather(*requests)
+            return responses, time.perf_counter() - start
+
+    responses, elapsed = asyncio.run(run())
+
+    assert all(response.status_code == 200 for response in responses)
+    assert len(fake_llm.calls) == concurrency
+    # Serialized calls would take concurrency * delay; concurrent ones about one delay
+    assert elapsed < fake_llm.delay * 3
+
+
+def test_chat_stats_reports_cache_and_llm_savings(client):
+    """
+    Test that the stats endpoint reports answer cache and LLM call counters
+    """
+    response = client.get("/api/chat/stats")
+
+    assert response.status_code == 200
+    assert "hit_rate" in response.json()["answer_cache"]
+    assert "saved_by_clarification_templates" in response.json()["llm"]
+
+
+def _seed_history(conversation_count, message_count):
+    async def seed():
+        async with async_session() as session:
+            start = datetime(2024, 1, 1)
+            for i in range(conversation_count):
+                session.add(Conversation(id=f"page-conv-{i}", user_id="pager", created_at=start, updated_at=start + timedelta(minutes=i % 3)))
+            for i in range(message_count):
+                session.add(Message(conversation_id="page-conv-0", role="user", content=f"message {i}", created_at=start + timedelta(seconds=i // 2)))
+            await session.commit()
+        await engine.dispose()
+
+    asyncio.run(seed())
+
+
+def test_conversations_and_messages_are_keyset_paginated(database, client):
+    """
+    Test that following next_cursor walks every row exactly once, in order
+    """
+    _seed_history(conversation_count=7, message_count=9)
+
+    conversation_ids, cursor = [], None
+    while True:
+        page = client.get("/api/chat/conversations", params={"user_id": "pager", "limit": 3, **({"cursor": cursor} if cursor else {})}).json()
+        conversation_ids += [conversation["id"] for conversation in page["items"]]
+        cursor = page["next_cursor"]
+        if cursor is None:
+            break
+
+    message_contents, cursor = [], None
+    while True:
+        url = "/api/chat/conversations/page-conv-0/messages"
+        page = client.get(url, params={"limit": 4, **({"cursor": cursor} if cursor else {})}).json()
+        message_contents += [message["content"] for message in page["items"]]
+        cursor = page["next_cursor"]
+        if cursor is None:
+            break
+
+    assert conversation_ids == ["page-conv-5", "page-conv-2", "page-conv-4", "page-conv-1", "page-conv-6", "page-conv-3", "page-conv-0"]
+    assert message_contents == [f"message {i}" for i in range(9)]
+
+
+def test_conversation_cursor_survives_activity_and_deletion_between_pages(database, client):
+    """
+    Test that the conversation cursor holds its position when the row it came from moves or
+    disappears, and that malformed cursors are rejected
+    """
+    start = datetime(2024, 6, 1)
+
+    async def write(statement):
+        async with async_session() as session:
+            await session.execute(statement)
+            await session.commit()
+        await engine.dispose()
+
+    async def seed():
+        async with async_session() as session:
+            for i in range(6):
+                session.add(Conversation(id=f"moving-{i}", user_id="mover", updated_at=start + timedelta(minutes=i)))
+            await session.commit()
+        await engine.dispose()
+
+    asyncio.run(seed())
+
+    def page(cursor):
+        return client.get("/api/chat/conversations", params={"user_id": "mover", "limit": 2, "cursor": cursor}).json()
+
+    first = client.get("/api/chat/conversations", params={"user_id": "mover", "limit": 2}).json()
+    assert [item["id"] for item in first["items"]] == ["moving-5", "moving-4"]
+    # The cursor's conversation gets a new message
+    asyncio.run(write(update(Conversation).where(Conversation.id == "moving-4").values(updated_at=start + timedelta(hours=1))))
+    second = page(first["next_cursor"])
+    assert [item["id"] for item in second["items"]] == ["moving-3", "moving-2"]
+    asyncio.run(write(delete(Conversation).where(Conversation.id == "moving-2")))
+    third = page(second["next_cursor"])
+    assert [item["id"] for item in third["items"]] == ["moving-1", "moving-0"]
+
+    for bad in ["moving-3", "bm90IGpzb24", "WzEsIDJd", "WyJub3QgYSBkYXRlIiwgIngiXQ=="]:
+        assert client.get("/api/chat/conversations", params={"user_id": "mover", "cursor": bad}).status_code == 400
+
+
+def test_write_behind_commits_queued_messages_in_batches(database):
+    """
+    Test that many queued inserts are committed in far fewer transactions
+    """
+    writer = WriteBehindQueue(max_batch_size=50, flush_interval=0.05)
+
+    async def run():
+        await writer.enqueue(Conversation(id="batch-conv", user_id="batcher"), "batch-conv")
+        for i in range(120):
+            await writer.enqueue(Message(conversation_id="batch-conv", role="user", content=f"message {i}"), "batch-conv")
+        await writer.flush()
+        async with async_session() as session:
+            count = await session.scalar(select(func.count()).select_from(Message).where(Message.conversation_id == "batch-conv"))
+        await writer.stop()
+        await engine.dispose()
+        return count
+
+    count = asyncio.run(run())
+
+    assert count == 120
+    assert writer.written == 121
+    assert writer.batches <= 4
+    assert not writer.has_pending("batch-conv")
+
+
+def test_chat_messages_are_readable_right_after_the_response(database, client, fake_llm, monkeypatch):
+    """
+    Test read-your-writes: queued messages are visible to the next messages request
+    """
+    monkeypatch.setattr(chat.chat_service, "llm", fake_llm)
+
+    response = client.post("/api/chat/", json={"content": "I'm an ICU nurse, how often should IV dressings be changed?"})
+    conversation_id = response.json()["conversation_id"]
+    messages = client.get(f"/api/chat/conversations/{conversation_id}/messages").json()["items"]
+
+    assert [message["role"] for message in messages] == ["user", "assistant"]
+    assert "queue_depth" in client.get("/api/chat/stats").json()["write_behind"]
+
+
+def test_stream_disconnect_cancels_llm_and_saves_partial_answer(database, fake_llm, monkeypatch):
+    """
+    Test that a client disconnect stops the upstream token stream and records what was sent
+    """
+    fake_llm.response = " ".join(f"word{i}" for i in range(50))
+    fake_llm.token_delay = 0.01
+    monkeypatch.setattr(chat.chat_service, "llm", fake_llm)
+    body = json.dumps({"content": "I'm an ICU nurse, what are the isolation precautions for C. diff?"}).encode()
+
+    async def run():
+        received_tokens = asyncio.Event()
+        request_sent = False
+        frames = []
+
+        async def receive():
+            nonlocal request_sent
+            if not request_sent:
+                request_sent = True
+                return {"type": "http.request", "body": body, "more_body": False}
+            await received_tokens.wait()
+            return {"type": "http.disconnect"}
+
+        async def send(event):
+            if event["type"] == "http.response.body" and event.get("body"):
+                frames.append(event["body"])
+                if len(frames) == 3:
+                    received_tokens.set()
+
+        scope = {
+            "type": "http", "asgi": {"version": "3.0", "spec_version": "2.3"}, "http_version": "1.1",
+            "method": "POST", "scheme": "http", "path": "/api/chat/stream", "raw_path": b"/api/chat/stream",
+            "query_string": b"", "root_path": "", "headers": [(b"content-type", b"application/json")],
+            "client": ("test", 1), "server": ("test", 80),
+        }
+        await app(scope, receive, send)
+        # Give the cancelled generation a moment to finish, had it kept running
+        await asyncio.sleep(0.1)
+        conversation_id = json.loads(frames[0].decode()[len("data: "):])["conversation_id"]
+        await message_writer.flush()
+        async with async_session() as session:
+            saved = (await session.execute(select(Message).where(Message.conversation_id == conversation_id, Message.role == "assistant"))).scalars().all()
+        await engine.dispose()
+        return frames, saved
+
+    frames, saved = asyncio.run(run())
+
+    assert len(fake_llm.streamed) < 10
+    assert len(saved) == 1
+    assert saved[0].interrupted
+    assert fake_llm.response.startswith(saved[0].content)
+    assert not any(b'"done"' in frame for frame in frames)
+
+
+async def _stream_over_asgi(content, disconnect_after_frames=None):
+    """POST /api/chat/stream straight to the app, optionally disconnecting after a number of body frames"""
+    body = json.dumps({"content": content}).encode()
+    frames = []
+    disconnected = asyncio.Event()
+    request_sent = False
+
+    async def receive():
+        nonlocal request_sent
+        if not request_sent:
+            request_sent = True
+            return {"type": "http.request", "body": body, "more_body": False}
+        await disconnected.wait()
+        return {"type": "http.disconnect"}
+
+    async def send(event):
+        if event["type"] == "http.response.body" and event.get("body"):
+            frames.append(event["body"])
+            if disconnect_after_frames is not None and len(frames) == disconnect_after_frames:
+                disconnected.set()
+
+    scope = {
+        "type": "http", "asgi": {"version": "3.0", "spec_version": "2.3"}, "http_version": "1.1",
+        "method": "POST", "scheme": "http", "path": "/api/chat/stream", "raw_path": b"/api/chat/stream",
+        "query_string": b"", "root_path": "", "headers": [(b"content-type", b"application/json")],
+        "client": ("test", 1), "server": ("test", 80),
+    }
+    await app(scope, receive, send)
+    return frames
+
+
+def test_stream_disconnect_cancels_llm_without_coalescing(database, fake_llm, monkeypatch):
+    """
+    Test that a disconnect also stops the upstream LLM call when every token gets its own frame
+    """
+    fake_llm.response = " ".join(f"word{i}" for i in range(50))
+    fake_llm.token_delay = 0.01
+    monkeypatch.setattr(chat.chat_service, "llm", fake_llm)
+    monkeypatch.setattr(chat.settings, "SSE_COALESCE_MS", 0)
+
+    async def run():
+        frames = await _stream_over_asgi("I'm an ICU nurse, what are the contact precautions for MRSA?", disconnect_after_frames=3)
+        # Give the cancelled generation a moment to finish, had it kept running
+        await asyncio.sleep(0.1)
+        await engine.dispose()
+        return frames
+
+    frames = asyncio.run(run())
+
+    assert len(fake_llm.streamed) < 10
+    assert not any(b'"done"' in frame for frame in frames)
+
+
+def test_shared_generation_survives_one_client_disconnecting(database, fake_llm, monkeypatch):
+    """
+    Test that when one of two clients sharing a generation disconnects, the other still gets the
+    whole answer from the same single LLM call, and each conversation saves what its client got
+    """
+    fake_llm.response = " ".join(f"word{i}" for i in range(50))
+    fake_llm.token_delay = 0.01
+    monkeypatch.setattr(chat.chat_service, "llm", fake_llm)
+    question = "I'm an ICU nurse, how do I document a restraint release check?"
+
+    def text_of(frames):
+        events = [json.loads(frame.decode()[len("data: "):]) for frame in b"".join(frames).split(b"\n\n") if frame]
+        return "".join(event.get("content", "") for event in events), events[0]["conversation_id"]
+
+    async def run():
+        leaving, staying = await asyncio.gather(
+            _stream_over_asgi(question, disconnect_after_frames=3), _stream_over_asgi(question)
+        )
+        await message_writer.flush()
+        saved = {}
+        async with async_session() as session:
+            for frames in (leaving, staying):
+                conversation_id = text_of(frames)[1]
+                saved[conversation_id] = (await session.execute(
+                    select(Message).where(Message.conversation_id == conversation_id, Message.role == "assistant")
+                )).scalars().one()
+        await engine.dispose()
+        return leaving, staying, saved
+
+    leaving, staying, saved = asyncio.run(run())
+    leaving_id, staying_id = text_of(leaving)[1], text_of(staying)[1]
+
+    assert len(fake_llm.calls) == 1
+    assert text_of(staying)[0] == fake_llm.response
+    assert b'"done"' in staying[-1] and not any(b'"done"' in frame for frame in leaving)
+    assert saved[staying_id].content == fake_llm.response and not saved[staying_id].interrupted
+    assert saved[leaving_id].interrupted and fake_llm.response.startswith(saved[leaving_id].content)
+    assert len(saved[leaving_id].content) < len(fake_llm.response)
+
+
+def test_app_import_defers_the_chat_stack():
+    """
+    Test that importing the app leaves langgraph, langchain and the OpenAI client for later
+    """
+    probe = (
+        "import sys; import app.main; "
+        "print(sorted(name for name in ('langgraph', 'langchain_core', 'langchain_openai', 'openai') if name in sys.modules))"
+    )
+    result = subprocess.run([sys.executable, "-c", probe], capture_output=True, text=True, check=True)
+
+    assert result.stdout.strip() == "[]"
+    assert chat.get_chat_service() is chat.chat_service
@@ -0,0 +1,248 @@
+import asyncio
+
+from app.database.connection import async_session, engine
+from app.database.models import Conversation, Message
+from app.services.answer_cache import AnswerCache, is_follow_up
+from app.services.chat_service import CLARIFICATION_TEMPLATES, NursingChatService
+from app.services.user_info import UserInfo
+
+
+async def _collect(stream):
+    return [chunk async for chunk in stream]
+
+
+def test_chat_stream_makes_single_llm_call_for_clarification(database, fake_llm):
+    """
+    Test that a streamed clarification of a vague question calls the LLM exactly once
+    """
+    service = NursingChatService(llm=fake_llm)
+    service.conversation_user_info.set("conv-vague", UserInfo(unit="RR 4ICU", role="NURSE"))
+
+    chunks = asyncio.run(_collect(service.chat_stream("hello", conversation_id="conv-vague")))
+
+    assert len(chunks) > 1
+    assert "".join(chunks) == fake_llm.response
+    assert len(fake_llm.calls) == 1
+
+
+def test_chat_stream_makes_single_llm_call_for_answer(database, fake_llm):
+    """
+    Test that a streamed answer runs retrieval and calls the LLM exactly once
+    """
+    service = NursingChatService(llm=fake_llm)
+    service.conversation_user_info.set("conv-1", UserInfo(unit="RR 4ICU", role="NURSE"))
+
+    chunks = asyncio.run(_collect(service.chat_stream("What is the hand hygiene protocol?", conversation_id="conv-1")))
+
+    assert "".join(chunks) == fake_llm.response
+    assert len(fake_llm.calls) == 1
+    assert "Hand Hygiene Protocol for ICU" in fake_llm.calls[0]
+
+
+def test_chat_returns_graph_response(database, fake_llm):
+    """
+    Test that the non-streaming path returns the generated response
+    """
+    service = NursingChatService(llm=fake_llm)
+    service.conversation_user_info.set("conv-vague", UserInfo(unit="RR 4ICU", role="NURSE"))
+
+    response = asyncio.run(service.chat("hello", conversation_id="conv-vague"))
+
+    assert response == fake_llm.response
+    assert len(fake_llm.calls) == 1
+
+
+def test_missing_unit_or_role_is_answered_from_template(fake_llm):
+    """
+    Test that asking for a missing unit or role never calls the LLM, streamed or not
+    """
+    service = NursingChatService(llm=fake_llm)
+
+    greeting = asyncio.run(service.chat("hello"))
+    chunks = asyncio.run(_collect(service.chat_stream("I'm a nurse")))
+
+    assert greeting == CLARIFICATION_TEMPLATES["unit_and_role"]
+    assert "".join(chunks) == CLARIFICATION_TEMPLATES["unit"].format(role="Nurse")
+    assert len(chunks) > 1
+    assert fake_llm.calls == []
+
+
+def test_user_info_extraction_only_scans_new_message(database, fake_llm):
+    """
+    Test that extraction merges the new message into stored info without rescanning history
+    """
+    service = NursingChatService(llm=fake_llm)
+    service.conversation_user_info.set("conv-2", UserInfo(role="NURSE"))
+    history = [{"role": "user", "content": "I am a TECH"}, {"role": "user", "content": "ED"}]
+
+    result = asyncio.run(service._extract_user_info_node(service._initial_state("ED", history, "conv-2")))
+
+    assert result["user_info"] == UserInfo(unit="RR ED", role="NURSE")
+
+
+def test_repeated_question_is_served_from_answer_cache(database, fake_llm):
+    """
+    Test that a repeated question for the same unit and role skips the LLM and replays the cached answer
+    """
+    service = NursingChatService(llm=fake_llm)
+    service.conversation_user_info.set("conv-a", UserInfo(unit="RR 4ICU", role="NURSE"))
+    service.conversation_user_info.set("conv-b", UserInfo(unit="RR 4ICU", role="NURSE"))
+
+    first = asyncio.run(service.chat("What is the hand hygiene protocol?", conversation_id="conv-a"))
+    chunks = asyncio.run(_collect(service.chat_stream("what is the hand-hygiene protocol", conversation_id="conv-b")))
+
+    assert first == fake_llm.response
+    assert "".join(chunks) == fake_llm.response
+    assert len(chunks) > 1
+    assert len(fake_llm.calls) == 1
+    assert service.answer_cache.stats()["hits"] == 1
+
+
+def test_self_contained_question_is_answered_once_across_conversations_with_history(database, fake_llm):
+    """
+    Test that a self-contained question is answered without history, so conversations that
+    already have earlier turns share the cached answer, while a follow-up gets its own history
+    """
+    async def run():
+        async with async_session() as session:
+            for conversation_id, mrn in (("conv-history-a", "MRN 1111111"), ("conv-history-b", "MRN 2222222")):
+                session.add(Conversation(id=conversation_id, user_id="anonymous"))
+                session.add(Message(conversation_id=conversation_id, role="user", content=f"My patient is {mrn}, on a heparin drip."))
+                session.add(Message(conversation_id=conversation_id, role="assistant", content="Noted."))
+            await session.commit()
+        service = NursingChatService(llm=fake_llm)
+        for conversation_id in ("conv-history-a", "conv-history-b"):
+            service.conversation_user_info.set(conversation_id, UserInfo(unit="RR 4ICU", role="NURSE"))
+            await service.chat("How often do I check the aPTT on a heparin drip?", conversation_id=conversation_id)
+        await service.chat("How often do I check it?", conversation_id="conv-history-b")
+        await engine.dispose()
+        return service
+
+    service = asyncio.run(run())
+
+    assert len(fake_llm.calls) == 2
+    assert "MRN" not in fake_llm.calls[0]
+    assert "MRN 2222222" in fake_llm.calls[1] and "MRN 1111111" not in fake_llm.calls[1]
+    assert service.answer_cache.stats()["hits"] == 1
+    assert service.answer_cache.stats()["size"] == 1
+
+
+def test_only_self_contained_questions_share_a_cache_key():
+    """
+    Test that trivially different phrasings share a key and that questions leaning on earlier turns are told apart
+    """
+    assert AnswerCache.key("RR 4ICU", "NURSE", "What is the hand hygiene protocol?", "v1") == AnswerCache.key(
+        "RR 4ICU", "NURSE", "what is the hand-hygiene protocol", "v1"
+    )
+    assert not is_follow_up("What is the hand hygiene protocol?")
+    assert not is_follow_up("How often is the PICC dressing changed?")
+    assert is_follow_up("How often is it changed?")
+    assert is_follow_up("And for techs?")
+    assert is_follow_up("What about the same patient overnight?")
+
+
+def test_identical_concurrent_questions_share_one_generation(database, fake_llm):
+    """
+    Test that simultaneous identical questions from the same unit and role make one LLM call
+    """
+    fake_llm.token_delay = 0.01
+    service = NursingChatService(llm=fake_llm)
+    for i in range(5):
+        service.conversation_user_info.set(f"conv-shift-{i}", UserInfo(unit="RR 4ICU", role="NURSE"))
+
+    async def run():
+        return await asyncio.gather(*(
+            _collect(service.chat_stream("What is the hand hygiene protocol at shift change?", conversation_id=f"conv-shift-{i}"))
+            for i in range(5)
+        ))
+
+    results = asyncio.run(run())
+
+    assert len(fake_llm.calls) == 1
+    assert all("".join(chunks) == fake_llm.response and len(chunks) > 1 for chunks in results)
+    assert service.in_flight.stats() == {"in_flight": 0, "started": 1, "joined": 4}
+
+
+def test_identical_questions_from_conversations_with_history_share_one_generation(database, fake_llm):
+    """
+    Test that the same self-contained question, phrased slightly differently, asked at the same time
+    from conversations that already have history makes one LLM call
+    """
+    fake_llm.token_delay = 0.01
+    service = NursingChatService(llm=fake_llm)
+
+    async def run():
+        async with async_session() as session:
+            for conversation_id, bed in (("conv-shared-a", "bed 4"), ("conv-shared-b", "bed 9")):
+                session.add(Conversation(id=conversation_id, user_id="anonymous"))
+                session.add(Message(conversation_id=conversation_id, role="user", content=f"My patient in {bed} has a PICC line."))
+                session.add(Message(conversation_id=conversation_id, role="assistant", content="Noted."))
+                service.conversation_user_info.set(conversation_id, UserInfo(unit="RR 4ICU", role="NURSE"))
+            await session.commit()
+        results = await asyncio.gather(
+            _collect(service.chat_stream("How often is the PICC dressing changed?", conversation_id="conv-shared-a")),
+            _collect(service.chat_stream("how often is the PICC dressing changed", conversation_id="conv-shared-b")),
+        )
+        await engine.dispose()
+        return results
+
+    results = asyncio.run(run())
+
+    assert len(fake_llm.calls) == 1
+    assert "bed" not in fake_llm.calls[0]
+    assert all("".join(chunks) == fake_llm.response for chunks in results)
+    assert service.in_flight.stats() == {"in_flight": 0, "started": 1, "joined": 1}
+
+
+def test_concurrent_questions_with_different_histories_do_not_share_a_generation(database, fake_llm):
+    """
+    Test that a follower whose conversation history differs gets its own generation, not the leader's answer
+    """
+    fake_llm.token_delay = 0.01
+    service = NursingChatService(llm=fake_llm)
+
+    async def run():
+        async with async_session() as session:
+            for conversation_id, bed in (("conv-flight-a", "bed 4"), ("conv-flight-b", "bed 9")):
+                session.add(Conversation(id=conversation_id, user_id="anonymous"))
+                session.add(Message(conversation_id=conversation_id, role="user", content=f"My patient in {bed} has a PICC line."))
+                session.add(Message(conversation_id=conversation_id, role="assistant", content="Noted."))
+                service.conversation_user_info.set(conversation_id, UserInfo(unit="RR 4ICU", role="NURSE"))
+            await session.commit()
+        results = await asyncio.gather(*(
+            _collect(service.chat_stream("How often is its dressing changed?", conversation_id=conversation_id))
+            for conversation_id in ("conv-flight-a", "conv-flight-b")
+        ))
+        await engine.dispose()
+        return results
+
+    results = asyncio.run(run())
+
+    assert len(fake_llm.calls) == 2
+    assert sorted("bed 4" in call for call in fake_llm.calls) == [False, True]
+    assert all("".join(chunks) == fake_llm.response for chunks in results)
+    assert service.in_flight.stats() == {"in_flight": 0, "started": 2, "joined": 0}
+
+
+def test_late_joiner_gets_tokens_already_produced_replayed(database, fake_llm):
+    """
+    Test that a request joining a generation midway still receives the whole answer
+    """
+    fake_llm.response = " ".join(f"word{i}" for i in range(20))
+    fake_llm.token_delay = 0.01
+    service = NursingChatService(llm=fake_llm)
+    for conversation_id in ("conv-early", "conv-late"):
+        service.conversation_user_info.set(conversation_id, UserInfo(unit="RR 4ICU", role="NURSE"))
+    question = "How often should the IV dressing be changed?"
+
+    async def run():
+        early = asyncio.create_task(_collect(service.chat_stream(question, conversation_id="conv-early")))
+        while len(fake_llm.streamed) < 5:
+            await asyncio.sleep(0.005)
+        late = await _collect(service.chat_stream(question, conversation_id="conv-late"))
+        return await early, late
+
+    early, late = asyncio.run(run())
+
+    assert len(fake_llm.calls) == 1
+    assert "".join(early) == "".join(late) == fake_llm.response
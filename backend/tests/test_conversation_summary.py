@@ -0,0 +1,109 @@
+import asyncio
+import os
+import tempfile
+from datetime import datetime
+
+from sqlalchemy import create_engine, select, text, update
+
+from app.api.endpoints import chat
+from app.database.connection import async_session, engine as app_engine
+from app.database.conversation_summary import PREVIEW_MAX_LENGTH, auto_title, shorten
+from app.database.models import Conversation
+from app.database.schema import sync_schema
+from app.database.write_behind import message_writer
+from app.services.chat_service import NursingChatService
+from app.services.user_info import UserInfo
+
+
+def test_shorten_cuts_at_a_word_boundary():
+    """
+    Test that titles and previews collapse whitespace and end on a whole word
+    """
+    assert shorten("  What is\nthe   policy? ", 60) == "What is the policy?"
+    assert shorten("How often should central line dressings be changed on 6 north", 30) == "How often should central line…"
+    assert len(shorten("word " * 100, PREVIEW_MAX_LENGTH)) <= PREVIEW_MAX_LENGTH
+
+
+def test_conversation_list_carries_counts_previews_and_titles(client, fake_llm, monkeypatch):
+    """
+    Test that message inserts keep the conversation's summary fields and list order current
+    """
+    monkeypatch.setattr(chat.chat_service, "llm", fake_llm)
+    user_id = "anonymous"
+
+    first = client.post("/api/chat/", json={"content": "I'm an ICU nurse, what are the restraint documentation rules?"}).json()
+    client.post("/api/chat/", json={"content": "I'm an ED nurse, how do I verify blood products?"})
+    client.post("/api/chat/", json={"content": "And how often do restraints need rechecking?", "conversation_id": first["conversation_id"]})
+
+    # Reading the conversation waits for its queued writes
+    client.get(f"/api/chat/conversations/{first['conversation_id']}/messages")
+    page = client.get("/api/chat/conversations", params={"user_id": user_id}).json()
+    conversation = page["items"][0]
+
+    # The conversation that just got a message moves to the top
+    assert conversation["id"] == first["conversation_id"]
+    assert conversation["message_count"] == 4
+    assert conversation["title"] == auto_title("I'm an ICU nurse, what are the restraint documentation rules?")
+    assert conversation["last_message_preview"] == shorten(fake_llm.response, PREVIEW_MAX_LENGTH)
+    assert conversation["last_message_at"] is not None
+
+
+def test_user_info_and_summary_writes_leave_the_list_order_alone(client, fake_llm):
+    """
+    Test that only message activity moves a conversation: writing its user info or rolling
+    summary keeps updated_at, microseconds included
+    """
+    active_at = datetime(2024, 5, 1, 12, 0, 0, 123456)
+    service = NursingChatService(llm=fake_llm)
+
+    async def run():
+        async with async_session() as session:
+            for conversation_id in ("order-a", "order-b", "order-c"):
+                session.add(Conversation(id=conversation_id, user_id="orderer", updated_at=active_at))
+            await session.commit()
+        assert await service._save_user_info("order-a", UserInfo(unit="RR ED", role="NURSE"), None)
+        await message_writer.enqueue(
+            update(Conversation).where(Conversation.id == "order-b").values(summary="Asked about restraints.", summarized_through_id=2),
+            "order-b",
+        )
+        await message_writer.stop()
+        async with async_session() as session:
+            rows = (await session.execute(select(Conversation.updated_at, Conversation.unit).where(Conversation.user_id == "orderer"))).all()
+        await app_engine.dispose()
+        return rows
+
+    rows = asyncio.run(run())
+
+    assert all(row.updated_at == active_at for row in rows)
+    assert "RR ED" in {row.unit for row in rows}
+    page = client.get("/api/chat/conversations", params={"user_id": "orderer"}).json()
+    assert [item["id"] for item in page["items"]] == ["order-c", "order-b", "order-a"]
+
+
+def test_schema_sync_backfills_summaries_for_existing_conversations():
+    """
+    Test that adding the summary columns to an older database derives them from its messages
+    """
+    path = os.path.join(tempfile.mkdtemp(prefix="yapper-backfill-"), "old.db")
+    engine = create_engine(f"sqlite:///{path}")
+    with engine.begin() as conn:
+        conn.execute(text("CREATE TABLE conversations (id VARCHAR PRIMARY KEY, user_id VARCHAR, title VARCHAR, created_at DATETIME, updated_at DATETIME)"))
+        conn.execute(text("CREATE TABLE messages (id INTEGER PRIMARY KEY, conversation_id VARCHAR, role VARCHAR, content TEXT, created_at DATETIME)"))
+        conn.execute(text("INSERT INTO conversations VALUES ('old', 'anonymous', NULL, '2024-01-01 00:00:00', '2024-01-01 00:00:00')"))
+        conn.execute(text(
+            "INSERT INTO messages (conversation_id, role, content, created_at) VALUES "
+            "('old', 'user', 'What is the fall risk protocol?', '2024-01-01 00:00:00'), "
+            "('old', 'assistant', 'Use the Morse scale.', '2024-01-02 00:00:00')"
+        ))
+
+    with engine.begin() as conn:
+        sync_schema(conn)
+    with engine.connect() as conn:
+        row = conn.execute(select(Conversation).where(Conversation.id == "old")).mappings().one()
+    engine.dispose()
+
+    assert row["message_count"] == 2
+    assert row["title"] == "What is the fall risk protocol?"
+    assert row["last_message_preview"] == "Use the Morse scale."
+    assert row["last_message_at"].date().isoformat() == "2024-01-02"
+    assert row["updated_at"] == row["last_message_at"]
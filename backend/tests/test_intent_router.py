@@ -0,0 +1,56 @@
+import os
+
+from app.services.intent_router import (
+    CLARIFICATION_ROUTE,
+    GREETING,
+    QUESTION,
+    RETRIEVAL_ROUTE,
+    VAGUE,
+    IntentClassifier,
+    IntentRouter,
+)
+from app.services.user_info import UserInfo
+
+CLASSIFIER_PATH = os.path.join(os.path.dirname(__file__), "..", "intent_classifier.json")
+
+
+def test_phrases_match_whole_words_only():
+    """
+    Test that words merely containing a greeting or question word are not read as one
+    """
+    router = IntentRouter()
+
+    assert router.intent("hi") == GREETING
+    assert router.intent("How does this work?") == GREETING
+    assert router.intent("Which dressing is this?") == QUESTION
+    assert router.intent("scan the candidate list") == VAGUE
+    assert router.intent("This is confusing") == VAGUE
+    assert router.intent("why?") == VAGUE
+
+
+def test_route_needs_a_question_and_complete_user_info():
+    """
+    Test that only questions from users with a known unit and role go to retrieval
+    """
+    router = IntentRouter()
+    known = UserInfo(unit="RR 6ICU", role="NURSE")
+
+    assert router.route("What is the central line dressing schedule?", known) == RETRIEVAL_ROUTE
+    assert router.route("What is the central line dressing schedule?", UserInfo(role="NURSE")) == CLARIFICATION_ROUTE
+    assert router.route("hello", known) == CLARIFICATION_ROUTE
+
+
+def test_classifier_overrides_rules_only_when_confident():
+    """
+    Test that confident classifier predictions win and uncertain ones fall back to the rules
+    """
+    classifier = IntentClassifier.load(CLASSIFIER_PATH)
+    router = IntentRouter(classifier=classifier)
+
+    # A greeting in front of a real question no longer hides it
+    assert IntentRouter().intent("Hi, what's the policy for PCA pump checks?") == GREETING
+    assert router.intent("Hi, what's the policy for PCA pump checks?") == QUESTION
+    assert router.intent("thank you, that helps") == GREETING
+
+    unsure = IntentClassifier({QUESTION: {"weights": {"what": 1.0}}, VAGUE: {"bias": 0.5}}, min_confidence=0.99)
+    assert IntentRouter(classifier=unsure).intent("what is the restraint policy?") == QUESTION
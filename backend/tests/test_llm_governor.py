@@ -0,0 +1,100 @@
+import asyncio
+
+import pytest
+
+from app.api.endpoints import chat
+from app.services.llm_governor import LLMGovernor, LLMSaturatedError
+
+
+def test_governor_caps_calls_in_flight():
+    """
+    Test that calls beyond the in-flight limit wait for a slot
+    """
+    governor = LLMGovernor(max_in_flight=2, max_queue=10, queue_timeout=5)
+    running, peak = 0, 0
+
+    async def call():
+        nonlocal running, peak
+        async with governor.slot():
+            running += 1
+            peak = max(peak, running)
+            await asyncio.sleep(0.02)
+            running -= 1
+
+    async def run():
+        await asyncio.gather(*(call() for _ in range(6)))
+
+    asyncio.run(run())
+
+    assert peak == 2
+    assert governor.stats()["admitted"] == 6
+    assert governor.stats()["in_flight"] == 0
+
+
+def test_governor_rejects_when_queue_is_full_or_deadline_passes():
+    """
+    Test that waiting callers fail fast with 503 instead of piling up
+    """
+    governor = LLMGovernor(max_in_flight=1, max_queue=2, queue_timeout=0.05)
+
+    async def hold():
+        async with governor.slot():
+            await asyncio.sleep(0.2)
+
+    async def wait_for_slot():
+        async with governor.slot():
+            pass
+
+    async def run():
+        holder = asyncio.create_task(hold())
+        await asyncio.sleep(0)
+        results = await asyncio.gather(wait_for_slot(), wait_for_slot(), wait_for_slot(), return_exceptions=True)
+        await holder
+        return results
+
+    results = asyncio.run(run())
+
+    reasons = sorted(result.reason for result in results)
+    assert reasons == ["queue_full", "queue_timeout", "queue_timeout"]
+    assert all(result.status_code == 503 and result.retry_after >= 1 for result in results)
+    assert governor.stats()["in_flight"] == 0
+
+
+def test_governor_rate_limits_requests_per_minute():
+    """
+    Test that an exhausted request budget is rejected with 429 and a Retry-After
+    """
+    governor = LLMGovernor(max_in_flight=10, requests_per_minute=2, queue_timeout=1)
+
+    async def run():
+        for _ in range(2):
+            async with governor.slot():
+                pass
+        with pytest.raises(LLMSaturatedError) as error:
+            async with governor.slot():
+                pass
+        return error.value
+
+    error = asyncio.run(run())
+
+    assert error.status_code == 429
+    assert error.reason == "rate_limited"
+    assert 25 <= error.retry_after <= 30
+
+
+def test_saturated_llm_returns_503_with_retry_after(client, fake_llm, monkeypatch):
+    """
+    Test that both chat endpoints answer with 503 and Retry-After when no LLM slot frees up
+    """
+    monkeypatch.setattr(chat.chat_service, "llm", fake_llm)
+    monkeypatch.setattr(chat.chat_service, "governor", LLMGovernor(max_in_flight=0, queue_timeout=0.05))
+    question = {"content": "I'm an ICU nurse, what is the central line dressing change schedule?"}
+
+    response = client.post("/api/chat/", json=question)
+    stream_response = client.post("/api/chat/stream", json=question)
+
+    assert response.status_code == 503
+    assert response.headers["Retry-After"] == "1"
+    assert response.json()["reason"] == "queue_timeout"
+    assert stream_response.status_code == 503
+    assert fake_llm.calls == []
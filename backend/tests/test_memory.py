@@ -0,0 +1,138 @@
+import asyncio
+from datetime import datetime, timedelta
+
+from sqlalchemy import select
+
+from app.database.connection import async_session, engine
+from app.database.models import Conversation, Message
+from app.database.write_behind import message_writer
+from app.services.chat_service import NursingChatService
+from app.services.memory import ConversationMemory, estimate_tokens
+from app.services.user_info import UserInfo
+
+FILLER = "Chlorhexidine bathing and line care bundles were reviewed in detail for this patient. " * 4
+
+
+def _seed_conversation(conversation_id, message_count):
+    async def seed():
+        async with async_session() as session:
+            start = datetime(2024, 1, 1)
+            session.add(Conversation(id=conversation_id, user_id="memory", unit="RR 4ICU", role="NURSE"))
+            for i in range(message_count):
+                role = "user" if i % 2 == 0 else "assistant"
+                session.add(Message(conversation_id=conversation_id, role=role, content=f"turn {i}: {FILLER}", created_at=start + timedelta(seconds=i)))
+            await session.commit()
+        await engine.dispose()
+
+    asyncio.run(seed())
+
+
+def test_memory_loads_recent_turns_within_the_token_budget(database):
+    """
+    Test that only the newest turns that fit the budget are loaded, in order
+    """
+    _seed_conversation("memory-conv-1", 200)
+    memory = ConversationMemory(history_token_budget=600, summary_token_budget=100, max_messages=40)
+
+    async def run():
+        context = await memory.load("memory-conv-1")
+        await engine.dispose()
+        return context
+
+    context = asyncio.run(run())
+
+    assert 0 < len(context.turns) < 40
+    assert context.tokens <= 600
+    assert context.turns[-1]["content"].startswith("turn 199:")
+    assert context.summarize_upto_id is not None
+
+
+def test_older_turns_are_folded_into_a_stored_summary(database, fake_llm):
+    """
+    Test that the background summary is stored and replaces the turns it covers
+    """
+    # Short enough that everything out of the window fits one summary run
+    _seed_conversation("memory-conv-2", 14)
+    fake_llm.response = "ICU nurse asking about chlorhexidine bathing and line care."
+    memory = ConversationMemory(history_token_budget=600, summary_token_budget=100, max_messages=40)
+
+    async def run():
+        first = await memory.load("memory-conv-2")
+        memory.schedule_summary("memory-conv-2", first, fake_llm)
+        await memory.wait_for_summaries()
+        await message_writer.flush()
+        second = await memory.load("memory-conv-2")
+        await engine.dispose()
+        return first, second
+
+    first, second = asyncio.run(run())
+
+    assert len(fake_llm.calls) == 1
+    assert second.summary == fake_llm.response
+    assert second.summarized_through_id == first.summarize_upto_id
+    assert second.turns[-1]["content"].startswith("turn 13:")
+    # Folding down to half the budget leaves room before the next summary is needed
+    assert second.summarize_upto_id is None
+
+
+def test_summary_runs_fold_the_oldest_turns_first_without_skipping_any(database, fake_llm):
+    """
+    Test that when more turns fell out of the window than one summary run takes, the
+    oldest ones are summarized and the rest are left for the next run instead of dropped
+    """
+    _seed_conversation("memory-conv-3", 200)
+    fake_llm.response = "ICU nurse asking about chlorhexidine bathing."
+    memory = ConversationMemory(history_token_budget=600, summary_token_budget=100, max_messages=40)
+
+    async def run():
+        first = await memory.load("memory-conv-3")
+        memory.schedule_summary("memory-conv-3", first, fake_llm)
+        await memory.wait_for_summaries()
+        await message_writer.flush()
+        second = await memory.load("memory-conv-3")
+        async with async_session() as session:
+            remaining = (await session.execute(
+                select(Message.content)
+                .where(Message.conversation_id == "memory-conv-3", Message.id > second.summarized_through_id)
+                .order_by(Message.id)
+            )).scalars().all()
+        await engine.dispose()
+        return first, second, remaining
+
+    first, second, remaining = asyncio.run(run())
+    prompt = fake_llm.calls[-1]
+
+    assert "turn 0:" in prompt
+    assert estimate_tokens(prompt) < 600 * 2 + 300
+    # Stopped where the summarized slice ended, not at the end of everything that fell out of the window
+    assert 0 < second.summarized_through_id < first.summarize_upto_id
+    next_turn = int(remaining[0].split(":", 1)[0].split()[1])
+    assert f"turn {next_turn - 1}:" in prompt and f"turn {next_turn}:" not in prompt
+    assert second.summarize_upto_id is not None
+
+
+def test_prompt_size_stays_bounded_as_conversations_grow(database, fake_llm):
+    """
+    Test that the answer prompt is about the same size for short and very long conversations
+    """
+    service = NursingChatService(llm=fake_llm)
+    prompt_tokens, answer_prompts = {}, {}
+    for message_count in (20, 400):
+        question = f"What should I know about chlorhexidine bathing for that patient in bed {message_count}?"
+        conversation_id = f"memory-conv-len-{message_count}"
+        _seed_conversation(conversation_id, message_count)
+        service.conversation_user_info.set(conversation_id, UserInfo(unit="RR 4ICU", role="NURSE"))
+
+        async def run():
+            await service.chat(question, conversation_id=conversation_id)
+            await service.memory.wait_for_summaries()
+            await engine.dispose()
+
+        asyncio.run(run())
+        answer_prompts[message_count] = [call for call in fake_llm.calls if "### USER'S QUESTION ###" in call][-1]
+        prompt_tokens[message_count] = estimate_tokens(answer_prompts[message_count])
+
+    assert "turn 19:" in answer_prompts[20]
+    assert "turn 399:" in answer_prompts[400] and "turn 0:" not in answer_prompts[400]
+    assert prompt_tokens[400] <= prompt_tokens[20] * 1.5
+    assert prompt_tokens[400] < service.memory.history_token_budget + 1500
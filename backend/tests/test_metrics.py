@@ -0,0 +1,76 @@
+import asyncio
+
+from sqlalchemy import text
+from sqlalchemy.exc import OperationalError
+
+from app.api.endpoints import chat
+from app.core.metrics import Metrics, metrics
+from app.database.connection import create_engine
+
+
+def test_histograms_render_in_prometheus_format():
+    """
+    Test that histograms, counters and gauges are exposed with cumulative buckets
+    """
+    registry = Metrics()
+    registry.incr("llm_calls", node="generate_response")
+    for seconds in (0.002, 0.02, 0.2):
+        registry.observe("graph_node_duration_seconds", seconds, node="router")
+    registry.register_gauge("llm_in_flight", lambda: 3)
+
+    text = registry.render_prometheus()
+
+    assert '# TYPE graph_node_duration_seconds histogram' in text
+    assert 'graph_node_duration_seconds_bucket{node="router",le="0.005"} 1' in text
+    assert 'graph_node_duration_seconds_bucket{node="router",le="+Inf"} 3' in text
+    assert 'graph_node_duration_seconds_count{node="router"} 3' in text
+    assert 'llm_calls{node="generate_response"} 1' in text
+    assert "llm_in_flight 3" in text
+    assert registry.histogram("graph_node_duration_seconds", node="router").quantile(0.5) == 0.025
+
+
+def test_chat_reports_server_timing_and_metrics(client, fake_llm, monkeypatch):
+    """
+    Test that a turn's node, LLM and DB timings show up in Server-Timing and on /metrics
+    """
+    monkeypatch.setattr(chat.chat_service, "llm", fake_llm)
+
+    response = client.post("/api/chat/", json={"content": "I'm an ICU nurse, what are the contact precautions for MRSA?"})
+    conversation_id = response.json()["conversation_id"]
+    messages_response = client.get(f"/api/chat/conversations/{conversation_id}/messages")
+    scrape = client.get("/metrics").text
+
+    server_timing = response.headers["Server-Timing"]
+    for entry in ("node_user_info_extraction", "node_router", "node_context_retrieval", "node_generate_response", "llm;", "llm_ttft", "total;"):
+        assert entry in server_timing
+    assert "db;" in messages_response.headers["Server-Timing"]
+    assert 'graph_node_duration_seconds_count{node="generate_response"}' in scrape
+    assert 'llm_time_to_first_token_seconds_bucket{node="generate_response"' in scrape
+    assert 'db_statement_duration_seconds_count{operation="SELECT"}' in scrape
+    assert 'http_request_duration_seconds_count{path="/api/chat/"}' in scrape
+    assert "write_behind_queue_depth" in scrape
+
+
+def test_failed_statements_do_not_disturb_statement_timing():
+    """
+    Test that a statement that raises leaves no timer state on its connection and later statements are still timed
+    """
+    engine = create_engine("sqlite+aiosqlite://")
+    before = metrics.histogram("db_statement_duration_seconds", operation="SELECT").count
+
+    async def run():
+        async with engine.connect() as conn:
+            for _ in range(3):
+                try:
+                    await conn.execute(text("SELECT * FROM no_such_table"))
+                except OperationalError:
+                    pass
+            await conn.execute(text("SELECT 1"))
+            info = dict((await conn.get_raw_connection()).info)
+        await engine.dispose()
+        return info
+
+    info = asyncio.run(run())
+
+    assert "statement_started" not in info
+    assert metrics.histogram("db_statement_duration_seconds", operation="SELECT").count == before + 1
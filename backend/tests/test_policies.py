@@ -0,0 +1,109 @@
+import numpy as np
+
+from app.services.mock_policies import get_mock_policies
+from app.services.policy_corpus import PolicyCorpus, build_index, policy_corpus
+from app.services.policy_index import PolicyDocument, PolicyIndex
+from app.services.vector_index import HashingEmbedder, VectorIndex
+
+
+def test_policy_index_ranks_best_match_first():
+    """
+    Test that BM25 ranking puts the most relevant policy first
+    """
+    index = PolicyIndex.build(
+        [
+            PolicyDocument("hand_hygiene", "Hand Hygiene", "Use alcohol-based hand rub before patient contact.", frozenset(["ICU"])),
+            PolicyDocument("iv_lines", "IV Lines", "Flush lines with saline. Perform hand hygiene first.", frozenset(["ICU"])),
+            PolicyDocument("triage", "Triage", "Assign an ESI level to every patient.", frozenset(["ED"])),
+        ]
+    )
+
+    results = index.search("hand hygiene before contact", units=["ICU"], k=2)
+
+    assert [document.policy_id for _, document in results] == ["hand_hygiene", "iv_lines"]
+    assert results[0][0] > results[1][0]
+
+
+def test_policy_index_filters_by_unit():
+    """
+    Test that documents outside the requested policy groups are never returned
+    """
+    index = PolicyIndex.build(
+        [
+            PolicyDocument("triage", "Triage", "Assign an ESI level to all patients.", frozenset(["ED"])),
+            PolicyDocument("isolation", "Isolation", "Patients in isolation need dedicated equipment.", frozenset(["ICU"])),
+        ]
+    )
+
+    assert [document.policy_id for _, document in index.search("patients", units=["ICU"])] == ["isolation"]
+    assert index.search("triage", units=["ICU"]) == []
+
+
+def test_get_mock_policies_returns_top_match_for_unit():
+    """
+    Test that policy lookup returns the unit group's matching policy first
+    """
+    policies = get_mock_policies("RR ED", "What are the triage levels?")
+
+    assert policies[0]["title"] == "Emergency Department Triage Protocol"
+    assert policies[0]["unit_specific"] == "This policy is specific to RR ED operations."
+
+
+def test_get_mock_policies_reports_when_nothing_matches():
+    """
+    Test that an unmatched question returns the no-policy placeholder
+    """
+    policies = get_mock_policies("RR 4ICU", "parking validation")
+
+    assert policies[0]["title"] == "No Policy Found for RR 4ICU"
+
+
+def test_vector_index_memory_maps_saved_vectors(tmp_path):
+    """
+    Test that saved policy vectors load memory-mapped and score like the in-memory matrix
+    """
+    embedder = HashingEmbedder(dimensions=128)
+    built = VectorIndex.build(policy_corpus.current().index.documents, embedder)
+    path = str(tmp_path / "vectors.npy")
+    built.save(path)
+
+    loaded = VectorIndex.load(path, embedder)
+
+    assert isinstance(loaded.vectors, np.memmap)
+    assert loaded.vectors.dtype == np.float32
+    np.testing.assert_allclose(loaded.score("hand hygiene"), built.score("hand hygiene"), rtol=1e-6)
+
+
+def test_get_mock_policies_supports_dense_and_hybrid_modes():
+    """
+    Test that dense and hybrid retrieval find the same top policy as keyword search
+    """
+    for mode in ["dense", "hybrid"]:
+        policies = get_mock_policies("RR 4ICU", "What is the hand hygiene protocol?", mode=mode)
+
+        assert policies[0]["title"] == "Hand Hygiene Protocol for ICU"
+
+
+def test_policy_corpus_hot_reloads_published_index(tmp_path):
+    """
+    Test that a rebuilt index is picked up through the CURRENT pointer without reparsing in the worker
+    """
+    source_dir = tmp_path / "policies" / "icu"
+    source_dir.mkdir(parents=True)
+    (source_dir / "hand_hygiene.md").write_text("---\ntitle: Hand Hygiene\nunits: ICU\n---\nUse alcohol-based hand rub.\n")
+    index_dir = str(tmp_path / "index")
+
+    first_version = build_index(str(tmp_path / "policies"), index_dir, embedding_dimensions=64)
+    corpus = PolicyCorpus(str(tmp_path / "policies"), index_dir, embedding_dimensions=64, reload_interval=0)
+    snapshot = corpus.current()
+
+    assert snapshot.version == first_version
+    assert isinstance(snapshot.index.weights, np.memmap)
+    assert snapshot.policy_ids("ICU") == ["hand_hygiene"]
+
+    (source_dir / "central_lines.md").write_text("---\ntitle: Central Line Dressings\nunits: ICU\n---\nChange dressings every 7 days.\n")
+    second_version = build_index(str(tmp_path / "policies"), index_dir, embedding_dimensions=64)
+
+    assert second_version != first_version
+    assert corpus.current().version == second_version
+    assert corpus.current().index.search("central line dressing", units=["ICU"])[0][1].policy_id == "central_lines"
@@ -0,0 +1,140 @@
+import os
+import tempfile
+from datetime import datetime, timedelta, timezone
+
+from sqlalchemy import create_engine, delete, insert, text, update
+
+from app.config import settings
+from app.database.models import Conversation, Message
+from app.database.schema import sync_schema
+from app.database.search import match_expression, search_query
+
+
+def test_match_expression_quotes_every_word():
+    """
+    Test that search text is reduced to quoted words, so FTS5 syntax in it is never parsed
+    """
+    assert match_expression('central "line" OR dressing*') == 'content : ("central" "line" "OR" "dressing")'
+    assert match_expression("NEAR(heparin, drip") == 'content : ("NEAR" "heparin" "drip")'
+    assert match_expression(" ?! ") is None
+
+
+def test_search_ranks_highlights_filters_and_pages(client):
+    """
+    Test that search returns best matches first with highlighted snippets, honours the
+    user and date filters, and pages through every match exactly once
+    """
+    now = datetime.now(timezone.utc).replace(tzinfo=None)
+    engine = create_engine(settings.DATABASE_URL.replace("+aiosqlite", ""))
+    with engine.begin() as conn:
+        conn.execute(insert(Conversation), [
+            {"id": "search-icu", "user_id": "search-nurse", "title": "Line care"},
+            {"id": "search-ed", "user_id": "search-educator", "title": None},
+        ])
+        conn.execute(insert(Message), [
+            {"conversation_id": "search-icu", "role": "user", "content": "How often is a tegaderm dressing changed on a central line?", "created_at": now},
+            {"conversation_id": "search-icu", "role": "assistant", "content": "Change the tegaderm every seven days, or sooner if soiled.", "created_at": now},
+            {"conversation_id": "search-ed", "role": "user", "content": "Tegaderm over a peripheral IV, and is a tegaderm dressing reusable?", "created_at": now - timedelta(days=10)},
+        ])
+    engine.dispose()
+
+    page = client.get("/api/chat/search", params={"q": "tegaderm dressing"}).json()
+    assert [item["conversation_id"] for item in page["items"]] == ["search-ed", "search-icu"]
+    assert "**tegaderm** **dressing**" in page["items"][1]["snippet"]
+    assert page["items"][1]["conversation_title"] == "Line care"
+    assert page["next_cursor"] is None
+
+    mine = client.get("/api/chat/search", params={"q": "tegaderm", "user_id": "search-nurse"}).json()
+    assert {item["user_id"] for item in mine["items"]} == {"search-nurse"}
+    this_week = client.get("/api/chat/search", params={"q": "tegaderm", "since": (now - timedelta(days=7)).isoformat()}).json()
+    assert {item["conversation_id"] for item in this_week["items"]} == {"search-icu"}
+
+    seen = []
+    cursor = None
+    while True:
+        params = {"q": "tegaderm", "limit": 1, **({"cursor": cursor} if cursor else {})}
+        result = client.get("/api/chat/search", params=params).json()
+        seen += [item["message_id"] for item in result["items"]]
+        cursor = result["next_cursor"]
+        if not cursor:
+            break
+    everything = client.get("/api/chat/search", params={"q": "tegaderm"}).json()
+    assert seen == [item["message_id"] for item in everything["items"]]
+    assert len(seen) == 3
+
+    assert client.get("/api/chat/search", params={"q": "tegaderm", "cursor": "nope"}).status_code == 400
+
+
+def test_index_is_built_for_existing_messages_and_follows_changes():
+    """
+    Test that schema sync indexes messages already in the database, and that edits and
+    deletes of messages are reflected in search
+    """
+    path = os.path.join(tempfile.mkdtemp(prefix="yapper-search-"), "old.db")
+    engine = create_engine(f"sqlite:///{path}")
+    with engine.begin() as conn:
+        conn.execute(text("CREATE TABLE conversations (id VARCHAR PRIMARY KEY, user_id VARCHAR, title VARCHAR, created_at DATETIME, updated_at DATETIME)"))
+        conn.execute(text("CREATE TABLE messages (id INTEGER PRIMARY KEY, conversation_id VARCHAR, role VARCHAR, content TEXT, created_at DATETIME)"))
+        conn.execute(text("INSERT INTO conversations VALUES ('old', 'anonymous', NULL, '2024-01-01 00:00:00', '2024-01-01 00:00:00')"))
+        conn.execute(text("INSERT INTO messages (conversation_id, role, content, created_at) VALUES ('old', 'user', 'Restraint checks every two hours?', '2024-01-01 00:00:00')"))
+
+    def found(word, **options):
+        with engine.connect() as conn:
+            return [row.message_id for row in conn.execute(search_query(match_expression(word), 10, **options))]
+
+    with engine.begin() as conn:
+        sync_schema(conn)
+    assert found("restraints") == [1]
+
+    # Only the newest matches are ranked
+    with engine.begin() as conn:
+        conn.execute(insert(Message).values(conversation_id="old", role="user", content="Restraint orders renew daily?"))
+    assert sorted(found("restraint")) == [1, 2]
+    assert found("restraint", max_candidates=1) == [2]
+    with engine.begin() as conn:
+        conn.execute(delete(Message).where(Message.id == 2))
+
+    with engine.begin() as conn:
+        conn.execute(update(Message).where(Message.id == 1).values(content="Seclusion checks every hour?"))
+    assert found("restraint") == []
+    assert found("seclusion") == [1]
+
+    with engine.begin() as conn:
+        conn.execute(delete(Message).where(Message.id == 1))
+    assert found("seclusion") == []
+    engine.dispose()
+
+
+def test_schema_sync_rebuilds_an_index_with_an_outdated_definition():
+    """
+    Test that an index that still has the conversation_id column is replaced by the text-only
+    one, with existing messages reindexed and user filtering done by join
+    """
+    path = os.path.join(tempfile.mkdtemp(prefix="yapper-search-"), "indexed.db")
+    engine = create_engine(f"sqlite:///{path}")
+    with engine.begin() as conn:
+        conn.execute(text("CREATE TABLE conversations (id VARCHAR PRIMARY KEY, user_id VARCHAR, title VARCHAR, created_at DATETIME, updated_at DATETIME)"))
+        conn.execute(text("CREATE TABLE messages (id INTEGER PRIMARY KEY, conversation_id VARCHAR, role VARCHAR, content TEXT, created_at DATETIME)"))
+        conn.execute(text(
+            "CREATE VIRTUAL TABLE messages_fts USING fts5(content, conversation_id, content='messages', content_rowid='id')"
+        ))
+        conn.execute(text(
+            "CREATE TRIGGER messages_fts_insert AFTER INSERT ON messages BEGIN "
+            "INSERT INTO messages_fts(rowid, content, conversation_id) VALUES (new.id, new.content, new.conversation_id); END"
+        ))
+        conn.execute(text("INSERT INTO conversations VALUES ('mine', 'nurse', NULL, '2024-01-01 00:00:00', '2024-01-01 00:00:00')"))
+        conn.execute(text("INSERT INTO conversations VALUES ('theirs', 'tech', NULL, '2024-01-01 00:00:00', '2024-01-01 00:00:00')"))
+        conn.execute(text("INSERT INTO messages (conversation_id, role, content, created_at) VALUES ('mine', 'user', 'Telemetry box battery swaps?', '2024-01-01 00:00:00')"))
+
+    with engine.begin() as conn:
+        sync_schema(conn)
+        conn.execute(insert(Message).values(conversation_id="theirs", role="user", content="Telemetry leads falling off?"))
+    with engine.connect() as conn:
+        columns = [row.name for row in conn.execute(text("PRAGMA table_info(messages_fts)"))]
+        found = [row.message_id for row in conn.execute(search_query(match_expression("telemetry"), 10))]
+        mine = [row.message_id for row in conn.execute(search_query(match_expression("telemetry"), 10, user_id="nurse"))]
+    engine.dispose()
+
+    assert columns == ["content"]
+    assert sorted(found) == [1, 2]
+    assert mine == [1]
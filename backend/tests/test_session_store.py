@@ -0,0 +1,167 @@
+import asyncio
+import json
+from dataclasses import asdict
+from datetime import datetime, timedelta, timezone
+
+from sqlalchemy import select, update
+
+from app.database.connection import async_session, engine
+from app.database.models import Conversation, SessionState
+from app.services.chat_service import NursingChatService
+from app.services.session_store import DatabaseSessionBackend, MemorySessionBackend, SessionStore
+from app.services.user_info import UserInfo
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+def test_session_store_evicts_least_recently_used():
+    """
+    Test that the store never grows past its maximum size
+    """
+    store = SessionStore(max_size=2, ttl_seconds=60)
+    store.set("a", 1)
+    store.set("b", 2)
+    store.get("a")
+    store.set("c", 3)
+
+    assert len(store) == 2
+    assert store.get("b") is None
+    assert store.get("a") == 1
+    assert store.get("c") == 3
+
+
+def test_session_store_expires_idle_entries():
+    """
+    Test that entries expire once they have been idle longer than the TTL
+    """
+    clock = FakeClock()
+    store = SessionStore(max_size=10, ttl_seconds=60, clock=clock)
+    store.set("a", 1)
+    store.set("b", 2)
+
+    clock.now = 30
+    assert store.get("a") == 1
+
+    clock.now = 80
+    store.set("c", 3)
+
+    assert store.get("b") is None
+    assert store.get("a") == 1
+    assert len(store) == 2
+
+
+def test_evicted_user_info_is_reloaded_from_conversations_table(database, fake_llm):
+    """
+    Test that user info survives eviction by falling back to the conversation row
+    """
+    service = NursingChatService(llm=fake_llm)
+
+    async def run():
+        async with async_session() as session:
+            session.add(Conversation(id="conv-evicted", user_id="anonymous", unit="RR ED", role="NURSE"))
+            await session.commit()
+        user_info = await service._get_user_info("conv-evicted")
+        await engine.dispose()
+        return user_info
+
+    user_info = asyncio.run(run())
+
+    assert user_info == UserInfo(unit="RR ED", role="NURSE")
+    assert service.conversation_user_info.get("conv-evicted") == user_info
+
+
+def test_compare_and_set_rejects_stale_versions():
+    """
+    Test that a write based on an outdated read is refused instead of overwriting
+    """
+    backend = MemorySessionBackend()
+
+    async def run():
+        assert await backend.compare_and_set("conv", {"unit": "RR ED"}, None)
+        assert not await backend.compare_and_set("conv", {"unit": "RR 6N"}, None)
+        entry = await backend.load("conv")
+        assert await backend.compare_and_set("conv", {"unit": "RR 6N"}, entry.version)
+        assert not await backend.compare_and_set("conv", {"unit": "RR 7N"}, entry.version)
+        return await backend.load("conv")
+
+    entry = asyncio.run(run())
+
+    assert entry.value == {"unit": "RR 6N"}
+    assert entry.version == 2
+
+
+def test_database_backend_keeps_workers_consistent(database, fake_llm):
+    """
+    Test that workers sharing the database backend see each other's user info and never lose an update
+    """
+    def worker():
+        service = NursingChatService(llm=fake_llm)
+        service.conversation_user_info = DatabaseSessionBackend(
+            async_session, "user_info", lambda info: json.dumps(asdict(info)), lambda text: UserInfo(**json.loads(text))
+        )
+        return service
+
+    first, second = worker(), worker()
+
+    def extract(service, message):
+        return service._extract_user_info_node({"conversation_id": "conv-shared", "current_message": message})
+
+    async def run():
+        async with async_session() as session:
+            session.add(Conversation(id="conv-shared", user_id="anonymous"))
+            await session.commit()
+        await extract(first, "I work in the ED")
+        learned, version = await second._load_user_info("conv-shared")
+        # Both workers start from the same version; the second write loses and must not clobber the first
+        assert await first._save_user_info("conv-shared", UserInfo(unit="RR 6N"), version)
+        assert not await second._save_user_info("conv-shared", UserInfo(unit="RR ED", role="NURSE"), version)
+        await extract(second, "I'm a nurse")
+        final = await second._get_user_info("conv-shared")
+        await engine.dispose()
+        return learned, final
+
+    learned, final = asyncio.run(run())
+
+    assert learned == UserInfo(unit="RR ED")
+    assert final == UserInfo(unit="RR 6N", role="NURSE")
+
+
+def test_database_backend_prunes_rows_past_the_ttl(database):
+    """
+    Test that rows not written within the TTL are deleted on a later write, and only this namespace's
+    """
+    clock = FakeClock()
+    backend = DatabaseSessionBackend(async_session, "pruned", str, str, ttl_seconds=60, prune_interval_seconds=30, clock=clock)
+    neighbour = DatabaseSessionBackend(async_session, "kept", str, str, ttl_seconds=3600)
+
+    async def run():
+        assert await backend.compare_and_set("idle", "a", None)
+        assert await backend.compare_and_set("active", "b", None)
+        assert await neighbour.compare_and_set("idle", "c", None)
+        async with async_session() as session:
+            await session.execute(
+                update(SessionState)
+                .where(SessionState.key.in_(["pruned:idle", "kept:idle"]))
+                .values(updated_at=datetime.now(timezone.utc).replace(tzinfo=None) - timedelta(minutes=5))
+            )
+            await session.commit()
+
+        # Not due yet: this worker pruned on its first write
+        clock.now = 10
+        assert await backend.compare_and_set("active", "b2", 1)
+        assert await backend.load("idle") is not None
+
+        clock.now = 40
+        assert await backend.compare_and_set("active", "b3", 2)
+        async with async_session() as session:
+            keys = (await session.execute(select(SessionState.key).where(SessionState.key.in_(["pruned:idle", "pruned:active", "kept:idle"])))).scalars().all()
+        await engine.dispose()
+        return sorted(keys)
+
+    assert asyncio.run(run()) == ["kept:idle", "pruned:active"]
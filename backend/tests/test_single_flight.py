@@ -0,0 +1,35 @@
+import asyncio
+
+from app.services.single_flight import SingleFlight
+
+
+def test_generation_is_cancelled_when_every_follower_leaves():
+    """
+    Test that abandoning a flight stops its generation and lets the key start afresh
+    """
+    flights = SingleFlight()
+    state = {"cancelled": False}
+
+    async def generate(publish):
+        try:
+            for i in range(100):
+                publish(f"token{i} ")
+                await asyncio.sleep(0.01)
+        except asyncio.CancelledError:
+            state["cancelled"] = True
+            raise
+        return ""
+
+    async def run():
+        stream = flights.follow("question", generate)
+        async for token in stream:
+            if token == "token2 ":
+                break
+        await stream.aclose()
+        await asyncio.sleep(0.05)
+        return len(flights)
+
+    remaining = asyncio.run(run())
+
+    assert state["cancelled"]
+    assert remaining == 0
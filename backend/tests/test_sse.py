@@ -0,0 +1,105 @@
+import asyncio
+import json
+
+from app.core.sse import SSEWriter, get_json_encoder
+
+
+async def _tokens(words, delay=0.0):
+    for word in words:
+        await asyncio.sleep(delay)
+        yield word
+
+
+def _collect(writer, tokens):
+    async def run():
+        return [frame async for frame in writer.stream(tokens)]
+
+    return asyncio.run(run())
+
+
+def _payloads(frames):
+    return [json.loads(frame.decode()[len("data: "):]) for frame in frames]
+
+
+def test_frames_match_the_json_payload_format():
+    """
+    Test that pre-encoded frames decode to the same payload the client always received
+    """
+    writer = SSEWriter({"conversation_id": "conv-1"}, encoder=get_json_encoder("json"))
+    frames = _collect(writer, _tokens(["Hello", ' "world"', "\n"]))
+
+    assert all(frame.startswith(b"data: ") and frame.endswith(b"\n\n") for frame in frames)
+    assert _payloads(frames) == [
+        {"content": "Hello", "conversation_id": "conv-1"},
+        {"content": ' "world"', "conversation_id": "conv-1"},
+        {"content": "\n", "conversation_id": "conv-1"},
+    ]
+    assert writer.text == 'Hello "world"\n'
+    assert json.loads(writer.event({"type": "done"})[len("data: "):]) == {"type": "done"}
+
+
+def test_tokens_within_the_window_share_a_frame():
+    """
+    Test that fast tokens are coalesced, while the first token is sent on its own
+    """
+    words = [f"w{i} " for i in range(100)]
+    writer = SSEWriter({"conversation_id": "conv-1"}, coalesce_ms=50, max_chars=40)
+    frames = _collect(writer, _tokens(words))
+
+    contents = [payload["content"] for payload in _payloads(frames)]
+    assert contents[0] == "w0 "
+    assert "".join(contents) == "".join(words)
+    assert len(frames) < len(words) / 5
+    assert all(len(content) < 40 + 4 for content in contents)
+
+
+def test_buffered_tokens_are_flushed_when_the_window_ends():
+    """
+    Test that a pause in the token stream does not hold back buffered text
+    """
+    async def run():
+        writer = SSEWriter(coalesce_ms=20, max_chars=1000)
+        received = []
+
+        async def tokens():
+            yield "first "
+            await asyncio.sleep(0.05)
+            yield "second "
+            await asyncio.sleep(0.3)
+            yield "third"
+
+        start = asyncio.get_running_loop().time()
+        async for frame in writer.stream(tokens()):
+            received.append((json.loads(frame[len("data: "):])["content"], asyncio.get_running_loop().time() - start))
+        return received
+
+    received = asyncio.run(run())
+
+    assert [content for content, _ in received] == ["first ", "second ", "third"]
+    # "second " went out when its window closed, not when "third" arrived
+    assert received[1][1] < 0.2
+
+
+def test_closing_the_stream_closes_the_token_source_right_away():
+    """
+    Test that a client going away ends the upstream token stream at once, with and without coalescing
+    """
+    async def run(coalesce_ms):
+        closed = []
+
+        async def tokens():
+            try:
+                for i in range(100):
+                    await asyncio.sleep(0.001)
+                    yield f"w{i} "
+            finally:
+                closed.append(True)
+
+        frames = SSEWriter(coalesce_ms=coalesce_ms).stream(tokens())
+        await frames.__anext__()
+        await frames.aclose()
+        # Checked before asyncio.run finalizes leftover generators itself
+        return list(closed)
+
+    assert asyncio.run(run(0)) == [True]
+    assert asyncio.run(run(20)) == [True]
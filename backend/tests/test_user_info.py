@@ -0,0 +1,63 @@
+from app.services.user_info import HospitalUnits, UnitMatcher, UserInfo, extract_user_info
+
+
+def test_find_unit_matches_exact_names_and_aliases():
+    """
+    Test that unit names and aliases still resolve on their own
+    """
+    assert HospitalUnits.find_unit("RR 6N") == "RR 6N"
+    assert HospitalUnits.find_unit("sm ed") == "SM ED"
+    assert HospitalUnits.find_unit("liver tx") == "RR 8N"
+    assert HospitalUnits.find_unit("pharmacy") is None
+
+
+def test_find_unit_finds_mentions_in_free_text():
+    """
+    Test that a unit mentioned anywhere in a sentence is found
+    """
+    assert HospitalUnits.find_unit("I'm an RN on 6 north") == "RR 6N"
+    assert HospitalUnits.find_unit("tech working head and neck today") == "RR 8W"
+    assert HospitalUnits.find_unit("nurse in the cardio-thoracic unit") == "RR 7ICU"
+
+
+def test_find_unit_breaks_ties_deterministically():
+    """
+    Test that specific aliases beat shared ones and shared aliases resolve to the first declaring unit
+    """
+    assert HospitalUnits.find_unit("ICU") == "RR 6ICU"
+    assert HospitalUnits.find_unit("surgery") == "RR 6W"
+    assert HospitalUnits.find_unit("ICU nurse, 4 central wing ICU") == "SM 4CWICU"
+    assert HospitalUnits.find_unit("vascular surgery on 7 north") == "RR 6W"
+
+
+def test_unit_matcher_scales_to_many_units():
+    """
+    Test that a matcher over thousands of units still resolves the right one
+    """
+    units = {f"H{h} U{u}": [f"HOSPITAL {h} UNIT {u}", f"H{h}U{u}"] for h in range(50) for u in range(100)}
+    matcher = UnitMatcher(units)
+
+    assert matcher.find("I work at hospital 42 unit 7 nights") == "H42 U7"
+    assert matcher.find("float pool, h3u99 this week") == "H3 U99"
+
+
+def test_extract_user_info_reads_unit_from_sentence():
+    """
+    Test that user info extraction picks up a unit from a full sentence
+    """
+    user_info = extract_user_info("I'm an RN on 6 north", UserInfo())
+
+    assert user_info == UserInfo(unit="RR 6N", role="NURSE")
+
+
+def test_extract_user_info_keeps_known_unit_for_mentions_of_other_units():
+    """
+    Test that asking about another unit does not move the user there, but saying they work there does
+    """
+    known = UserInfo(unit="RR 6N", role="NURSE")
+
+    assert extract_user_info("what's the ICU transfer policy?", known) == known
+    assert extract_user_info("when do I call the ER?", known) == known
+    assert extract_user_info("I'm floating to the ED today", known) == UserInfo(unit="RR ED", role="NURSE")
+    assert extract_user_info("my unit is 7 west now", known) == UserInfo(unit="RR 7W", role="NURSE")
+    assert extract_user_info("what's the ICU transfer policy?", UserInfo(role="NURSE")).unit == "RR 6ICU"
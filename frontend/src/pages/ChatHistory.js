@@ -6,16 +6,25 @@ function ChatHistory() {
   const [selectedConversation, setSelectedConversation] = useState(null);
   const [messages, setMessages] = useState([]);
   const [loading, setLoading] = useState(false);
+  const [conversationsCursor, setConversationsCursor] = useState(null);
+  const [messagesCursor, setMessagesCursor] = useState(null);
 
   useEffect(() => {
     loadConversations();
   }, []);
 
-  const loadConversations = async () => {
+  // Pages are keyset-paginated; a cursor loads the page after it and appends it to the list
+  const loadConversations = async (cursor = null) => {
     try {
       setLoading(true);
-      const data = await getConversations();
-      setConversations(data);
+      const data = await getConversations(cursor);
+      setConversations((previous) => {
+        if (!cursor) return data.items;
+        // The list is ordered by last activity, so a conversation updated while paging can reappear
+        const seen = new Set(previous.map((conv) => conv.id));
+        return [...previous, ...data.items.filter((conv) => !seen.has(conv.id))];
+      });
+      setConversationsCursor(data.next_cursor);
     } catch (error) {
       console.error('Failed to load conversations:', error);
     } finally {
@@ -23,11 +32,12 @@ function ChatHistory() {
     }
   };
 
-  const loadMessages = async (conversationId) => {
+  const loadMessages = async (conversationId, cursor = null) => {
     try {
       setLoading(true);
-      const data = await getConversationMessages(conversationId);
-      setMessages(data);
+      const data = await getConversationMessages(conversationId, cursor);
+      setMessages((previous) => (cursor ? [...previous, ...data.items] : data.items));
+      setMessagesCursor(data.next_cursor);
       setSelectedConversation(conversationId);
     } catch (error) {
       console.error('Failed to load messages:', error);
@@ -67,6 +77,15 @@ function ChatHistory() {
                 </button>
               ))}
             </div>
+            {conversationsCursor && (
+              <button
+                onClick={() => loadConversations(conversationsCursor)}
+                disabled={loading}
+                className="mt-4 w-full p-2 rounded border text-sm text-blue-600 hover:bg-gray-50 disabled:opacity-50"
+              >
+                Load more conversations
+              </button>
+            )}
           </div>
 
           {/* Messages */}
@@ -77,9 +96,9 @@ function ChatHistory() {
             )}
             {selectedConversation && (
               <div className="space-y-4 max-h-96 overflow-y-auto">
-                {messages.map((message, index) => (
+                {messages.map((message) => (
                   <div
-                    key={index}
+                    key={message.id}
                     className={`flex ${
                       message.role === 'user' ? 'justify-end' : 'justify-start'
                     }`}
@@ -100,6 +119,15 @@ function ChatHistory() {
                     </div>
                   </div>
                 ))}
+                {messagesCursor && (
+                  <button
+                    onClick={() => loadMessages(selectedConversation, messagesCursor)}
+                    disabled={loading}
+                    className="w-full p-2 rounded border text-sm text-blue-600 hover:bg-gray-50 disabled:opacity-50"
+                  >
+                    Load more messages
+                  </button>
+                )}
               </div>
             )}
           </div>
@@ -155,12 +155,13 @@ export const sendStreamingChatMessage = async (content, conversationId = null, o
 };
 
 /**
- * Get conversation history
- * @returns {Promise} - Promise with conversations list
+ * Get a page of conversation history
+ * @param {string} cursor - Optional cursor returned as next_cursor by the previous page
+ * @returns {Promise} - Promise with { items, next_cursor }
  */
-export const getConversations = async () => {
+export const getConversations = async (cursor = null) => {
   try {
-    const response = await api.get('/api/chat/conversations');
+    const response = await api.get('/api/chat/conversations', { params: cursor ? { cursor } : {} });
     return response.data;
   } catch (error) {
     console.error('Error fetching conversations:', error);
@@ -169,13 +170,14 @@ export const getConversations = async () => {
 };
 
 /**
- * Get messages for a specific conversation
+ * Get a page of messages for a specific conversation
  * @param {string} conversationId - Conversation ID
- * @returns {Promise} - Promise with messages list
+ * @param {string} cursor - Optional cursor returned as next_cursor by the previous page
+ * @returns {Promise} - Promise with { items, next_cursor }
  */
-export const getConversationMessages = async (conversationId) => {
+export const getConversationMessages = async (conversationId, cursor = null) => {
   try {
-    const response = await api.get(`/api/chat/conversations/${conversationId}/messages`);
+    const response = await api.get(`/api/chat/conversations/${conversationId}/messages`, { params: cursor ? { cursor } : {} });
     return response.data;
   } catch (error) {
     console.error('Error fetching conversation messages:', error);